@@ -0,0 +1,189 @@
+"""
+Admission control for the transform server
+
+Transform requests take a slot from a fixed number of concurrent runs per
+worker. When none is free they wait in a queue ordered by priority class,
+and each transform may only have a bounded number of requests waiting.
+Requests over that bound, or waiting longer than the class allows, are
+answered at once with a PartialError instead of piling up until Maltego
+times out.
+"""
+
+import heapq
+import itertools
+import logging
+import threading
+import time
+from typing import Dict, Optional
+
+from flask import g, request
+from maltego_trx.maltego import MaltegoTransform
+
+import settings
+from transforms import metrics
+
+logger = logging.getLogger(__name__)
+
+HIGH, NORMAL, LOW = 0, 1, 2
+CLASS_NAMES = {HIGH: "high", NORMAL: "normal", LOW: "low"}
+
+ADMISSION_CONCURRENCY = getattr(settings, "TOMBA_ADMISSION_CONCURRENCY", 20)
+
+# Cheap or offline transforms go first; heavy paginated ones go last
+DEFAULT_PRIORITIES = {
+    "accountinfo": HIGH,
+    "fetchjobresults": HIGH,
+    "technologydomains": HIGH,
+    "domainsearch": LOW,
+    "domainpipeline": LOW,
+    "domainmonitor": LOW,
+    "similarneighborhood": LOW,
+}
+PRIORITIES = {**DEFAULT_PRIORITIES, **{
+    name.lower(): {"high": HIGH, "normal": NORMAL, "low": LOW}[level]
+    for name, level in getattr(settings, "TOMBA_ADMISSION_PRIORITIES", {}).items()
+}}
+
+# Requests allowed to wait per transform, by class unless overridden
+DEFAULT_QUEUE_LIMITS = {HIGH: 50, NORMAL: 20, LOW: 5}
+QUEUE_LIMITS = {name.lower(): limit for name, limit in
+                getattr(settings, "TOMBA_ADMISSION_QUEUE_LIMITS", {}).items()}
+
+# Longest a request may wait for a slot, by class (seconds)
+MAX_WAIT = {HIGH: 20, NORMAL: 15, LOW: 10}
+MAX_WAIT.update({
+    {"high": HIGH, "normal": NORMAL, "low": LOW}[level]: seconds
+    for level, seconds in getattr(settings, "TOMBA_ADMISSION_MAX_WAIT", {}).items()
+})
+
+metrics.describe("tomba_admission_running", "gauge", "Transform runs holding a slot")
+metrics.describe("tomba_admission_waiting", "gauge", "Transform requests waiting for a slot")
+metrics.describe("tomba_admission_rejected_total", "counter", "Transform requests shed")
+metrics.describe("tomba_admission_wait_seconds_total", "counter",
+                 "Summed queue wait of admitted requests")
+
+
+class Rejected(Exception):
+    """Raised when a request is shed instead of admitted"""
+
+
+class _Waiter:
+    __slots__ = ("transform", "admitted")
+
+    def __init__(self, transform: str):
+        self.transform = transform
+        self.admitted = False
+
+
+class AdmissionController:
+    """Bounded slots with per-transform queues and priority ordering"""
+
+    def __init__(self, concurrency: int = ADMISSION_CONCURRENCY):
+        self.concurrency = concurrency
+        self.running = 0
+        self._heap = []
+        self._order = itertools.count()
+        self._waiting: Dict[str, int] = {}
+        self._cond = threading.Condition()
+
+    @staticmethod
+    def priority(transform: str) -> int:
+        return PRIORITIES.get(transform, NORMAL)
+
+    @classmethod
+    def queue_limit(cls, transform: str) -> int:
+        return QUEUE_LIMITS.get(transform, DEFAULT_QUEUE_LIMITS[cls.priority(transform)])
+
+    def acquire(self, transform: str):
+        """Take a run slot for ``transform`` or raise Rejected"""
+        priority = self.priority(transform)
+        with self._cond:
+            if self.running < self.concurrency and not self._heap:
+                self.running += 1
+                self._export()
+                return
+
+            waiting = self._waiting.get(transform, 0)
+            if waiting >= self.queue_limit(transform):
+                self._reject(transform, "queue_full")
+                raise Rejected(f"{waiting} requests already queued for this transform")
+
+            waiter = _Waiter(transform)
+            heapq.heappush(self._heap, (priority, next(self._order), waiter))
+            self._waiting[transform] = waiting + 1
+            self._export()
+
+            start = time.monotonic()
+            deadline = start + MAX_WAIT[priority]
+            try:
+                while not waiter.admitted:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._heap.remove(next(e for e in self._heap if e[2] is waiter))
+                        heapq.heapify(self._heap)
+                        self._reject(transform, "timeout")
+                        raise Rejected(f"no slot within {MAX_WAIT[priority]}s")
+                    self._cond.wait(remaining)
+            finally:
+                self._waiting[transform] -= 1
+                self._export()
+
+            metrics.inc("tomba_admission_wait_seconds_total", time.monotonic() - start)
+
+    def release(self):
+        """Free a slot, handing it straight to the best waiting request"""
+        with self._cond:
+            if self._heap:
+                # The slot passes on without being freed
+                _, _, waiter = heapq.heappop(self._heap)
+                waiter.admitted = True
+                self._cond.notify_all()
+            else:
+                self.running -= 1
+            self._export()
+
+    def _reject(self, transform: str, reason: str):
+        metrics.inc("tomba_admission_rejected_total", transform=transform, reason=reason)
+        logger.warning("Shedding %s request (%s, %d running)", transform, reason, self.running)
+
+    def _export(self):
+        metrics.set_gauge("tomba_admission_running", self.running)
+        for level, name in CLASS_NAMES.items():
+            metrics.set_gauge("tomba_admission_waiting",
+                              sum(1 for p, _, _ in self._heap if p == level), priority=name)
+
+
+def rejection_response(reason: str) -> str:
+    """Maltego response telling the analyst the server is shedding load"""
+    response = MaltegoTransform()
+    response.addUIMessage(
+        "🚦 The Tomba transform server is busy and did not run this transform "
+        f"({reason}). Please try again in a moment.",
+        messageType="PartialError"
+    )
+    return response.returnOutput()
+
+
+def install(app, controller: Optional[AdmissionController] = None) -> AdmissionController:
+    """Put admission control in front of the /run/<transform> routes"""
+    controller = controller or AdmissionController()
+
+    @app.before_request
+    def admit():
+        transform = (request.view_args or {}).get("transform_name")
+        if request.method != "POST" or not transform:
+            return None
+        transform = transform.lower()
+        try:
+            controller.acquire(transform)
+        except Rejected as e:
+            return rejection_response(str(e)), 200
+        g.tomba_admitted = True
+        return None
+
+    @app.teardown_request
+    def release(exc=None):
+        if g.pop("tomba_admitted", False):
+            controller.release()
+
+    return controller
@@ -0,0 +1,78 @@
+"""
+Response compression for the transform server
+
+Transform responses above a size threshold are gzip- or deflate-encoded
+when the client's Accept-Encoding allows it. Raw and sent byte counts are
+exported as metrics so the savings on slow analyst links are visible.
+"""
+
+import gzip
+import logging
+import zlib
+
+from flask import request
+
+import settings
+from transforms import metrics
+
+logger = logging.getLogger(__name__)
+
+COMPRESS_MIN_BYTES = getattr(settings, "TOMBA_COMPRESS_MIN_BYTES", 1024)
+COMPRESS_LEVEL = getattr(settings, "TOMBA_COMPRESS_LEVEL", 6)
+
+metrics.describe("tomba_response_raw_bytes_total", "counter",
+                 "Transform response bytes before compression")
+metrics.describe("tomba_response_sent_bytes_total", "counter",
+                 "Transform response bytes sent, by content encoding")
+
+
+def _accepted_encoding(header: str):
+    """Pick gzip or deflate from an Accept-Encoding header"""
+    accepted = {}
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                pass
+        accepted[name.strip().lower()] = quality
+    for encoding in ("gzip", "deflate"):
+        if accepted.get(encoding, accepted.get("*", 0)) > 0:
+            return encoding
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=COMPRESS_LEVEL)
+    return zlib.compress(body, COMPRESS_LEVEL)
+
+
+def install(app):
+    """Compress responses of the /run/<transform> routes"""
+
+    @app.after_request
+    def compress_response(response):
+        if not (request.view_args or {}).get("transform_name"):
+            return response
+        if response.direct_passthrough or response.status_code != 200 \
+                or "Content-Encoding" in response.headers:
+            return response
+
+        body = response.get_data()
+        metrics.inc("tomba_response_raw_bytes_total", len(body))
+
+        encoding = _accepted_encoding(request.headers.get("Accept-Encoding", ""))
+        if encoding is None or len(body) < COMPRESS_MIN_BYTES:
+            metrics.inc("tomba_response_sent_bytes_total", len(body), encoding="identity")
+            return response
+
+        compressed = compress(body, encoding)
+        response.set_data(compressed)
+        response.headers["Content-Encoding"] = encoding
+        response.vary.add("Accept-Encoding")
+        metrics.inc("tomba_response_sent_bytes_total", len(compressed), encoding=encoding)
+        logger.debug("Compressed response %d -> %d bytes (%s)", len(body), len(compressed), encoding)
+        return response
@@ -0,0 +1,238 @@
+"""
+Live memory diagnostics for the transform server
+
+Opt-in debug endpoints, enabled only when ``TOMBA_DEBUG_TOKEN`` is set and
+authenticated with that token in the ``X-Tomba-Debug-Token`` header. They
+switch ``tracemalloc`` on and off in the worker that serves the request
+and report its top allocation sites, the size of the in-memory caches,
+live ``TombaSDKWrapper`` instances and per-transform peak memory. Two
+snapshots can be diffed to see what grew in between.
+
+Every gunicorn worker has its own state; each report names its pid.
+"""
+
+import gc
+import hmac
+import itertools
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from flask import abort, g, jsonify, request
+
+import settings
+from transforms import cassette, metrics, store
+from transforms.BaseTombaTransform import TombaSDKWrapper
+
+logger = logging.getLogger(__name__)
+
+DEBUG_TOKEN = getattr(settings, "TOMBA_DEBUG_TOKEN", None)
+TRACEMALLOC_FRAMES = getattr(settings, "TOMBA_TRACEMALLOC_FRAMES", 10)
+DEBUG_TOKEN_HEADER = "X-Tomba-Debug-Token"
+
+# Snapshots kept per worker for diffing (each can be several MB)
+MAX_SNAPSHOTS = 5
+
+metrics.describe("tomba_transform_peak_bytes", "gauge",
+                 "Largest traced allocation peak of one transform request")
+
+_snapshots: "OrderedDict[int, tracemalloc.Snapshot]" = OrderedDict()
+_snapshot_ids = itertools.count(1)
+_lock = threading.Lock()
+
+# transform -> {"requests", "last_peak", "max_peak"}
+_peaks: Dict[str, Dict[str, int]] = {}
+
+
+def _rss_bytes() -> Optional[int]:
+    """Resident set size of this process, where /proc is available"""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def deep_size(obj: Any, seen: Optional[set] = None) -> int:
+    """Approximate bytes held by a container and everything it references"""
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_size(k, seen) + deep_size(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_size(item, seen) for item in obj)
+    return size
+
+
+def cache_usage() -> Dict[str, Dict[str, int]]:
+    """Entries and approximate bytes of each in-memory cache"""
+    usage: Dict[str, Dict[str, int]] = {}
+    store_stats = store.memory_stats()
+    if store_stats is not None:
+        usage["store_memory"] = store_stats
+    tape_stats = cassette.tape_stats()
+    if tape_stats is not None:
+        usage["cassette_tapes"] = tape_stats
+    accounts = [account for account in (wrapper.budget.cached_account()
+                                        for wrapper in TombaSDKWrapper.live())
+                if account]
+    if accounts:
+        usage["budget_accounts"] = {"entries": len(accounts), "bytes": deep_size(accounts)}
+    return usage
+
+
+def _top_sites(snapshot: "tracemalloc.Snapshot", limit: int) -> List[Dict[str, Any]]:
+    return [{"site": str(stat.traceback[0]), "bytes": stat.size, "count": stat.count}
+            for stat in snapshot.statistics("lineno")[:limit]]
+
+
+def report(limit: int = 20) -> Dict[str, Any]:
+    """Memory report for this worker"""
+    gc.collect()
+    body: Dict[str, Any] = {
+        "pid": os.getpid(),
+        "rss_bytes": _rss_bytes(),
+        "tracing": tracemalloc.is_tracing(),
+        "sdk_wrappers": {
+            "live": len(TombaSDKWrapper.live()),
+            "shared": TombaSDKWrapper.shared_count(),
+        },
+        "caches": cache_usage(),
+        "transform_peaks": {name: dict(peak) for name, peak in sorted(_peaks.items())},
+        "snapshots": list(_snapshots),
+    }
+    if tracemalloc.is_tracing():
+        current, peak = tracemalloc.get_traced_memory()
+        body["traced_bytes"] = current
+        body["traced_peak_bytes"] = peak
+        body["top_allocations"] = _top_sites(_take_snapshot(), limit)
+    return body
+
+
+def _take_snapshot() -> "tracemalloc.Snapshot":
+    # Our own bookkeeping would otherwise top the list
+    return tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    ))
+
+
+def start_tracing(frames: int = TRACEMALLOC_FRAMES):
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+        logger.warning("tracemalloc started in worker %d (%d frames)", os.getpid(), frames)
+
+
+def stop_tracing():
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+        with _lock:
+            _snapshots.clear()
+        logger.warning("tracemalloc stopped in worker %d", os.getpid())
+
+
+def save_snapshot() -> int:
+    """Keep a snapshot for diffing and return its id"""
+    snapshot = _take_snapshot()
+    with _lock:
+        snapshot_id = next(_snapshot_ids)
+        _snapshots[snapshot_id] = snapshot
+        while len(_snapshots) > MAX_SNAPSHOTS:
+            _snapshots.popitem(last=False)
+    return snapshot_id
+
+
+def diff(first: int, second: Optional[int] = None, limit: int = 20) -> List[Dict[str, Any]]:
+    """Allocation sites that changed most between two snapshots
+
+    Without ``second`` the first snapshot is compared with the present.
+    """
+    with _lock:
+        old = _snapshots[first]
+        new = _snapshots[second] if second is not None else None
+    new = new or _take_snapshot()
+    return [{"site": str(stat.traceback[0]), "size_diff": stat.size_diff, "bytes": stat.size,
+             "count_diff": stat.count_diff}
+            for stat in new.compare_to(old, "lineno")[:limit]]
+
+
+def _record_peak(transform: str, peak: int):
+    with _lock:
+        entry = _peaks.setdefault(transform, {"requests": 0, "last_peak": 0, "max_peak": 0})
+        entry["requests"] += 1
+        entry["last_peak"] = peak
+        entry["max_peak"] = max(entry["max_peak"], peak)
+        metrics.set_gauge("tomba_transform_peak_bytes", entry["max_peak"], transform=transform)
+
+
+def _authorize():
+    if not DEBUG_TOKEN:
+        abort(404)
+    supplied = request.headers.get(DEBUG_TOKEN_HEADER, "")
+    if not hmac.compare_digest(supplied.encode("utf-8"), str(DEBUG_TOKEN).encode("utf-8")):
+        abort(403)
+
+
+def install(app):
+    """Add the /debug/memory routes and per-transform peak tracking"""
+
+    @app.before_request
+    def trace_start():
+        transform = (request.view_args or {}).get("transform_name")
+        if transform and tracemalloc.is_tracing():
+            # The peak is process-wide, so with concurrent requests it is
+            # an upper bound for each of them
+            tracemalloc.reset_peak()
+            g.tomba_traced_from = tracemalloc.get_traced_memory()[0]
+
+    @app.teardown_request
+    def trace_stop(exc=None):
+        start = g.pop("tomba_traced_from", None)
+        if start is not None and tracemalloc.is_tracing():
+            peak = tracemalloc.get_traced_memory()[1] - start
+            _record_peak(request.view_args["transform_name"].lower(), max(peak, 0))
+
+    @app.route('/debug/memory', methods=['GET'])
+    def debug_memory():
+        _authorize()
+        return jsonify(report(request.args.get("top", 20, type=int)))
+
+    @app.route('/debug/memory/start', methods=['POST'])
+    def debug_memory_start():
+        _authorize()
+        start_tracing(request.args.get("frames", TRACEMALLOC_FRAMES, type=int))
+        return jsonify({"pid": os.getpid(), "tracing": True})
+
+    @app.route('/debug/memory/stop', methods=['POST'])
+    def debug_memory_stop():
+        _authorize()
+        stop_tracing()
+        return jsonify({"pid": os.getpid(), "tracing": False})
+
+    @app.route('/debug/memory/snapshot', methods=['POST'])
+    def debug_memory_snapshot():
+        _authorize()
+        if not tracemalloc.is_tracing():
+            return jsonify({"error": "tracemalloc is not running"}), 409
+        return jsonify({"pid": os.getpid(), "snapshot": save_snapshot(), "time": time.time()})
+
+    @app.route('/debug/memory/diff', methods=['GET'])
+    def debug_memory_diff():
+        _authorize()
+        if not tracemalloc.is_tracing():
+            return jsonify({"error": "tracemalloc is not running"}), 409
+        first = request.args.get("from", type=int)
+        second = request.args.get("to", type=int)
+        try:
+            changes = diff(first, second, request.args.get("top", 20, type=int))
+        except KeyError:
+            return jsonify({"error": "unknown snapshot", "snapshots": list(_snapshots)}), 404
+        return jsonify({"pid": os.getpid(), "from": first, "to": second, "changes": changes})
@@ -0,0 +1,123 @@
+"""
+Client disconnect detection for the transform server
+
+Each transform request gets a cancellation token whose probe peeks at the
+client socket. A watcher thread polls the probes of running requests
+every ``TOMBA_CANCEL_POLL_INTERVAL`` seconds; when Maltego has closed the
+connection (the analyst cancelled, or Maltego's own timeout fired) the
+token is cancelled and the request's remaining upstream work is dropped.
+"""
+
+import logging
+import select
+import socket
+import threading
+import time
+import weakref
+from typing import Callable, Optional
+
+from flask import g, request
+
+import settings
+from transforms import cancellation, metrics
+
+logger = logging.getLogger(__name__)
+
+CANCEL_POLL_INTERVAL = getattr(settings, "TOMBA_CANCEL_POLL_INTERVAL", 0.5)
+
+# WSGI servers that expose the client socket in the environ
+SOCKET_KEYS = ("gunicorn.socket", "werkzeug.socket")
+
+metrics.describe("tomba_client_disconnects_total", "counter",
+                 "Transform requests whose client went away before the response")
+
+
+def socket_probe(sock) -> Callable[[], bool]:
+    """Return a function telling whether the peer closed ``sock``
+
+    The request body has been read by then, so a readable socket with no
+    data left means the client hung up.
+    """
+    def disconnected() -> bool:
+        try:
+            readable, _, _ = select.select([sock], [], [], 0)
+            if not readable:
+                return False
+            return sock.recv(1, socket.MSG_PEEK) == b""
+        except ValueError:
+            # Closed file descriptor or a socket type that cannot peek
+            return False
+        except OSError:
+            return True
+    return disconnected
+
+
+class DisconnectWatcher:
+    """Background thread polling the tokens of running requests"""
+
+    def __init__(self, interval: float = CANCEL_POLL_INTERVAL):
+        self.interval = interval
+        self._tokens: "weakref.WeakSet[cancellation.CancelToken]" = weakref.WeakSet()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def watch(self, token: cancellation.CancelToken):
+        with self._lock:
+            self._tokens.add(token)
+            if self._thread is None:
+                # Started lazily so it runs in each worker, not a pre-fork master
+                self._thread = threading.Thread(
+                    target=self._run, name="tomba-disconnects", daemon=True)
+                self._thread.start()
+
+    def unwatch(self, token: cancellation.CancelToken):
+        with self._lock:
+            self._tokens.discard(token)
+
+    def poll(self):
+        """Cancel the tokens of requests whose client is gone"""
+        with self._lock:
+            tokens = list(self._tokens)
+        for token in tokens:
+            if not token.cancelled and token.probe():
+                metrics.inc("tomba_client_disconnects_total")
+                logger.info("Client disconnected, cancelling upstream work")
+                token.cancel("client disconnected")
+                self.unwatch(token)
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.poll()
+            except Exception as e:
+                logger.debug("Disconnect poll failed: %s", e)
+
+
+def install(app, watcher: Optional[DisconnectWatcher] = None) -> Optional[DisconnectWatcher]:
+    """Cancel upstream work of /run/<transform> requests whose client left"""
+    if CANCEL_POLL_INTERVAL <= 0:
+        return None
+    watcher = watcher or DisconnectWatcher()
+
+    @app.before_request
+    def attach_token():
+        if not (request.view_args or {}).get("transform_name"):
+            return None
+        sock = next((request.environ[key] for key in SOCKET_KEYS if key in request.environ), None)
+        if sock is None:
+            return None
+        token = cancellation.CancelToken(socket_probe(sock))
+        g.tomba_cancel = (token, cancellation.set_current(token))
+        watcher.watch(token)
+        return None
+
+    @app.teardown_request
+    def detach_token(exc=None):
+        attached = g.pop("tomba_cancel", None)
+        if attached is not None:
+            token, context_token = attached
+            watcher.unwatch(token)
+            cancellation.reset_current(context_token)
+
+    return watcher
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+HTTP/1.1 pool vs HTTP/2 multiplexing for concurrent Tomba.io calls
+
+Starts a local TLS mock of api.tomba.io in a subprocess. It speaks HTTP/2
+or HTTP/1.1 depending on ALPN and adds a fixed latency per request. Then
+it sends the same burst of concurrent domain searches through each
+transport and compares connections opened, latency and client CPU time:
+
+    python examples/benchmark_http2.py --calls 1000 --concurrency 32 --latency 50
+
+Needs httpx[http2] and the openssl command (for a throwaway certificate).
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import ssl
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmark_records import build_response  # noqa: E402
+
+CONNECTIONS = {"h2": 0, "http/1.1": 0}
+
+
+class _Http1(asyncio.Protocol):
+    """Minimal keep-alive HTTP/1.1 responder"""
+
+    def __init__(self, transport, respond):
+        self.transport = transport
+        self.respond = respond
+        self.buffer = b""
+
+    def data_received(self, data):
+        self.buffer += data
+        while b"\r\n\r\n" in self.buffer:
+            head, self.buffer = self.buffer.split(b"\r\n\r\n", 1)
+            method, path = head.split(b" ", 2)[:2]
+            asyncio.ensure_future(self._reply(method.decode(), path.decode()))
+
+    async def _reply(self, method, path):
+        body = await self.respond(path)
+        self.transport.write(
+            b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+            b"Content-Length: " + str(len(body)).encode() + b"\r\n\r\n"
+            + (b"" if method == "HEAD" else body))
+
+
+class _Http2(asyncio.Protocol):
+    """Minimal HTTP/2 responder honouring flow control"""
+
+    def __init__(self, transport, respond):
+        import h2.config
+        import h2.connection
+
+        self.transport = transport
+        self.respond = respond
+        self.conn = h2.connection.H2Connection(
+            h2.config.H2Configuration(client_side=False, header_encoding="utf-8"))
+        self.window_open = asyncio.Event()
+        self.conn.initiate_connection()
+        self.transport.write(self.conn.data_to_send())
+
+    def data_received(self, data):
+        import h2.events
+
+        for event in self.conn.receive_data(data):
+            if isinstance(event, h2.events.RequestReceived):
+                headers = dict(event.headers)
+                asyncio.ensure_future(
+                    self._reply(event.stream_id, headers[":method"], headers[":path"]))
+            elif isinstance(event, h2.events.WindowUpdated):
+                self.window_open.set()
+        self.transport.write(self.conn.data_to_send())
+
+    async def _reply(self, stream_id, method, path):
+        body = await self.respond(path)
+        self.conn.send_headers(stream_id, [
+            (":status", "200"), ("content-type", "application/json"),
+            ("content-length", str(len(body)))], end_stream=method == "HEAD")
+        self.transport.write(self.conn.data_to_send())
+        while body and method != "HEAD":
+            window = min(self.conn.local_flow_control_window(stream_id),
+                         self.conn.max_outbound_frame_size)
+            if window <= 0:
+                self.window_open.clear()
+                await self.window_open.wait()
+                continue
+            chunk, body = body[:window], body[window:]
+            self.conn.send_data(stream_id, chunk, end_stream=not body)
+            self.transport.write(self.conn.data_to_send())
+
+
+class _Dispatch(asyncio.Protocol):
+    """Pick the protocol handler negotiated by ALPN"""
+
+    def __init__(self, respond):
+        self.respond = respond
+        self.handler = None
+
+    def connection_made(self, transport):
+        protocol = transport.get_extra_info("ssl_object").selected_alpn_protocol() or "http/1.1"
+        CONNECTIONS[protocol] += 1
+        handler = _Http2 if protocol == "h2" else _Http1
+        self.handler = handler(transport, self.respond)
+
+    def data_received(self, data):
+        self.handler.data_received(data)
+
+
+def serve(cert: str, key: str, latency: float, emails: int):
+    """Run the mock API until killed; prints the port on stdout"""
+    payload = json.dumps({"data": json.loads(build_response(emails))}).encode()
+
+    async def respond(path):
+        if path.startswith("/__stats"):
+            return json.dumps(CONNECTIONS).encode()
+        await asyncio.sleep(latency)
+        return payload
+
+    async def main():
+        context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+        context.load_cert_chain(cert, key)
+        context.set_alpn_protocols(["h2", "http/1.1"])
+        server = await asyncio.get_running_loop().create_server(
+            lambda: _Dispatch(respond), "127.0.0.1", 0, ssl=context, backlog=1024)
+        print(server.sockets[0].getsockname()[1], flush=True)
+        await server.serve_forever()
+
+    asyncio.run(main())
+
+
+def make_certificate(directory: str):
+    cert, key = os.path.join(directory, "cert.pem"), os.path.join(directory, "key.pem")
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+         "-keyout", key, "-out", cert, "-subj", "/CN=localhost",
+         "-addext", "subjectAltName=IP:127.0.0.1,DNS:localhost"],
+        check=True, capture_output=True)
+    return cert, key
+
+
+def run_transport(transport: str, endpoint: str, calls: int, concurrency: int, pool: int):
+    from tomba.services.domain import Domain
+    from transforms.http_client import create_client
+
+    client = create_client(pool_maxsize=pool, transport=transport)
+    client.set_endpoint(endpoint).set_key("ta_bench").set_secret("ts_bench")
+    domain = Domain(client)
+
+    def one(i):
+        start = time.perf_counter()
+        domain.domain_search(domain=f"example{i}.com")
+        return time.perf_counter() - start
+
+    wall, cpu = time.perf_counter(), time.process_time()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        latencies = sorted(executor.map(one, range(calls)))
+    wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+    client.close()
+    return {
+        "wall": wall,
+        "cpu": cpu,
+        "p50": statistics.median(latencies),
+        "p95": latencies[int(len(latencies) * 0.95) - 1],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--calls", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--latency", type=float, default=50, help="mock API latency in ms")
+    parser.add_argument("--emails", type=int, default=10, help="emails per mock response")
+    parser.add_argument("--pool", type=int, default=10, help="TOMBA_POOL_MAXSIZE")
+    parser.add_argument("--serve", nargs=2, metavar=("CERT", "KEY"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(*args.serve, args.latency / 1000, args.emails)
+        return
+
+    import logging
+    import requests
+    logging.disable(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as directory:
+        cert, key = make_certificate(directory)
+        # Both requests and httpx trust the throwaway certificate
+        os.environ["REQUESTS_CA_BUNDLE"] = os.environ["SSL_CERT_FILE"] = cert
+
+        print(f"🧪 {args.calls} domain searches, {args.concurrency} concurrent, "
+              f"{args.latency:g} ms mock latency, pool {args.pool}")
+        print(f"   {'transport':<10}{'connections':>12}{'wall s':>9}{'p50 ms':>9}"
+              f"{'p95 ms':>9}{'CPU s':>8}")
+        for transport in ("http1", "http2"):
+            # A fresh server per transport so connection counts start at zero
+            server = subprocess.Popen(
+                [sys.executable, __file__, "--serve", cert, key,
+                 "--latency", str(args.latency), "--emails", str(args.emails)],
+                stdout=subprocess.PIPE, text=True)
+            try:
+                endpoint = f"https://127.0.0.1:{server.stdout.readline().strip()}"
+                result = run_transport(transport, endpoint, args.calls, args.concurrency, args.pool)
+                stats = requests.get(f"{endpoint}/__stats", timeout=5).json()
+            finally:
+                server.terminate()
+                server.wait()
+            # The stats request itself opened one HTTP/1.1 connection
+            connections = stats["h2"] + stats["http/1.1"] - 1
+            print(f"   {transport:<10}{connections:>12}{result['wall']:>9.2f}"
+                  f"{result['p50'] * 1000:>9.1f}{result['p95'] * 1000:>9.1f}{result['cpu']:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
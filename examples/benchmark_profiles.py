@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Response size and build time of Domain Search per property profile
+
+The API call is replaced by a synthetic response so only parsing, entity
+building and XML serialization are measured.
+"""
+
+import json
+import os
+import sys
+import time
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmark_records import build_response  # noqa: E402
+
+
+def run_profile(profile: str, payload: str, rounds: int):
+    """Return (seconds per run, response bytes) for one profile"""
+    from maltego_trx.maltego import MaltegoMsg
+    from transforms.DomainSearch import DomainSearch
+
+    request = MaltegoMsg(LocalArgs=["example.com", f"tomba.limit=5000#tomba.profile={profile}"])
+    start = time.perf_counter()
+    for _ in range(rounds):
+        output = DomainSearch.run_transform(request)
+    return (time.perf_counter() - start) / rounds, len(output.encode("utf-8"))
+
+
+if __name__ == "__main__":
+    import logging
+    logging.disable(logging.WARNING)
+
+    from transforms.BaseTombaTransform import TombaSDKWrapper
+    from transforms.profiles import FULL, MINIMAL, STANDARD
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    payload = build_response(count)
+
+    # Serve the synthetic response instead of calling the API
+    TombaSDKWrapper.domain_search = lambda self, domain, limit=10, department=None: {
+        "data": json.loads(payload)}
+
+    print(f"📦 Domain search response with {count} emails")
+    baseline = None
+    for profile in (FULL, STANDARD, MINIMAL):
+        seconds, size = run_profile(profile, payload, rounds)
+        baseline = baseline or (seconds, size)
+        print(f"   {profile + ':':<10}{seconds * 1000:8.1f} ms {size / 1024:9.0f} KiB "
+              f"({100 - size * 100 / baseline[1]:.0f}% smaller, "
+              f"{baseline[0] / seconds:.1f}x faster)")
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Memory benchmark: raw domain search dicts vs slotted records
+"""
+
+import gc
+import json
+import os
+import sys
+import tracemalloc
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def build_response(count: int) -> str:
+    """Build a synthetic domain search response with ``count`` emails"""
+    emails = []
+    for i in range(count):
+        emails.append({
+            "email": f"person{i}@example.com",
+            "first_name": f"First{i}",
+            "last_name": f"Last{i}",
+            "full_name": f"First{i} Last{i}",
+            "gender": "female" if i % 2 else "male",
+            "country": "US",
+            "position": "Software Engineer",
+            "twitter": None,
+            "linkedin": f"https://www.linkedin.com/in/person{i}",
+            "phone_number": None,
+            "accept_all": False,
+            "website_url": "example.com",
+            "seniority": "senior",
+            "department": "engineering",
+            "score": 50 + i % 50,
+            "type": "personal",
+            "verification": {"date": "2025-01-01", "status": "valid"},
+            "last_updated": "2025-01-01T00:00:00+00:00",
+            "sources": [
+                {"uri": f"https://example.com/page{i}/{j}",
+                 "website_url": "example.com",
+                 "extracted_on": "2024-06-01T00:00:00+00:00",
+                 "last_seen_on": "2025-01-01T00:00:00+00:00",
+                 "still_on_page": True}
+                for j in range(5)
+            ],
+        })
+    return json.dumps({
+        "organization": {"organization": "Example", "website_url": "example.com",
+                         "location": {"country": "US", "city": "Austin"}},
+        "emails": emails,
+    })
+
+
+def measure(build) -> int:
+    """Return bytes still allocated by the object ``build`` returns"""
+    gc.collect()
+    tracemalloc.start()
+    kept = build()
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+    return current
+
+
+if __name__ == "__main__":
+    from transforms.records import parse_domain_search
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    payload = build_response(count)
+
+    print(f"📦 Domain search response with {count} emails "
+          f"({len(payload) / 1024:.0f} KiB JSON)")
+
+    raw = measure(lambda: json.loads(payload))
+    records = measure(lambda: parse_domain_search(json.loads(payload)))
+
+    print(f"   {'Raw dicts:':<17}{raw / 1024 / 1024:7.2f} MiB")
+    print(f"   {'Slotted records:':<17}{records / 1024 / 1024:7.2f} MiB")
+    print(f"✅ Records use {100 - records * 100 / raw:.0f}% less memory")
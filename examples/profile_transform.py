@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Profile one transform in isolation
+
+Builds a MaltegoMsg from an input value and properties, answers upstream
+calls from cassettes (--cassettes) or built-in mock data, runs the
+transform N times and writes a flamegraph-ready profile:
+
+    python examples/profile_transform.py DomainSearch tomba.io -p tomba.limit=500 -n 20
+    python examples/profile_transform.py EmailVerifier a@tomba.io --profiler cprofile
+
+Sampling output is written as folded stacks (flamegraph.pl, speedscope)
+and as a speedscope JSON file; cProfile output as a .prof file. Both
+print a top-N function table.
+"""
+
+import argparse
+import collections
+import cProfile
+import importlib
+import json
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmark_records import build_response  # noqa: E402
+
+
+def mock_response(endpoint: str, kwargs: dict) -> dict:
+    """Synthetic SDK result for an endpoint (``<service>_<method>``)"""
+    subject = next(iter(kwargs.values()), "example.com") if kwargs else "example.com"
+    if endpoint == "domain_domain_search":
+        return {"data": json.loads(build_response(int(kwargs.get("limit") or 10)))}
+    if endpoint in ("verifier_email_verifier", "finder_enrichment", "finder_email_finder",
+                    "finder_author_finder", "finder_linkedin_finder"):
+        email = {"email": subject if "@" in str(subject) else "jane.doe@example.com",
+                 "first_name": "Jane", "last_name": "Doe", "position": "Engineer",
+                 "score": 92, "status": "valid", "result": "deliverable",
+                 "smtp_check": True, "mx_records": True, "disposable": False,
+                 "webmail": False, "accept_all": False,
+                 "sources": [{"uri": f"https://example.com/page{i}"} for i in range(5)]}
+        if endpoint == "verifier_email_verifier":
+            return {"data": {"email": email}}
+        if endpoint == "finder_author_finder":
+            return {"data": {"emails": [email]}}
+        return {"data": email}
+    if endpoint in ("phone_finder", "phone_validator"):
+        return {"data": {"valid": True, "intl_format": "+1 415-555-2671",
+                         "e164_format": "+14155552671", "line_type": "mobile",
+                         "carrier": {"name": "Example"}}}
+    if endpoint == "similar_websites":
+        return {"data": [{"website_url": f"similar{i}-{subject}", "name": f"Similar {i}"}
+                         for i in range(10)]}
+    if endpoint == "technology_list":
+        return {"data": [{"name": f"Tech {i}", "slug": f"tech-{i}",
+                          "categories": {"id": i % 5, "name": f"Category {i % 5}",
+                                         "slug": f"category-{i % 5}"}} for i in range(40)]}
+    if endpoint == "account_get_account":
+        return {"data": {"email": "dev@example.com", "plan": "mock"}}
+    return {"data": {}}
+
+
+def use_mock_upstream():
+    """Answer every SDK call with mock data instead of the network"""
+    from transforms import cassette
+
+    def call(service_call, *args, **kwargs):
+        endpoint = service_call.__qualname__.replace(".", "_").lower()
+        return mock_response(endpoint, kwargs)
+
+    cassette.call = call
+
+
+# Leaf frames of threads parked on a lock or queue rather than working
+IDLE_FRAMES = {("wait", "threading.py"), ("_wait_for_tstate_lock", "threading.py"),
+               ("get", "queue.py"), ("_worker", "thread.py")}
+
+
+class SamplingProfiler:
+    """Samples every working thread's stack at a fixed interval
+
+    The server's own background threads (``tomba-*``) and idle pool
+    workers are skipped so the profile only shows transform work.
+    """
+
+    def __init__(self, interval: float = 0.001):
+        self.interval = interval
+        self.stacks = collections.Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="sampler", daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        own = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                if ident not in names:
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                thread = names.get(ident, str(ident))
+                if thread.startswith("tomba-"):
+                    continue
+                if (frame.f_code.co_name, os.path.basename(frame.f_code.co_filename)) in IDLE_FRAMES:
+                    continue
+                # Pool threads are merged by prefix so their stacks aggregate
+                thread = thread.rsplit("_", 1)[0] if "_" in thread else thread
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+                    frame = frame.f_back
+                self.stacks[(thread,) + tuple(reversed(stack))] += 1
+
+    @staticmethod
+    def _label(frame) -> str:
+        name, filename, line = frame
+        return f"{name} ({os.path.relpath(filename)}:{line})"
+
+    def write_folded(self, path: str):
+        with open(path, "w", encoding="utf-8") as out:
+            for stack, count in self.stacks.most_common():
+                frames = [stack[0]] + [self._label(f) for f in stack[1:]]
+                out.write(";".join(frames) + f" {count}\n")
+
+    def write_speedscope(self, path: str, name: str):
+        frames, index = [], {}
+        samples, weights = [], []
+        for stack, count in self.stacks.items():
+            sample = []
+            for frame in [(stack[0], "", 0)] + list(stack[1:]):
+                if frame not in index:
+                    index[frame] = len(frames)
+                    frames.append({"name": frame[0], "file": frame[1], "line": frame[2]})
+                sample.append(index[frame])
+            samples.append(sample)
+            weights.append(count * self.interval)
+        document = {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "shared": {"frames": frames},
+            "profiles": [{"type": "sampled", "name": name, "unit": "seconds",
+                          "startValue": 0, "endValue": sum(weights),
+                          "samples": samples, "weights": weights}],
+            "name": name,
+            "exporter": "tomba-maltego profile_transform",
+        }
+        with open(path, "w", encoding="utf-8") as out:
+            json.dump(document, out)
+
+    def print_top(self, top: int):
+        own, total = collections.Counter(), collections.Counter()
+        for stack, count in self.stacks.items():
+            frames = stack[1:]
+            if not frames:
+                continue
+            own[frames[-1]] += count
+            for frame in set(frames):
+                total[frame] += count
+        samples = sum(self.stacks.values()) or 1
+        print(f"\n{'own %':>7} {'total %':>8}  function")
+        for frame, count in own.most_common(top):
+            print(f"{count * 100 / samples:7.1f} {total[frame] * 100 / samples:8.1f}  {self._label(frame)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("transform", help="transform class, e.g. DomainSearch")
+    parser.add_argument("value", help="input entity value")
+    parser.add_argument("-p", "--property", action="append", default=[],
+                        help="input entity property as name=value (repeatable)")
+    parser.add_argument("-n", "--runs", type=int, default=10, help="number of runs")
+    parser.add_argument("--profiler", choices=("sample", "cprofile"), default="sample")
+    parser.add_argument("--interval", type=float, default=1.0, help="sampling interval in ms")
+    parser.add_argument("--cassettes", help="replay upstream calls from this cassette directory")
+    parser.add_argument("--top", type=int, default=20, help="functions in the summary table")
+    parser.add_argument("-o", "--output", default="profile", help="output file prefix")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    from maltego_trx.maltego import MaltegoMsg
+    from transforms import cassette
+
+    if args.cassettes:
+        cassette.configure(cassette.REPLAY, args.cassettes)
+    else:
+        use_mock_upstream()
+
+    transform = getattr(importlib.import_module(f"transforms.{args.transform}"), args.transform)
+    local_args = [args.value]
+    if args.property:
+        local_args.append("#".join(args.property))
+    request = MaltegoMsg(LocalArgs=local_args)
+
+    # Warm up imports and caches outside the profile
+    output = transform.run_transform(request)
+    print(f"🔬 Profiling {args.transform}({args.value}) x{args.runs} "
+          f"- {output.count('<Entity ')} entities, {len(output) / 1024:.0f} KiB")
+
+    start = time.perf_counter()
+    if args.profiler == "cprofile":
+        profiler = cProfile.Profile()
+        profiler.enable()
+        for _ in range(args.runs):
+            transform.run_transform(request)
+        profiler.disable()
+        elapsed = time.perf_counter() - start
+        profiler.dump_stats(f"{args.output}.prof")
+        stats = pstats.Stats(profiler).sort_stats("cumulative")
+        stats.print_stats(args.top)
+        print(f"💾 {args.output}.prof (open with snakeviz or pstats)")
+    else:
+        with SamplingProfiler(args.interval / 1000) as profiler:
+            for _ in range(args.runs):
+                transform.run_transform(request)
+        elapsed = time.perf_counter() - start
+        profiler.print_top(args.top)
+        profiler.write_folded(f"{args.output}.folded")
+        profiler.write_speedscope(f"{args.output}.speedscope.json", args.transform)
+        print(f"\n💾 {args.output}.folded (flamegraph.pl) and "
+              f"{args.output}.speedscope.json (https://www.speedscope.app)")
+
+    print(f"⏱️  {elapsed * 1000 / args.runs:.1f} ms per run")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Run every API transform against recorded Tomba.io traffic
+
+Record once with live credentials (spends credits):
+
+    python examples/replay_transforms.py --record
+
+Then replay offline as often as needed, as a regression check against a
+saved baseline or as a benchmark with simulated API latency:
+
+    python examples/replay_transforms.py --save-baseline baseline.json
+    python examples/replay_transforms.py --baseline baseline.json
+    python examples/replay_transforms.py --latency recorded --rounds 5
+"""
+
+import argparse
+import hashlib
+import importlib
+import json
+import logging
+import os
+import sys
+import time
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# (transform class, input value, properties)
+SAMPLES = [
+    ("AccountInfo", "account", {}),
+    ("DomainSearch", "tomba.io", {"tomba.limit": "10"}),
+    ("DomainPipeline", "tomba.io", {"tomba.limit": "10", "tomba.verify_limit": "3"}),
+    ("EmailVerifier", "b.mohamed@tomba.io", {}),
+    ("EmailEnrichment", "b.mohamed@tomba.io", {}),
+    ("EmailProfile", "b.mohamed@tomba.io", {}),
+    ("AuthorFinder", "https://blog.tomba.io/", {}),
+    ("LinkedinFinder", "https://www.linkedin.com/in/mohamed-ben-rebia", {}),
+    ("PhoneFinder", "b.mohamed@tomba.io", {}),
+    ("PhoneValidator", "+14155552671", {}),
+    ("Similar", "tomba.io", {}),
+    ("SimilarNeighborhood", "tomba.io", {"tomba.depth": "2", "tomba.max_nodes": "10"}),
+    ("Technology", "tomba.io", {}),
+]
+
+
+def run_sample(name: str, value: str, properties: dict) -> str:
+    from maltego_trx.maltego import MaltegoMsg
+
+    transform = getattr(importlib.import_module(f"transforms.{name}"), name)
+    args = [value]
+    if properties:
+        args.append("#".join(f"{k}={v}" for k, v in properties.items()))
+    return transform.run_transform(MaltegoMsg(LocalArgs=args))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--record", action="store_true", help="call the live API and record")
+    parser.add_argument("--dir", default="cassettes", help="cassette directory")
+    parser.add_argument("--latency", default="0",
+                        help="replay delay per call in ms, or 'recorded'")
+    parser.add_argument("--rounds", type=int, default=1, help="runs per transform")
+    parser.add_argument("--baseline", help="compare outputs with this baseline file")
+    parser.add_argument("--save-baseline", help="write output digests to this file")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    from transforms import cassette
+
+    latency = args.latency if args.latency == "recorded" else float(args.latency)
+    cassette.configure(cassette.RECORD if args.record else cassette.REPLAY, args.dir, latency)
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    print(f"🎞️  {'Recording' if args.record else 'Replaying'} Tomba.io traffic ({args.dir})")
+    digests = {}
+    changed = 0
+    for name, value, properties in SAMPLES:
+        start = time.perf_counter()
+        for _ in range(1 if args.record else args.rounds):
+            output = run_sample(name, value, properties)
+        elapsed = (time.perf_counter() - start) / (1 if args.record else args.rounds)
+
+        digest = hashlib.sha256(output.encode("utf-8")).hexdigest()[:12]
+        digests[name] = digest
+        status = ""
+        if name in baseline:
+            same = baseline[name] == digest
+            changed += not same
+            status = "✅ unchanged" if same else "❌ changed"
+        errors = output.count('MessageType="PartialError"') + output.count('MessageType="FatalError"')
+        print(f"   {name:<20}{output.count('<Entity '):5} entities {elapsed * 1000:9.1f} ms"
+              f"  {digest}  {'⚠️ ' + str(errors) + ' error(s)' if errors else ''}{status}")
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(digests, f, indent=2)
+        print(f"💾 Baseline written to {args.save_baseline}")
+
+    if changed:
+        print(f"❌ {changed} transform output(s) differ from the baseline")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,4 @@
-from maltego_trx.decorator_registry import TransformRegistry
+from maltego_trx.decorator_registry import TransformRegistry, TransformSetting
 # from settings import api_key_setting, secret_key_setting
 
 registry = TransformRegistry(
@@ -10,4 +10,15 @@ registry = TransformRegistry(
 
 registry.version = "0.1"
 
+# Identifies the analyst for fair-share scheduling and credit caps
+analyst_setting = TransformSetting(
+    name="tomba.analyst",
+    display_name="Tomba Analyst",
+    setting_type="string",
+    optional=True,
+    global_setting=True,
+)
+
+registry.global_settings = [analyst_setting]
+
 # registry.global_settings = [api_key_setting, secret_key_setting]
@@ -0,0 +1,36 @@
+"""
+Gunicorn configuration for the transform server
+
+    gunicorn --config gunicorn.conf.py project:application
+
+The application is imported once in the master (preload_app) and forked
+into the workers, so imports, transform registration and config files are
+done before any worker starts. Each worker then warms up in the
+background (see warmup.py) and reports 503 on /ready until it is done.
+Bind address, worker count and worker class can be overridden with
+GUNICORN_BIND, GUNICORN_WORKERS and GUNICORN_WORKER_CLASS.
+"""
+
+import os
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8080")
+workers = int(os.environ.get("GUNICORN_WORKERS", "3"))
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "gevent")
+preload_app = True
+
+# Maltego gives up on a transform after a few minutes; large domain
+# searches must not be killed sooner
+timeout = 300
+graceful_timeout = 30
+keepalive = 5
+
+if worker_class == "gevent":
+    # Patch before the preloaded app imports ssl, sockets and threading
+    from gevent import monkey
+    monkey.patch_all()
+
+
+def post_worker_init(worker):
+    """Start warming the worker up; it serves /ready while warmup runs"""
+    import warmup
+    warmup.start()
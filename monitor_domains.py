@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Scheduled domain monitoring job
+
+Runs the Domain Monitor diff for every watched domain and prints one JSON
+line per added, removed or changed email. Suitable for cron:
+
+    0 6 * * 1 cd /var/www/maltego-trx && python monitor_domains.py watched.txt
+"""
+
+import argparse
+import json
+import sys
+
+
+def load_domains(args) -> list:
+    """Collect domains from the command line and watch files"""
+    domains = list(args.domains)
+    for path in args.file or []:
+        with open(path) as handle:
+            domains.extend(
+                line.strip() for line in handle
+                if line.strip() and not line.startswith("#"))
+    return [d.lower() for d in domains]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("domains", nargs="*", help="Domains to monitor")
+    parser.add_argument("-f", "--file", action="append",
+                        help="File with one domain per line")
+    parser.add_argument("--limit", type=int, default=100,
+                        help="Emails requested per page")
+    args = parser.parse_args()
+    if args.limit < 1:
+        parser.error("--limit must be at least 1")
+
+    from settings import TOMBA_API_KEY, TOMBA_SECRET_KEY
+    from transforms.BaseTombaTransform import TombaSDKWrapper
+    from transforms.monitor import monitor_domain
+    from transforms.store import get_store
+
+    store = get_store()
+    if store is None:
+        print("❌ Set TOMBA_STORE_PATH in settings.py to keep monitoring snapshots")
+        return 1
+
+    client = TombaSDKWrapper.shared(TOMBA_API_KEY, TOMBA_SECRET_KEY)
+    failed = 0
+
+    for domain in load_domains(args):
+        result, changes, previous_taken_at = monitor_domain(
+            client, store, domain, limit=args.limit)
+        if "error" in result:
+            print(f"❌ {domain}: {result['error']}", file=sys.stderr)
+            failed += 1
+            continue
+
+        for change in changes:
+            print(json.dumps({
+                "domain": domain,
+                "baseline": previous_taken_at is None,
+                **change,
+            }))
+
+    store.flush()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,16 +1,42 @@
 import sys
 
+import admission
+import compression
+import diagnostics
+import disconnects
+import routing
 import transforms
+import warmup
 from extensions import registry
 from maltego_trx.handler import handle_run
 from maltego_trx.registry import register_transform_classes
 from maltego_trx.server import app as application
+from transforms import logs, metrics
+
+# Replace maltego-trx's synchronous DEBUG logging with the background queue
+logs.configure()
 
 register_transform_classes(transforms)
 
 registry.write_transforms_config(include_output_entities=True)
 registry.write_settings_config()
 
+disconnects.install(application)
+# Forwarded requests must not take a local admission slot
+routing.install(application)
+admission.install(application)
+compression.install(application)
+warmup.install(application)
+diagnostics.install(application)
+
+
+@application.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Expose this worker's counters and gauges for Prometheus"""
+    return metrics.render(), 200, {'Content-Type': 'text/plain; version=0.0.4'}
+
 
 if __name__ == '__main__':
+    # gunicorn warms its workers up in gunicorn.conf.py
+    warmup.start()
     handle_run(__name__, sys.argv, application)
@@ -0,0 +1,212 @@
+"""
+Consistent-hash request routing across transform servers
+
+Every node lists the same ``TOMBA_ROUTING_NODES`` and knows its own entry
+(``TOMBA_ROUTING_SELF``, usually set per container in the environment).
+A transform request is hashed on its canonical input value (domain, email,
+phone...) onto a ring of virtual nodes. If another node owns the key, the
+request is forwarded there unchanged and its response relayed back, so
+requests for the same key share one node's result cache and in-flight
+batching. Adding or removing a node only moves the keys of that node.
+"""
+
+import bisect
+import hashlib
+import logging
+import os
+import threading
+import time
+from typing import Dict, Iterable, Optional
+
+import requests
+from flask import Response, request
+from maltego_trx.maltego import MaltegoMsg
+
+import settings
+from transforms import cancellation, metrics
+from transforms.http_client import CancellableAdapter
+
+logger = logging.getLogger(__name__)
+
+ROUTING_NODES = [node.rstrip("/") for node in getattr(settings, "TOMBA_ROUTING_NODES", [])]
+ROUTING_SELF = os.environ.get(
+    "TOMBA_ROUTING_SELF", getattr(settings, "TOMBA_ROUTING_SELF", "")).rstrip("/")
+ROUTING_VNODES = getattr(settings, "TOMBA_ROUTING_VNODES", 160)
+ROUTING_TIMEOUT = getattr(settings, "TOMBA_ROUTING_TIMEOUT", 290)
+ROUTING_RETRY_AFTER = getattr(settings, "TOMBA_ROUTING_RETRY_AFTER", 30)
+
+# Set on forwarded requests; the receiving node always runs them itself
+FORWARDED_HEADER = "X-Tomba-Routed-By"
+
+# Headers that describe one connection and must not be forwarded
+HOP_BY_HOP_HEADERS = frozenset({
+    "connection", "keep-alive", "proxy-authenticate", "proxy-authorization",
+    "te", "trailer", "transfer-encoding", "upgrade", "host", "content-length"})
+
+# Transforms keyed on a property instead of the entity value. Job journals
+# are local to a node, so results are fetched where the job's input lives.
+KEY_PROPERTIES = {
+    "fetchjobresults": "tomba.job_input",
+    "technologydomains": "tomba.technology_slug",
+}
+# Transforms without a per-input cache, run wherever they arrive
+UNROUTED = {"accountinfo"}
+
+metrics.describe("tomba_routed_requests_total", "counter",
+                 "Transform requests by routing decision (local, forwarded, fallback)")
+metrics.describe("tomba_routing_peers_down", "gauge",
+                 "Peers skipped after a failed forward")
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.md5(value.encode("utf-8")).digest()[:8], "big")
+
+
+def routing_key(transform: str, message: MaltegoMsg) -> Optional[str]:
+    """Canonical input value a request is routed on, or None to run it locally"""
+    if transform in UNROUTED:
+        return None
+    prop = KEY_PROPERTIES.get(transform)
+    value = message.getProperty(prop) if prop else None
+    if not value and transform == "fetchjobresults":
+        return None
+    value = (value or message.Value or "").strip().lower()
+    return value or None
+
+
+class HashRing:
+    """Consistent-hash ring with virtual nodes"""
+
+    def __init__(self, nodes: Iterable[str], vnodes: int = ROUTING_VNODES):
+        self.nodes = sorted(set(nodes))
+        points = sorted((_hash(f"{node}#{i}"), node) for node in self.nodes for i in range(vnodes))
+        self._hashes = [h for h, _ in points]
+        self._owners = [node for _, node in points]
+
+    def owner(self, key: str, skip: Iterable[str] = ()) -> Optional[str]:
+        """First node clockwise from ``key`` that is not in ``skip``"""
+        skip = set(skip)
+        if not self._hashes or skip.issuperset(self.nodes):
+            return None
+        i = bisect.bisect(self._hashes, _hash(key))
+        for step in range(len(self._owners)):
+            node = self._owners[(i + step) % len(self._owners)]
+            if node not in skip:
+                return node
+        return None
+
+
+class Router:
+    """Decide where a request runs and forward it to its owner"""
+
+    def __init__(self, nodes: Iterable[str] = ROUTING_NODES, self_node: str = ROUTING_SELF,
+                 timeout: float = ROUTING_TIMEOUT, retry_after: float = ROUTING_RETRY_AFTER):
+        self.ring = HashRing(nodes)
+        self.self_node = self_node
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self._down: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self.session = requests.Session()
+        adapter = CancellableAdapter(
+            pool_connections=len(self.ring.nodes),
+            pool_maxsize=getattr(settings, "TOMBA_POOL_MAXSIZE", 10))
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def owner(self, key: str) -> str:
+        """Node that should run requests for ``key`` (this node if unsure)"""
+        now = time.monotonic()
+        with self._lock:
+            down = [node for node, until in self._down.items() if until > now]
+        # Never skip ourselves: if every peer is down the work stays here
+        down = [node for node in down if node != self.self_node]
+        return self.ring.owner(key, skip=down) or self.self_node
+
+    def mark_down(self, node: str):
+        now = time.monotonic()
+        with self._lock:
+            self._down[node] = now + self.retry_after
+            metrics.set_gauge("tomba_routing_peers_down",
+                              sum(1 for until in self._down.values() if until > now))
+
+    def forward(self, node: str) -> Response:
+        """Send the current request to ``node`` and relay its response"""
+        # End-to-end headers (analyst, content type, encodings) go along so
+        # the owner attributes and answers the request as this node would
+        hop_by_hop = HOP_BY_HOP_HEADERS | {
+            name.strip().lower()
+            for name in request.headers.get("Connection", "").split(",")}
+        headers = {name: value for name, value in request.headers.items()
+                   if name.lower() not in hop_by_hop}
+        headers.setdefault("Content-Type", "text/xml")
+        headers.setdefault("Accept-Encoding", "identity")
+        headers[FORWARDED_HEADER] = self.self_node
+        upstream = self.session.post(
+            node + request.full_path.rstrip("?"), data=request.get_data(),
+            headers=headers, timeout=self.timeout, stream=True)
+        try:
+            # Relay the body as sent, still compressed if the peer compressed it
+            body = upstream.raw.read(decode_content=False)
+        finally:
+            upstream.close()
+        response = Response(body, status=upstream.status_code,
+                            content_type=upstream.headers.get("Content-Type"))
+        if "Content-Encoding" in upstream.headers:
+            response.headers["Content-Encoding"] = upstream.headers["Content-Encoding"]
+            response.vary.add("Accept-Encoding")
+        response.headers["X-Tomba-Node"] = node
+        return response
+
+
+def install(app, router: Optional[Router] = None) -> Optional[Router]:
+    """Forward /run/<transform> requests to the node owning their input
+
+    Install before admission control so that forwarded requests do not
+    hold a local run slot.
+    """
+    if router is None:
+        if len(ROUTING_NODES) < 2:
+            return None
+        if ROUTING_SELF not in ROUTING_NODES:
+            logger.warning("TOMBA_ROUTING_SELF %r is not in TOMBA_ROUTING_NODES; "
+                           "request routing disabled", ROUTING_SELF)
+            return None
+        router = Router()
+
+    @app.before_request
+    def route():
+        transform = (request.view_args or {}).get("transform_name")
+        if request.method != "POST" or not transform:
+            return None
+        if request.headers.get(FORWARDED_HEADER):
+            metrics.inc("tomba_routed_requests_total", route="local")
+            return None
+
+        try:
+            key = routing_key(transform.lower(), MaltegoMsg(request.data))
+        except Exception as e:
+            logger.debug("Could not read routing key: %s", e)
+            key = None
+        node = router.owner(key) if key else router.self_node
+        if node == router.self_node:
+            metrics.inc("tomba_routed_requests_total", route="local")
+            return None
+
+        try:
+            response = router.forward(node)
+        except requests.RequestException as e:
+            token = cancellation.current()
+            if token is not None and token.cancelled:
+                # Maltego is gone; there is nobody to run it locally for
+                return Response(status=499)
+            router.mark_down(node)
+            metrics.inc("tomba_routed_requests_total", route="fallback")
+            logger.warning("Forwarding %s to %s failed (%s); running it here",
+                           transform, node, e)
+            return None
+        metrics.inc("tomba_routed_requests_total", route="forwarded")
+        return response
+
+    logger.info("Routing requests across %d nodes as %s", len(router.ring.nodes), router.self_node)
+    return router
@@ -62,5 +62,12 @@ class AccountInfo(BaseTombaTransform):
                 account_entity.addProperty(
                     f"tomba.usage.{key}", displayName=f"Usage {key.title()}", value=str(value))
 
+        # Local estimate of what is left since the last usage poll
+        budget = transform.tomba_client.budget
+        for category, remaining in budget.snapshot().items():
+            account_entity.addProperty(
+                f"tomba.budget.{category}", displayName=f"Budget {category.title()} Remaining",
+                value=str(int(remaining)))
+
         transform.add_summary_message(
             response, f"Account: {data.get('email', 'Unknown')} - Plan: {data.get('plan', 'Unknown')}")
@@ -5,7 +5,9 @@ import logging
 from extensions import registry
 from maltego_trx.entities import Email, Person
 from maltego_trx.maltego import MaltegoMsg, MaltegoTransform
+from . import knownbad
 from .BaseTombaTransform import BaseTombaTransform
+from .records import parse_emails
 
 logger = logging.getLogger(__name__)
 
@@ -37,7 +39,11 @@ class AuthorFinder(BaseTombaTransform):
 
         url = request.Value.strip()
 
-        logger.info(f"Finding author for URL: {url}")
+        if transform.previously_invalid(request, knownbad.AUTHOR_URL, url):
+            transform.add_previously_invalid_message(response, url)
+            return
+
+        logger.debug("Finding author for URL: %s", url)
 
         result = transform.tomba_client.author_finder(url)
 
@@ -48,29 +54,26 @@ class AuthorFinder(BaseTombaTransform):
             response.addUIMessage("❌ No author data found")
             return
 
-        data = result["data"]
-        emails = data.get("emails", [])
+        emails = parse_emails(
+            result["data"].get("emails"), summaries=transform.wants_summaries)
 
         if not emails:
             response.addUIMessage(f"📭 No author emails found for URL: {url}")
+            knownbad.add(knownbad.AUTHOR_URL, url)
             return
 
         for author_data in emails:
-            email = author_data.get("email", "")
-            if not email:
-                continue
-
             # Create email entity
-            email_entity = response.addEntity(Email, email)
+            email_entity = response.addEntity(Email, author_data.email)
             transform.add_tomba_properties(email_entity, author_data)
 
             # Create person entity if name available
-            first_name = author_data.get("first_name", "")
-            last_name = author_data.get("last_name", "")
+            person = author_data.named_person
 
-            if first_name or last_name:
-                full_name = f"{first_name} {last_name}".strip()
-                person_entity = response.addEntity(Person, full_name)
+            if person is not None:
+                first_name = person.first_name
+                last_name = person.last_name
+                person_entity = response.addEntity(Person, person.display_name)
 
                 if first_name:
                     person_entity.addProperty(
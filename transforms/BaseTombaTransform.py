@@ -2,13 +2,19 @@
 Base transform class using the official Tomba.io Python SDK
 """
 
+import contextvars
 import logging
-from typing import Dict, Any, Optional
+import threading
+import time
+import weakref
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Dict, Any, List, Optional, Union
+from maltego_trx.entities import BuiltwithTechnology, Phrase
 from maltego_trx.transform import DiscoverableTransform
 from maltego_trx.maltego import MaltegoMsg, MaltegoTransform
 
 # Import official Tomba.io SDK
-from tomba.client import Client
 from tomba.services.domain import Domain
 from tomba.services.finder import Finder
 from tomba.services.verifier import Verifier
@@ -16,21 +22,51 @@ from tomba.services.account import Account
 from tomba.services.phone import Phone
 from tomba.services.similar import Similar
 from tomba.services.technology import Technology
+from tomba.exception import TombaException
+import settings
 from settings import TOMBA_API_KEY, TOMBA_SECRET_KEY
 from extensions import registry
+from . import callers, cancellation, cassette, knownbad, logs, metrics, profiles
+from .batching import MicroBatcher
+from .budget import CreditBudget, guarded
+from .http_client import create_client
+from .jobs import submit_job
+from .limiter import LimiterRejected, get_limiter
+from .records import Record, TechnologyRecord, summarize_sources, summarize_whois
+from .response import MergingTransform
+from .store import stored
 # from settings import api_key_setting, secret_key_setting
 logger = logging.getLogger(__name__)
 
 
+# Upper bounds for connection reuse and concurrent sub-calls per request
+POOL_MAXSIZE = getattr(settings, "TOMBA_POOL_MAXSIZE", 10)
+FAN_OUT_WORKERS = getattr(settings, "TOMBA_FAN_OUT_WORKERS", 4)
+
+# Concurrent per-entity calls arriving within this window are dispatched
+# together (0 disables batching)
+BATCH_WINDOW_MS = getattr(settings, "TOMBA_BATCH_WINDOW_MS", 0)
+BATCH_MAX_SIZE = getattr(settings, "TOMBA_BATCH_MAX_SIZE", 20)
+
+metrics.describe("tomba_upstream_cancelled_total", "counter",
+                 "Upstream calls skipped or aborted because their request was cancelled")
+
+
 class TombaSDKWrapper:
     """Wrapper for the official Tomba.io Python SDK with error handling"""
 
+    _shared: Dict[tuple, "TombaSDKWrapper"] = {}
+    _shared_lock = threading.Lock()
+
+    # Every instance still alive, shared or not (see diagnostics.py)
+    _live: "weakref.WeakSet[TombaSDKWrapper]" = weakref.WeakSet()
+
     def __init__(self, api_key: str, secret_key: str):
         self.api_key = api_key
         self.secret_key = secret_key
 
         # Initialize Tomba client
-        self.client = Client()
+        self.client = create_client(pool_maxsize=POOL_MAXSIZE)
         self.client.set_key(api_key).set_secret(secret_key)
 
         # Initialize all services
@@ -42,28 +78,163 @@ class TombaSDKWrapper:
         self.similar_service = Similar(self.client)
         self.technology_service = Technology(self.client)
 
+        self._batchers: Dict[str, MicroBatcher] = {}
+        self._batchers_lock = threading.Lock()
+
+        self.budget = CreditBudget(self._fetch_account)
+
+        TombaSDKWrapper._live.add(self)
+
+    @classmethod
+    def shared(cls, api_key: str, secret_key: str) -> "TombaSDKWrapper":
+        """Return the process-wide wrapper for a credential pair"""
+        key = (api_key, secret_key)
+        with cls._shared_lock:
+            wrapper = cls._shared.get(key)
+            if wrapper is None:
+                wrapper = cls(api_key, secret_key)
+                cls._shared[key] = wrapper
+            return wrapper
+
+    @classmethod
+    def live(cls) -> List["TombaSDKWrapper"]:
+        """Every wrapper still alive, shared or per request"""
+        return list(cls._live)
+
+    @classmethod
+    def shared_count(cls) -> int:
+        """Number of process-wide wrappers (one per credential pair)"""
+        with cls._shared_lock:
+            return len(cls._shared)
+
+    def fan_out(self, calls: Dict[str, Callable[[], Dict[str, Any]]],
+                max_workers: int = None) -> Dict[str, Dict[str, Any]]:
+        """Run independent API calls concurrently and collect their results
+
+        Each result is keyed like ``calls``; a call that raises is reported
+        as an ``{"error": ...}`` result so one failure never hides the others.
+        """
+        if not calls:
+            return {}
+
+        workers = min(len(calls), max_workers or FAN_OUT_WORKERS)
+        results = {}
+
+        token = cancellation.current()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                name: executor.submit(contextvars.copy_context().run, call)
+                for name, call in calls.items()
+            }
+            # Sub-calls still queued are dropped when the request is cancelled
+            unregister = token.on_cancel(
+                lambda: [f.cancel() for f in futures.values()]) if token else None
+            try:
+                for name, future in futures.items():
+                    try:
+                        results[name] = future.result()
+                    except CancelledError:
+                        metrics.inc("tomba_upstream_cancelled_total")
+                        results[name] = {"error": "Request cancelled"}
+                    except Exception as e:
+                        logger.error("Tomba sub-call %s failed: %s", name, e)
+                        results[name] = {"error": str(e)}
+            finally:
+                if unregister:
+                    unregister()
+
+        return results
+
+    def _batched(self, service_call, param: str, value: str) -> Dict[str, Any]:
+        """Run a per-entity call, micro-batched with concurrent callers"""
+        if BATCH_WINDOW_MS <= 0:
+            return self._handle_request(service_call, **{param: value})
+
+        name = service_call.__qualname__
+        with self._batchers_lock:
+            batcher = self._batchers.get(name)
+            if batcher is None:
+                batcher = MicroBatcher(
+                    partial(self._dispatch_batch, service_call, param),
+                    window=BATCH_WINDOW_MS / 1000,
+                    max_size=BATCH_MAX_SIZE
+                )
+                self._batchers[name] = batcher
+
+        return batcher.submit(value)
+
+    def _dispatch_batch(self, service_call, param: str,
+                        values: Dict[str, contextvars.Context]) -> Dict[str, Dict[str, Any]]:
+        """Send one batch of per-entity calls as a single pooled burst
+
+        Each call runs in the context of the request that submitted it, so
+        it is charged to and fair-queued as that request's analyst.
+        """
+        return self.fan_out(
+            {value: partial(context.run, self._submitted_call, service_call, param, value)
+             for value, context in values.items()},
+            max_workers=BATCH_MAX_SIZE
+        )
+
+    def _submitted_call(self, service_call, param: str, value: str) -> Dict[str, Any]:
+        # Identical inputs of several requests share the call, so one client
+        # leaving must not cancel it
+        token = cancellation.set_current(None)
+        try:
+            return self._handle_request(service_call, **{param: value})
+        finally:
+            cancellation.reset_current(token)
+
     def _handle_request(self, service_call, *args, **kwargs) -> Dict[str, Any]:
         """Execute API call with error handling"""
+        endpoint = service_call.__qualname__
+        start = time.monotonic()
         try:
-            result = service_call(*args, **kwargs)
-
-            # Check if result is valid
-            if isinstance(result, dict):
-                # Handle API errors in response
-                if 'error' in result:
-                    return {"error": result['error']}
-
-                # Success case - return the result
-                return result
-            else:
-                # Handle non-dict responses
-                return {"data": result}
+            # Nothing is charged or sent for a request nobody waits for
+            cancellation.check()
+            analyst = callers.current()
+            callers.charge(analyst)
+            try:
+                with get_limiter().slot() as outcome:
+                    try:
+                        result = cassette.call(service_call, *args, **kwargs)
+                    except TombaException as e:
+                        # A call aborted on cancellation says nothing about the API
+                        cancellation.check()
+                        # Rate limits, server errors and network failures (no
+                        # status code) mean the API is struggling
+                        outcome[0] = e.code == 0 or e.code == 429 or e.code >= 500
+                        raise
+            except Exception:
+                # Rejected by the limiter, cancelled while queued, or failed
+                callers.refund(analyst)
+                raise
+
+            # Handle API errors in response
+            if isinstance(result, dict) and 'error' in result:
+                callers.refund(analyst)
+                return {"error": result['error']}
+
+            logs.sampled(logger, "Tomba call %s succeeded", endpoint,
+                         endpoint=endpoint, latency_ms=logs.elapsed_ms(start))
+
+            # Success case - wrap non-dict responses
+            return result if isinstance(result, dict) else {"data": result}
+
+        except cancellation.Cancelled as e:
+            metrics.inc("tomba_upstream_cancelled_total")
+            logger.debug("Skipped %s call: %s", endpoint, e)
+            return {"error": f"Request cancelled ({e})"}
 
         except Exception as e:
             error_msg = str(e)
 
             # Parse common error types
-            if "401" in error_msg or "Unauthorized" in error_msg:
+            if isinstance(e, LimiterRejected):
+                error_msg = "Tomba.io is responding slowly and the request queue is full. Please try again shortly."
+            elif isinstance(e, callers.QuotaExceeded):
+                error_msg = f"Daily credit cap reached: {str(e)}."
+            elif "401" in error_msg or "Unauthorized" in error_msg:
                 error_msg = "Invalid API credentials. Please check your API key and secret."
             elif "403" in error_msg or "Forbidden" in error_msg:
                 error_msg = "API access forbidden. Please check your subscription plan."
@@ -74,9 +245,13 @@ class TombaSDKWrapper:
             elif "connection" in error_msg.lower():
                 error_msg = "Connection error. Please check your internet connection."
 
-            logger.error(f"Tomba API error: {error_msg}")
+            logger.error("Tomba API error: %s", error_msg,
+                         extra={"endpoint": endpoint, "latency_ms": logs.elapsed_ms(start),
+                                "error": type(e).__name__})
             return {"error": error_msg}
 
+    @stored("domain_search")
+    @guarded("domain_search")
     def domain_search(self, domain: str, limit: int = 10, department: str = None) -> Dict[str, Any]:
         """Search for emails in a domain"""
         return self._handle_request(
@@ -86,6 +261,22 @@ class TombaSDKWrapper:
             department=department
         )
 
+    @guarded("domain_search")
+    def domain_search_page(self, domain: str, page: int = 1, limit: int = 100) -> Dict[str, Any]:
+        """Fetch one page of a domain search straight from the API
+
+        Not stored: callers comparing a domain over time need its current
+        state, never a cached response.
+        """
+        return self._handle_request(
+            self.domain_service.domain_search,
+            domain=domain,
+            page=page,
+            limit=limit
+        )
+
+    @stored("email_finder")
+    @guarded("email_finder")
     def email_finder(self, domain: str, first_name: str, last_name: str) -> Dict[str, Any]:
         """Find email for a specific person"""
         return self._handle_request(
@@ -95,65 +286,95 @@ class TombaSDKWrapper:
             last_name=last_name
         )
 
+    @stored("email_verifier")
+    @guarded("email_verifier")
     def email_verifier(self, email: str) -> Dict[str, Any]:
         """Verify email address"""
-        return self._handle_request(
+        return self._batched(
             self.verifier_service.email_verifier,
-            email=email
+            "email",
+            email
         )
 
+    @stored("author_finder")
+    @guarded("author_finder")
     def author_finder(self, url: str) -> Dict[str, Any]:
         """Find author email from URL"""
-        return self.finder_service.author_finder(
+        return self._handle_request(
+            self.finder_service.author_finder,
             url=url
         )
 
+    @stored("email_enrichment")
+    @guarded("email_enrichment")
     def email_enrichment(self, email: str) -> Dict[str, Any]:
         """Enrich email with additional data"""
-        return self.finder_service.enrichment(
-            email=email
+        return self._batched(
+            self.finder_service.enrichment,
+            "email",
+            email
         )
 
+    @stored("linkedin_finder")
+    @guarded("linkedin_finder")
     def linkedin_finder(self, url: str) -> Dict[str, Any]:
         """Find email from LinkedIn profile"""
-        return self.finder_service.linkedin_finder(
+        return self._handle_request(
+            self.finder_service.linkedin_finder,
             url=url
         )
 
+    @stored("phone_finder")
+    @guarded("phone_finder")
     def phone_finder(self, email: str) -> Dict[str, Any]:
         """Find phone number details"""
-        return self._handle_request(
+        return self._batched(
             self.phone_service.finder,
-            email=email
+            "email",
+            email
         )
 
+    @stored("phone_validator")
+    @guarded("phone_validator")
     def phone_validator(self, phone_number: str) -> Dict[str, Any]:
         """Validate phone number"""
-        return self._handle_request(
+        return self._batched(
             self.phone_service.validator,
-            phone=phone_number
+            "phone",
+            phone_number
         )
 
+    @stored("similar_domain")
     def similar_domain(self, domain: str) -> Dict[str, Any]:
         """Find similar domains"""
-        return self._handle_request(
+        return self._batched(
             self.similar_service.websites,
-            domain=domain
+            "domain",
+            domain
         )
 
+    @stored("technology_lookup")
     def technology_lookup(self, domain: str) -> Dict[str, Any]:
         """Lookup technologies used by a domain"""
-        return self._handle_request(
+        return self._batched(
             self.technology_service.list,
-            domain=domain
+            "domain",
+            domain
         )
 
     def get_account_info(self) -> Dict[str, Any]:
-        """Get account information"""
+        """Get account information, from the budget cache when fresh"""
+        account = self.budget.cached_account() or self.budget.refresh()
+        if account is not None:
+            return {"data": account}
         return self._handle_request(
             self.account_service.get_account
         )
 
+    def _fetch_account(self) -> Dict[str, Any]:
+        """Poll account usage for the budget (free, not charged to analysts)"""
+        return cassette.call(self.account_service.get_account)
+
 
 @registry.register_transform(
     display_name='Tomba - Base Transform',
@@ -166,10 +387,63 @@ class TombaSDKWrapper:
 class BaseTombaTransform(DiscoverableTransform):
     """Base class for all Tomba.io transforms using official SDK"""
 
+    # Long-running transforms may run as background jobs when the input
+    # entity has tomba.job_mode set to "true"
+    supports_job_mode = False
+
     def __init__(self):
         super().__init__()
         self.tomba_client: Optional[TombaSDKWrapper] = None
 
+    @classmethod
+    def run_transform(cls, request: MaltegoMsg):
+        # Upstream calls made for this request (including fan-out threads
+        # and background jobs) are scheduled and charged to this analyst
+        token = callers.set_current(callers.identify(request))
+        profile_token = profiles.set_current(profiles.resolve(request, cls.__name__))
+        log_token = logs.set_request(cls.__name__, request.Value)
+        start = time.monotonic()
+        try:
+            response = MergingTransform()
+            if cls.supports_job_mode and request.getProperty("tomba.job_mode") == "true":
+                job_id = submit_job(cls, request)
+                cls.add_job_entity(response, job_id, cls.__name__, request.Value)
+                response.addUIMessage(
+                    f"⏳ Started background job {job_id}. "
+                    "Run 'Tomba - Fetch Job Results' on the job entity to collect results.",
+                    messageType="Inform"
+                )
+                return response.returnOutput()
+
+            # Duplicate entities are merged when the response is serialized
+            cls.create_entities(request, response)
+            output = response.returnOutput()
+            logs.sampled(logger, "Transform %s returned %d entities",
+                         cls.__name__, len(response.entities),
+                         results=len(response.entities), latency_ms=logs.elapsed_ms(start))
+            return output
+        finally:
+            logs.reset_request(log_token)
+            profiles.reset_current(profile_token)
+            callers.reset_current(token)
+
+    @staticmethod
+    def add_job_entity(response: MaltegoTransform, job_id: str, transform_name: str,
+                       value: str, cursor: int = 0, status: str = "running"):
+        """Add the entity that tracks a background job"""
+        job_entity = response.addEntity(
+            Phrase, f"Tomba job {job_id}: {transform_name} {value}")
+        job_entity.addProperty(
+            "tomba.job_id", displayName="Job ID", value=job_id)
+        job_entity.addProperty(
+            "tomba.job_cursor", displayName="Job Cursor", value=str(cursor))
+        job_entity.addProperty(
+            "tomba.job_status", displayName="Job Status", value=status)
+        # Lets request routing send Fetch Job Results to the job's node
+        job_entity.addProperty(
+            "tomba.job_input", displayName="Job Input", value=value)
+        return job_entity
+
     def get_api_credentials(self, request: MaltegoMsg) -> tuple:
         """Extract API credentials from request"""
         # Try transform settings first
@@ -203,10 +477,10 @@ class BaseTombaTransform(DiscoverableTransform):
             return False
 
         try:
-            self.tomba_client = TombaSDKWrapper(api_key, secret_key)
+            self.tomba_client = TombaSDKWrapper.shared(api_key, secret_key)
             return True
         except Exception as e:
-            logger.error(f"Failed to initialize Tomba client: {str(e)}")
+            logger.error("Failed to initialize Tomba client: %s", e)
             return False
 
     def handle_api_error(self, response: MaltegoTransform, result: Dict[str, Any]) -> bool:
@@ -247,8 +521,19 @@ class BaseTombaTransform(DiscoverableTransform):
             return True
         return False
 
-    def add_tomba_properties(self, entity, data: Dict[str, Any], prefix: str = "tomba"):
-        """Add comprehensive Tomba properties to entity"""
+    @property
+    def profile(self) -> str:
+        """Property profile of the current request (minimal, standard or full)"""
+        return profiles.current()
+
+    @property
+    def wants_summaries(self) -> bool:
+        """Whether parsers should build sources and WHOIS summaries"""
+        return profiles.wants_summaries(self.profile)
+
+    def add_tomba_properties(self, entity, data: Union[Dict[str, Any], Record], prefix: str = "tomba"):
+        """Add the Tomba properties selected by the request's profile to entity"""
+        profile = self.profile
 
         # Standard properties
         property_mappings = {
@@ -283,6 +568,8 @@ class BaseTombaTransform(DiscoverableTransform):
         }
 
         for prop_name, (display_name, data_key) in property_mappings.items():
+            if not profiles.includes(profile, prop_name[len(prefix) + 1:]):
+                continue
             value = self._get_nested_value(data, data_key)
 
             if value is not None and value != "":
@@ -299,47 +586,75 @@ class BaseTombaTransform(DiscoverableTransform):
                     value=str(value)
                 )
 
+        if not profiles.wants_summaries(profile):
+            return
+
+        # Records carry sources and WHOIS already summarized
+        if isinstance(data, Record):
+            sources_count, source_urls = data.get("sources_count"), data.get("source_urls")
+            registrar, created_date = data.get("registrar"), data.get("domain_created")
+        else:
+            sources_count, source_urls = summarize_sources(data)
+            registrar, created_date = summarize_whois(data)
+
         # Add sources information
-        sources = data.get("sources", [])
-        if sources:
+        if sources_count:
             entity.addProperty(
                 f"{prefix}.sources_count",
                 displayName="Sources Count",
-                value=str(len(sources))
+                value=str(sources_count)
             )
 
             # Add first few source URLs
-            source_urls = [s.get("uri", "")
-                           for s in sources[:3] if s.get("uri")]
             if source_urls:
                 entity.addProperty(
                     f"{prefix}.source_urls",
                     displayName="Source URLs",
-                    value=", ".join(source_urls)
+                    value=source_urls
                 )
 
         # Add WHOIS information if available
-        whois_data = self._get_nested_value(
-            data, ["whois"]) or self._get_nested_value(data, ["email", "whois"])
-        if whois_data:
-            registrar = whois_data.get("registrar_name", "")
-            if registrar:
-                entity.addProperty(
-                    f"{prefix}.registrar",
-                    displayName="Registrar",
-                    value=registrar
-                )
+        if registrar:
+            entity.addProperty(
+                f"{prefix}.registrar",
+                displayName="Registrar",
+                value=registrar
+            )
 
-            created_date = whois_data.get("created_date", "")
-            if created_date:
-                entity.addProperty(
-                    f"{prefix}.domain_created",
-                    displayName="Domain Created",
-                    value=created_date
-                )
+        if created_date:
+            entity.addProperty(
+                f"{prefix}.domain_created",
+                displayName="Domain Created",
+                value=created_date
+            )
+
+    def create_technology_entity(self, response: MaltegoTransform, tech: TechnologyRecord):
+        """Create a technology entity from a technology lookup result"""
+        tech_entity = response.addEntity(
+            BuiltwithTechnology, tech.name or tech.slug)
+
+        technology_properties = {
+            "tomba.technology_slug": ("Technology Slug", tech.slug),
+            "tomba.technology_icon": ("Technology Icon", tech.icon),
+            "tomba.technology_website": ("Technology Website", tech.website),
+            "tomba.category_name": ("Category Name", tech.category_name),
+            "tomba.category_slug": ("Category Slug", tech.category_slug),
+            "tomba.category_id": ("Category ID", tech.category_id),
+        }
+        for prop_name, (display_name, value) in technology_properties.items():
+            if value is not None and value != "":
+                tech_entity.addProperty(
+                    prop_name, displayName=display_name, value=str(value))
+
+        return tech_entity
 
     def _get_nested_value(self, data: Dict[str, Any], key_path) -> Any:
         """Get nested value from dictionary using key path"""
+        if isinstance(data, Record):
+            # Records store nested paths flattened with "_"
+            if isinstance(key_path, list):
+                key_path = "_".join(key_path)
+            return data.get(key_path)
         if isinstance(key_path, str):
             return data.get(key_path)
         elif isinstance(key_path, list):
@@ -365,6 +680,21 @@ class BaseTombaTransform(DiscoverableTransform):
         else:
             return f"⚪ Very Low ({confidence}%)"
 
+    @staticmethod
+    def previously_invalid(request: MaltegoMsg, kind: str, value: str) -> bool:
+        """Whether ``value`` is a known-bad input the analyst did not ask to recheck"""
+        if request.getProperty("tomba.recheck") == "true":
+            return False
+        return knownbad.contains(kind, value)
+
+    def add_previously_invalid_message(self, response: MaltegoTransform, value: str):
+        """Tell the analyst an input was answered from the known-bad filter"""
+        response.addUIMessage(
+            f"🚫 Tomba.io already reported {value} as invalid or empty; no credits used. "
+            "Set tomba.recheck = true on the entity to look it up again.",
+            messageType="Inform"
+        )
+
     def add_summary_message(self, response: MaltegoTransform, summary: str):
         """Add summary information message"""
         response.addUIMessage(
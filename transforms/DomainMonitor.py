@@ -0,0 +1,111 @@
+"""
+Domain Monitor Transform
+Return only emails added, removed or changed since the last run
+"""
+
+import logging
+import time
+from extensions import registry
+from maltego_trx.entities import Email
+from maltego_trx.maltego import MaltegoMsg, MaltegoTransform
+from .BaseTombaTransform import BaseTombaTransform
+from .monitor import monitor_domain
+from .store import get_store
+
+logger = logging.getLogger(__name__)
+
+
+@registry.register_transform(
+    display_name='Tomba - Domain Monitor',
+    input_entity='maltego.Website',
+    description='Return emails added, removed or changed since the previous run for a watched domain.',
+    output_entities=['maltego.EmailAddress'],
+    disclaimer="Tomba.io - Email Finder & Verifier API",
+)
+class DomainMonitor(BaseTombaTransform):
+    """Transform returning the difference between domain search snapshots"""
+
+    @classmethod
+    def create_entities(cls, request: MaltegoMsg, response: MaltegoTransform):
+        transform = cls()
+
+        store = get_store()
+        if store is None:
+            response.addUIMessage(
+                "🗄️ Domain monitoring needs the local result store.\n\n"
+                "In Transform settings.py, set:\n"
+                "• TOMBA_STORE_PATH = \"tomba_results.db\"",
+                messageType="FatalError"
+            )
+            return
+
+        if not transform.init_tomba_client(request):
+            response.addUIMessage(
+                "🔑 Please configure Tomba.io API credentials:\n\n"
+                "In Transform settings.py, add:\n"
+                "• TOMBA_API_KEY = \"ta_xx\" Your API key (starts with 'ta_')\n"
+                "• TOMBA_SECRET_KEY = \"ts_xx\" Your secret key (starts with 'ts_')\n\n"
+                "Get your keys from: https://app.tomba.io/api",
+                messageType="FatalError"
+            )
+            return
+
+        domain = request.Value.strip().lower()
+        try:
+            limit = int(request.getProperty("tomba.limit") or "100")
+        except ValueError:
+            limit = 0
+        if limit < 1:
+            response.addUIMessage(
+                "⚠️ Invalid setting: tomba.limit must be a whole number of at least 1",
+                messageType="FatalError"
+            )
+            return
+
+        logger.debug("Monitoring domain: %s (limit: %d)", domain, limit)
+
+        result, changes, previous_taken_at = monitor_domain(
+            transform.tomba_client, store, domain, limit=limit)
+
+        if transform.handle_api_error(response, result):
+            return
+
+        emails = {
+            (e.get("email") or "").lower(): e
+            for e in (result.get("data") or {}).get("emails") or []
+        }
+
+        for change in changes:
+            email_entity = response.addEntity(Email, change["email"])
+
+            email_data = emails.get(change["email"])
+            if email_data:
+                transform.add_tomba_properties(email_entity, email_data)
+
+            email_entity.addProperty(
+                "tomba.diff", displayName="Change", value=change["change"].title())
+
+            if change["fields"]:
+                email_entity.addProperty(
+                    "tomba.diff_fields",
+                    displayName="Changed Fields",
+                    value="; ".join(
+                        f"{field}: {old} → {new}"
+                        for field, (old, new) in change["fields"].items())
+                )
+
+        if previous_taken_at is None:
+            transform.add_summary_message(
+                response,
+                f"Baseline snapshot recorded for {domain}: {len(changes)} emails")
+            return
+
+        counts = {kind: 0 for kind in ("added", "removed", "changed")}
+        for change in changes:
+            counts[change["change"]] += 1
+
+        since = time.strftime("%Y-%m-%d %H:%M", time.localtime(previous_taken_at))
+        transform.add_summary_message(
+            response,
+            f"Since {since}: {counts['added']} added, {counts['removed']} removed, "
+            f"{counts['changed']} changed for {domain}")
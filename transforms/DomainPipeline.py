@@ -0,0 +1,220 @@
+"""
+Domain to verified contacts pipeline transform
+Runs domain search, bulk verification, technology and similar-site lookups
+server-side and returns the combined graph in one response
+"""
+
+import logging
+from functools import partial
+from extensions import registry
+from maltego_trx.entities import Email, Person, Website
+from maltego_trx.maltego import MaltegoMsg, MaltegoTransform
+from .DomainSearch import DomainSearch
+from .records import parse_domain_search, parse_technologies
+
+logger = logging.getLogger(__name__)
+
+STAGE_LABELS = {"technology": "technology lookup", "similar": "similar websites lookup"}
+
+
+@registry.register_transform(
+    display_name='Tomba - Domain to Verified Contacts',
+    input_entity='maltego.Website',
+    description='Find, verify and profile all contacts of a domain in a single run.',
+    output_entities=['maltego.EmailAddress', 'maltego.Person', 'maltego.Company',
+                     'maltego.Website', 'maltego.BuiltWithTechnology'],
+    disclaimer="Tomba.io - Email Finder & Verifier API",
+)
+class DomainPipeline(DomainSearch):
+    """Transform chaining DomainSearch, EmailVerifier, Technology and Similar"""
+
+    @classmethod
+    def create_entities(cls, request: MaltegoMsg, response: MaltegoTransform):
+        transform = cls()
+
+        if not transform.init_tomba_client(request):
+            response.addUIMessage(
+                "🔑 Please configure Tomba.io API credentials:\n\n"
+                "In Transform settings.py, add:\n"
+                "• TOMBA_API_KEY = \"ta_xx\" Your API key (starts with 'ta_')\n"
+                "• TOMBA_SECRET_KEY = \"ts_xx\" Your secret key (starts with 'ts_')\n\n"
+                "Get your keys from: https://app.tomba.io/api",
+                messageType="FatalError"
+            )
+            return
+
+        domain = request.Value.strip().lower()
+
+        # Per-stage limits
+        try:
+            limit = int(request.getProperty("tomba.limit") or "50")
+            verify_limit = int(request.getProperty("tomba.verify_limit") or "25")
+            verify_concurrency = int(request.getProperty(
+                "tomba.verify_concurrency") or "4")
+            credit_budget = int(request.getProperty("tomba.credit_budget") or "0")
+        except ValueError:
+            limit = verify_concurrency = 0
+        if limit < 1 or verify_concurrency < 1 or verify_limit < 0 or credit_budget < 0:
+            response.addUIMessage(
+                "⚠️ Invalid pipeline settings:\n\n"
+                "• tomba.limit and tomba.verify_concurrency must be whole numbers of at least 1\n"
+                "• tomba.verify_limit and tomba.credit_budget must be whole numbers "
+                "of at least 0 (0 = no budget)",
+                messageType="FatalError"
+            )
+            return
+        include_technology = request.getProperty(
+            "tomba.include_technology") != "false"
+        include_similar = request.getProperty(
+            "tomba.include_similar") != "false"
+
+        logger.debug("Running contact pipeline for domain: %s (limit: %d, verify: %d)",
+                     domain, limit, verify_limit)
+
+        client = transform.tomba_client
+
+        # Stage 1: independent lookups run side by side
+        stage_one = {"search": partial(
+            client.domain_search, domain=domain, limit=limit)}
+        if include_technology:
+            stage_one["technology"] = partial(
+                client.technology_lookup, domain)
+        if include_similar:
+            stage_one["similar"] = partial(client.similar_domain, domain)
+
+        # The search always fits a budget; optional lookups are dropped first
+        if credit_budget and len(stage_one) > credit_budget:
+            skipped = list(stage_one)[credit_budget:]
+            for name in skipped:
+                del stage_one[name]
+            response.addUIMessage(
+                f"💳 Credit budget of {credit_budget} reached: skipping the "
+                f"{' and '.join(STAGE_LABELS[name] for name in skipped)}",
+                messageType="PartialError"
+            )
+
+        results = client.fan_out(stage_one)
+        credits_used = len(stage_one)
+
+        search = results["search"]
+        if transform.handle_api_error(response, search):
+            return
+
+        organization, emails = parse_domain_search(
+            search.get("data") or {}, summaries=transform.wants_summaries)
+
+        if organization:
+            transform._create_organization_entity(
+                response, domain, organization)
+
+        # Stage 2: verify the returned emails with bounded concurrency
+        to_verify = emails[:verify_limit]
+        if credit_budget:
+            remaining = max(credit_budget - credits_used, 0)
+            if len(to_verify) > remaining:
+                response.addUIMessage(
+                    f"💳 Credit budget of {credit_budget} reached: "
+                    f"verifying {remaining} of {len(to_verify)} emails",
+                    messageType="PartialError"
+                )
+                to_verify = to_verify[:remaining]
+
+        verifications = client.fan_out(
+            {e.email: partial(client.email_verifier, e.email)
+             for e in to_verify},
+            max_workers=verify_concurrency
+        )
+        credits_used += len(verifications)
+
+        failed_verifications = 0
+        person_entities = {}
+
+        for email_data in emails:
+            email_address = email_data.email
+            email_entity = response.addEntity(Email, email_address)
+            transform.add_tomba_properties(email_entity, email_data)
+
+            verification = verifications.get(email_address)
+            if verification is not None:
+                if "error" in verification:
+                    failed_verifications += 1
+                else:
+                    transform._add_verification_properties(
+                        email_entity, verification)
+
+            person = email_data.named_person
+
+            if person is not None:
+                first_name = person.get("first_name", "")
+                last_name = person.get("last_name", "")
+                full_name = person.display_name
+                person_key = full_name.lower()
+                if person_key not in person_entities:
+                    person_entity = response.addEntity(Person, full_name)
+                    person_entities[person_key] = person_entity
+
+                    if first_name:
+                        person_entity.addProperty(
+                            "person.firstnames", value=first_name)
+                    if last_name:
+                        person_entity.addProperty(
+                            "person.lastname", value=last_name)
+
+                    transform._add_person_professional_info(
+                        person_entity, email_data)
+                    transform._add_social_media_links(
+                        person_entity, email_data)
+
+        if failed_verifications:
+            response.addUIMessage(
+                f"⚠️ {failed_verifications} email verification(s) failed",
+                messageType="PartialError"
+            )
+
+        technologies = parse_technologies(transform._stage_result(
+            response, results, "technology", "Technology lookup"))
+        for tech in technologies:
+            transform.create_technology_entity(response, tech)
+
+        similar_sites = transform._stage_result(
+            response, results, "similar", "Similar websites lookup")
+        for site in similar_sites:
+            url = site.get("website_url", "")
+            if url:
+                website_entity = response.addEntity(Website, url)
+                website_entity.addProperty(
+                    "tomba.name", displayName="Name", value=site.get("name", ""))
+
+        transform.add_summary_message(
+            response,
+            f"Pipeline for {domain}: {len(emails)} emails, "
+            f"{len(verifications) - failed_verifications} verified, "
+            f"{len(technologies)} technologies, {len(similar_sites)} similar sites "
+            f"({credits_used} API calls)")
+
+    def _stage_result(self, response: MaltegoTransform, results: dict, name: str, label: str) -> list:
+        """Return a list result from an optional stage, reporting its failure"""
+        result = results.get(name)
+        if result is None:
+            return []
+        if "error" in result:
+            response.addUIMessage(
+                f"⚠️ {label} failed: {result['error']}",
+                messageType="PartialError"
+            )
+            return []
+        return result.get("data") or []
+
+    def _add_verification_properties(self, email_entity, verification: dict):
+        """Add verification outcome to an email entity"""
+        email_data = (verification.get("data") or {}).get("email", {})
+        status = email_data.get("status") or "unknown"
+        result_status = email_data.get("result") or "unknown"
+
+        email_entity.addProperty(
+            "tomba.verification_status", displayName="Status", value=status.title())
+        email_entity.addProperty(
+            "tomba.verification_result", displayName="Result", value=result_status.title())
+        email_entity.addProperty(
+            "tomba.verification_score", displayName="Score",
+            value=f"{email_data.get('score', 0)}%")
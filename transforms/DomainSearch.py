@@ -7,7 +7,10 @@ import logging
 from extensions import registry
 from maltego_trx.entities import Email, Person, Company, Domain
 from maltego_trx.maltego import MaltegoMsg, MaltegoTransform
+from . import knownbad
 from .BaseTombaTransform import BaseTombaTransform
+from .profiles import MINIMAL
+from .records import OrganizationRecord, parse_domain_search
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +27,8 @@ logger = logging.getLogger(__name__)
 class DomainSearch(BaseTombaTransform):
     """Transform to discover all emails for a domain"""
 
+    supports_job_mode = True
+
     @classmethod
     def create_entities(cls, request: MaltegoMsg, response: MaltegoTransform):
         transform = cls()
@@ -50,7 +55,11 @@ class DomainSearch(BaseTombaTransform):
         include_organization = request.getProperty(
             "tomba.include_organization") != "false"
 
-        logger.info(f"Searching emails for domain: {domain} (limit: {limit})")
+        if transform.previously_invalid(request, knownbad.DOMAIN, domain):
+            transform.add_previously_invalid_message(response, domain)
+            return
+
+        logger.debug("Searching emails for domain: %s (limit: %d)", domain, limit)
 
         # Perform domain search
         result = transform.tomba_client.domain_search(
@@ -68,15 +77,28 @@ class DomainSearch(BaseTombaTransform):
             response.addUIMessage("❌ No data returned from Tomba.io API")
             return
 
-        data = result["data"]
-        organization = data.get("organization", {})
-        emails = data.get("emails", [])
+        degraded = "degraded" in result
+        if degraded:
+            response.addUIMessage(
+                f"⚠️ Domain search credits are running low; search limited to "
+                f"{result['degraded']} emails",
+                messageType="PartialError"
+            )
+
+        # Parse once into compact records and release the response dicts
+        organization, emails = parse_domain_search(
+            result["data"], summaries=transform.wants_summaries)
         meta = result.get("meta", {})
+        del result
 
         if not emails:
             response.addUIMessage(
                 f"📭 No email addresses found for domain: {domain}"
             )
+            # Only an unfiltered, full-credit search proves the domain empty
+            if department is None and not degraded and \
+                    (organization is None or not organization.organization):
+                knownbad.add(knownbad.DOMAIN, domain)
 
             # Still create organization entity if available
             if include_organization and organization:
@@ -90,8 +112,8 @@ class DomainSearch(BaseTombaTransform):
             if email.get("score", 0) >= confidence_threshold
         ]
 
-        logger.info(
-            f"Found {len(filtered_emails)} emails above confidence threshold {confidence_threshold}")
+        logger.debug("Found %d emails above confidence threshold %d",
+                     len(filtered_emails), confidence_threshold)
 
         # Create organization entity first
         company_entity = None
@@ -101,11 +123,10 @@ class DomainSearch(BaseTombaTransform):
 
         # Create email and person entities
         person_entities = {}
+        detailed = transform.profile != MINIMAL
 
         for email_data in filtered_emails:
-            email_address = email_data.get("email", "")
-            if not email_address:
-                continue
+            email_address = email_data.email
 
             # Create email entity
             email_entity = response.addEntity(Email, email_address)
@@ -113,27 +134,29 @@ class DomainSearch(BaseTombaTransform):
             # Add comprehensive email properties
             transform.add_tomba_properties(email_entity, email_data)
 
-            # Add email-specific properties
-            email_type = email_data.get("type", "unknown")
-            email_entity.addProperty(
-                "tomba.email_type",
-                displayName="Email Type",
-                value=email_type.title()
-            )
+            if detailed:
+                # Add email-specific properties
+                email_type = email_data.get("type", "unknown")
+                email_entity.addProperty(
+                    "tomba.email_type",
+                    displayName="Email Type",
+                    value=email_type.title()
+                )
 
-            # Add confidence with visual indicator
-            confidence = email_data.get("score", 0)
-            email_entity.addProperty(
-                "tomba.confidence_visual",
-                displayName="Confidence",
-                value=transform.format_confidence_message(confidence)
-            )
+                # Add confidence with visual indicator
+                confidence = email_data.get("score", 0)
+                email_entity.addProperty(
+                    "tomba.confidence_visual",
+                    displayName="Confidence",
+                    value=transform.format_confidence_message(confidence)
+                )
 
             # Create person entity if name information is available
-            first_name = email_data.get("first_name", "")
-            last_name = email_data.get("last_name", "")
+            person = email_data.named_person
 
-            if first_name or last_name:
+            if person is not None:
+                first_name = person.get("first_name", "")
+                last_name = person.get("last_name", "")
                 full_name = f"{first_name} {last_name}"
 
                 # Avoid duplicate person entities
@@ -150,13 +173,14 @@ class DomainSearch(BaseTombaTransform):
                         person_entity.addProperty(
                             "person.lastname", value=last_name)
 
-                    # Add professional information
-                    transform._add_person_professional_info(
-                        person_entity, email_data)
+                    if detailed:
+                        # Add professional information
+                        transform._add_person_professional_info(
+                            person_entity, email_data)
 
-                    # Add social media links
-                    transform._add_social_media_links(
-                        person_entity, email_data)
+                        # Add social media links
+                        transform._add_social_media_links(
+                            person_entity, email_data)
 
         # Add summary information
         total_found = len(emails)
@@ -198,7 +222,8 @@ class DomainSearch(BaseTombaTransform):
                     f"Organization: {' • '.join(org_summary_parts)}"
                 )
 
-    def _create_organization_entity(self, response: MaltegoTransform, domain: str, organization: dict):
+    def _create_organization_entity(self, response: MaltegoTransform, domain: str,
+                                    organization: OrganizationRecord):
         """Create company/organization entity"""
         company_name = organization.get("organization", domain)
         company_entity = response.addEntity(Company, company_name)
@@ -208,24 +233,21 @@ class DomainSearch(BaseTombaTransform):
             company_entity, organization, prefix="tomba.org")
 
         # Add specific company properties
-        location = organization.get("location", {})
-        if location:
-            country = location.get("country", "")
-            city = location.get("city", "")
-            if country:
-                company_entity.addProperty("company.country", value=country)
-            if city:
-                company_entity.addProperty("company.city", value=city)
+        if organization.country:
+            company_entity.addProperty(
+                "company.country", value=organization.country)
+        if organization.city:
+            company_entity.addProperty("company.city", value=organization.city)
 
         # Add social media links
-        social_links = organization.get("social_links", {})
-        for platform, url in social_links.items():
-            if url:
-                company_entity.addProperty(
-                    f"tomba.{platform}",
-                    displayName=platform.replace("_url", "").title(),
-                    value=url
-                )
+        if self.profile == MINIMAL:
+            return company_entity
+        for platform, url in organization.social_links or ():
+            company_entity.addProperty(
+                f"tomba.{platform}",
+                displayName=platform.replace("_url", "").title(),
+                value=url
+            )
 
         return company_entity
 
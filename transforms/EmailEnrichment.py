@@ -6,6 +6,7 @@ from extensions import registry
 from maltego_trx.entities import Email, Person
 from maltego_trx.maltego import MaltegoMsg, MaltegoTransform
 from .BaseTombaTransform import BaseTombaTransform
+from .records import EmailRecord
 
 logger = logging.getLogger(__name__)
 
@@ -37,7 +38,7 @@ class EmailEnrichment(BaseTombaTransform):
 
         email = request.Value.strip().lower()
 
-        logger.info(f"Enriching email: {email}")
+        logger.debug("Enriching email: %s", email)
 
         result = transform.tomba_client.email_enrichment(email)
 
@@ -48,23 +49,23 @@ class EmailEnrichment(BaseTombaTransform):
             response.addUIMessage("❌ No enrichment data available")
             return
 
-        data = result["data"]
+        data = EmailRecord.from_dict(
+            result["data"], summaries=transform.wants_summaries)
 
         # Create enriched email entity
         enriched_email = response.addEntity(Email, email)
         transform.add_tomba_properties(enriched_email, data)
 
         # Create person entity if available
-        first_name = data.get("first_name", "")
-        last_name = data.get("last_name", "")
+        person = data.named_person
 
-        if first_name or last_name:
-            full_name = f"{first_name} {last_name}".strip()
-            person_entity = response.addEntity(Person, full_name)
+        if person is not None:
+            person_entity = response.addEntity(Person, person.display_name)
 
             # Add enriched person data
-            for prop, value in data.items():
-                if prop in ["position", "company", "linkedin", "twitter"] and value:
+            for prop in ["position", "company", "linkedin", "twitter"]:
+                value = person.get(prop)
+                if value:
                     person_entity.addProperty(
                         f"tomba.{prop}", displayName=prop.title(), value=value)
 
@@ -0,0 +1,155 @@
+"""
+Composite transform building a full email profile in one round trip
+Runs verification, enrichment and phone lookup concurrently
+"""
+import logging
+from functools import partial
+from extensions import registry
+from maltego_trx.entities import Email, Person, PhoneNumber
+from maltego_trx.maltego import MaltegoMsg, MaltegoTransform
+from .BaseTombaTransform import BaseTombaTransform
+from .records import EmailRecord, PhoneRecord
+
+logger = logging.getLogger(__name__)
+
+
+@registry.register_transform(
+    display_name='Tomba - Email Full Profile',
+    input_entity='maltego.EmailAddress',
+    description='Verify, enrich and find phone numbers for an email in a single run',
+    output_entities=['maltego.EmailAddress',
+                     'maltego.Person', 'maltego.PhoneNumber'],
+    disclaimer="Tomba.io - Email Finder & Verifier API",
+)
+class EmailProfile(BaseTombaTransform):
+    """Transform combining EmailVerifier, EmailEnrichment and PhoneFinder"""
+
+    SUB_CALLS = {
+        "verification": "Email verification",
+        "enrichment": "Email enrichment",
+        "phone": "Phone lookup",
+    }
+
+    @classmethod
+    def create_entities(cls, request: MaltegoMsg, response: MaltegoTransform):
+        transform = cls()
+
+        if not transform.init_tomba_client(request):
+            response.addUIMessage(
+                "🔑 Please configure Tomba.io API credentials:\n\n"
+                "In Transform settings.py, add:\n"
+                "• TOMBA_API_KEY = \"ta_xx\" Your API key (starts with 'ta_')\n"
+                "• TOMBA_SECRET_KEY = \"ts_xx\" Your secret key (starts with 'ts_')\n\n"
+                "Get your keys from: https://app.tomba.io/api",
+                messageType="FatalError"
+            )
+            return
+
+        email = request.Value.strip().lower()
+
+        logger.debug("Building full profile for email: %s", email)
+
+        client = transform.tomba_client
+        results = client.fan_out({
+            "verification": partial(client.email_verifier, email),
+            "enrichment": partial(client.email_enrichment, email),
+            "phone": partial(client.phone_finder, email),
+        })
+
+        # Report each failed sub-call on its own so partial data still shows
+        succeeded = {}
+        for name, label in cls.SUB_CALLS.items():
+            result = results.get(name, {})
+            if "error" in result:
+                response.addUIMessage(
+                    f"⚠️ {label} failed: {result['error']}",
+                    messageType="PartialError"
+                )
+            elif result.get("data"):
+                succeeded[name] = result["data"]
+
+        if not succeeded:
+            response.addUIMessage("❌ No profile data returned")
+            return
+
+        # Merge every successful sub-call onto one email entity
+        email_entity = response.addEntity(Email, email)
+
+        enrichment = None
+        if "enrichment" in succeeded:
+            enrichment = EmailRecord.from_dict(
+                succeeded["enrichment"], summaries=transform.wants_summaries)
+            transform.add_tomba_properties(email_entity, enrichment)
+
+        verification = (succeeded.get("verification") or {}).get("email")
+        if verification:
+            verification = EmailRecord.from_dict(
+                verification, summaries=transform.wants_summaries)
+            transform.add_tomba_properties(email_entity, verification)
+            transform._add_verification_summary(email_entity, verification)
+
+        person = enrichment.named_person if enrichment is not None else None
+
+        if person is not None:
+            person_entity = response.addEntity(Person, person.display_name)
+
+            if person.first_name:
+                person_entity.addProperty(
+                    "person.firstnames", value=person.first_name)
+            if person.last_name:
+                person_entity.addProperty(
+                    "person.lastname", value=person.last_name)
+
+            for prop in ["position", "company", "linkedin", "twitter"]:
+                value = person.get(prop)
+                if value:
+                    person_entity.addProperty(
+                        f"tomba.{prop}", displayName=prop.title(), value=value)
+
+        if "phone" in succeeded:
+            phone = PhoneRecord.from_dict(succeeded["phone"])
+            if phone.number:
+                transform._create_phone_entity(response, phone)
+
+        transform.add_summary_message(
+            response,
+            f"Profile for {email}: {len(succeeded)}/{len(cls.SUB_CALLS)} lookups succeeded")
+
+    def _add_verification_summary(self, email_entity, verification: EmailRecord):
+        """Add verification status properties to the email entity"""
+        status = verification.status or "unknown"
+        result_status = verification.result or "unknown"
+        score = verification.get("score", 0)
+
+        email_entity.addProperty(
+            "tomba.verification_status", displayName="Status", value=status.title())
+        email_entity.addProperty(
+            "tomba.verification_result", displayName="Result", value=result_status.title())
+        email_entity.addProperty(
+            "tomba.verification_score", displayName="Score", value=f"{score}%")
+
+    def _create_phone_entity(self, response: MaltegoTransform, phone: PhoneRecord):
+        """Create phone number entity from phone finder data"""
+        phone_entity = response.addEntity(PhoneNumber, phone.number)
+
+        valid = phone.get("valid", False)
+        phone_entity.addProperty(
+            "tomba.valid", displayName="Valid", value="Yes" if valid else "No")
+
+        formats = {
+            "local_format": "Local Format",
+            "e164_format": "E.164 Format",
+            "country_code": "Country Code",
+            "line_type": "Line Type",
+        }
+        for key, label in formats.items():
+            value = phone.get(key)
+            if value:
+                phone_entity.addProperty(
+                    f"tomba.{key}", displayName=label, value=str(value))
+
+        for k, v in phone.carrier or ():
+            phone_entity.addProperty(
+                f"tomba.carrier_{k}", displayName=f"Carrier {k.title()}", value=str(v))
+
+        return phone_entity
@@ -6,6 +6,7 @@ from extensions import registry
 
 from maltego_trx.entities import Email
 from maltego_trx.maltego import MaltegoMsg, MaltegoTransform
+from . import knownbad
 from .BaseTombaTransform import BaseTombaTransform
 
 logger = logging.getLogger(__name__)
@@ -39,7 +40,16 @@ class EmailVerifier(BaseTombaTransform):
 
         email = request.Value.strip().lower()
 
-        logger.info(f"Verifying email: {email}")
+        if transform.previously_invalid(request, knownbad.EMAIL, email):
+            known_email = response.addEntity(Email, email)
+            known_email.addProperty(
+                "tomba.verification_status", displayName="Status", value="Previously Invalid")
+            known_email.addProperty(
+                "tomba.recheck", displayName="Recheck", value="false")
+            transform.add_previously_invalid_message(response, email)
+            return
+
+        logger.debug("Verifying email: %s", email)
 
         result = transform.tomba_client.email_verifier(email)
 
@@ -61,6 +71,8 @@ class EmailVerifier(BaseTombaTransform):
 
         # Add verification-specific properties
         status = email_data.get("status", "unknown")
+        if status == "invalid":
+            knownbad.add(knownbad.EMAIL, email)
         result_status = email_data.get("result", "unknown")
         score = email_data.get("score", 0)
 
@@ -0,0 +1,89 @@
+"""
+Transform to collect results of a background Tomba.io job
+Returns only the entities completed since the previous fetch
+"""
+import logging
+from extensions import registry
+from maltego_trx.maltego import MaltegoMsg, MaltegoTransform
+from .BaseTombaTransform import BaseTombaTransform
+from .jobs import read_job
+
+logger = logging.getLogger(__name__)
+
+
+@registry.register_transform(
+    display_name='Tomba - Fetch Job Results',
+    input_entity='maltego.Phrase',
+    description='Fetch new results of a background Tomba.io job',
+    output_entities=['maltego.Phrase', 'maltego.EmailAddress', 'maltego.Person',
+                     'maltego.Company', 'maltego.Website'],
+    disclaimer="Tomba.io - Email Finder & Verifier API",
+)
+class FetchJobResults(BaseTombaTransform):
+    """Transform returning background job results incrementally"""
+
+    @classmethod
+    def create_entities(cls, request: MaltegoMsg, response: MaltegoTransform):
+        transform = cls()
+
+        job_id = (request.getProperty("tomba.job_id") or "").strip()
+        try:
+            cursor = int(request.getProperty("tomba.job_cursor") or "0")
+        except ValueError:
+            cursor = -1
+        if cursor < 0:
+            response.addUIMessage(
+                "⚠️ Invalid job cursor: tomba.job_cursor must be a whole number "
+                "of at least 0 (clear it to fetch all results again)",
+                messageType="FatalError"
+            )
+            return
+
+        if not job_id:
+            response.addUIMessage(
+                "❌ This entity is not a Tomba job. Run a transform with "
+                "tomba.job_mode = true to start one.",
+                messageType="PartialError"
+            )
+            return
+
+        logger.debug("Fetching results of job %s from line %d", job_id, cursor)
+
+        job = read_job(job_id, cursor)
+        if job is None:
+            response.addUIMessage(
+                f"❌ Job {job_id} not found (it may have expired)",
+                messageType="PartialError"
+            )
+            return
+
+        header, lines, next_cursor = job
+
+        entity_count = 0
+        for line in lines:
+            if "type" in line:
+                entity = response.addEntity(line["type"], line["value"])
+                for field_name, display_name, matching_rule, value in line["properties"]:
+                    entity.addProperty(
+                        field_name, displayName=display_name,
+                        matchingRule=matching_rule, value=value)
+                entity_count += 1
+            elif "message" in line:
+                response.addUIMessage(line["message"], messageType=line["messageType"])
+
+        # Returning the job entity again moves its cursor forward in the graph
+        transform.add_job_entity(
+            response, job_id, header.get("transform", ""), header.get("value", ""),
+            cursor=next_cursor, status=header["status"])
+
+        if header["status"] == "failed":
+            response.addUIMessage(
+                f"❌ Job {job_id} failed: {header.get('error')}",
+                messageType="PartialError"
+            )
+        elif header["status"] == "running":
+            transform.add_summary_message(
+                response, f"⏳ Job {job_id} still running: {entity_count} new result(s)")
+        else:
+            transform.add_summary_message(
+                response, f"Job {job_id} complete: {entity_count} new result(s)")
@@ -3,6 +3,7 @@ import logging
 from extensions import registry
 from maltego_trx.entities import Email, Person
 from maltego_trx.maltego import MaltegoMsg, MaltegoTransform
+from . import knownbad
 from .BaseTombaTransform import BaseTombaTransform
 
 logger = logging.getLogger(__name__)
@@ -36,7 +37,11 @@ class LinkedinFinder(BaseTombaTransform):
 
         linkedin_url = request.Value.strip()
 
-        logger.info(f"Finding email from LinkedIn: {linkedin_url}")
+        if transform.previously_invalid(request, knownbad.LINKEDIN_URL, linkedin_url):
+            transform.add_previously_invalid_message(response, linkedin_url)
+            return
+
+        logger.debug("Finding email from LinkedIn: %s", linkedin_url)
 
         result = transform.tomba_client.linkedin_finder(linkedin_url)
 
@@ -52,6 +57,7 @@ class LinkedinFinder(BaseTombaTransform):
 
         if not email:
             response.addUIMessage("📭 No email found for LinkedIn profile")
+            knownbad.add(knownbad.LINKEDIN_URL, linkedin_url)
             return
 
         # Create email entity
@@ -39,7 +39,7 @@ class PhoneFinder(BaseTombaTransform):
 
         email = request.Value.strip().lower()
 
-        logger.info(f"Verifying email address: {email}")
+        logger.debug("Finding phone for email address: %s", email)
 
         result = transform.tomba_client.phone_finder(email)
 
@@ -36,7 +36,7 @@ class PhoneValidator(BaseTombaTransform):
             return
 
         phone = request.Value.strip().lower()
-        logger.info(f"Validating phone number: {phone}")
+        logger.debug("Validating phone number: %s", phone)
 
         result = transform.tomba_client.phone_validator(phone)
 
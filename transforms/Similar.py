@@ -36,7 +36,7 @@ class Similar(BaseTombaTransform):
             return
 
         website = request.Value.strip().lower()
-        logger.info(f"Finding similar websites for: {website}")
+        logger.debug("Finding similar websites for: %s", website)
 
         result = transform.tomba_client.similar_domain(website)
 
@@ -0,0 +1,135 @@
+"""
+Transform to map the neighborhood of similar websites using Tomba.io API
+Breadth-first expansion over similar_domain with depth and node budgets
+"""
+import logging
+from functools import partial
+from extensions import registry
+from maltego_trx.entities import Website
+from maltego_trx.maltego import MaltegoMsg, MaltegoTransform
+from .BaseTombaTransform import BaseTombaTransform
+
+logger = logging.getLogger(__name__)
+
+
+def canonical_domain(url: str) -> str:
+    """Reduce a website URL to its bare lower-case host"""
+    host = url.strip().lower()
+    if "://" in host:
+        host = host.split("://", 1)[1]
+    host = host.split("/", 1)[0]
+    if host.startswith("www."):
+        host = host[4:]
+    return host
+
+
+@registry.register_transform(
+    display_name='Tomba - Similar Websites Neighborhood',
+    input_entity='maltego.Website',
+    description='Expand similar websites over several hops in one run',
+    output_entities=['maltego.Website'],
+    disclaimer="Tomba.io - Similar Websites API",
+)
+class SimilarNeighborhood(BaseTombaTransform):
+    """Transform walking similar websites breadth-first"""
+
+    supports_job_mode = True
+
+    @classmethod
+    def create_entities(cls, request: MaltegoMsg, response: MaltegoTransform):
+        transform = cls()
+
+        if not transform.init_tomba_client(request):
+            response.addUIMessage(
+                "🔑 Please configure Tomba.io API credentials:\n\n"
+                "In Transform settings.py, add:\n"
+                "• TOMBA_API_KEY = 'ta_xx' Your API key (starts with 'ta_')\n"
+                "• TOMBA_SECRET_KEY = 'ts_xx' Your secret key (starts with 'ts_')\n\n"
+                "Get your keys from: https://app.tomba.io/api",
+                messageType="FatalError"
+            )
+            return
+
+        start = canonical_domain(request.Value)
+        try:
+            depth = int(request.getProperty("tomba.depth") or "2")
+            max_nodes = int(request.getProperty("tomba.max_nodes") or "50")
+            concurrency = int(request.getProperty("tomba.concurrency") or "4")
+        except ValueError:
+            depth = max_nodes = concurrency = 0
+        if depth < 1 or max_nodes < 1 or concurrency < 1:
+            response.addUIMessage(
+                "⚠️ Invalid neighborhood settings:\n\n"
+                "• tomba.depth, tomba.max_nodes and tomba.concurrency must be "
+                "whole numbers of at least 1",
+                messageType="FatalError"
+            )
+            return
+
+        logger.debug("Expanding similar websites for: %s (depth: %d, nodes: %d)",
+                     start, depth, max_nodes)
+
+        client = transform.tomba_client
+        visited = {start}
+        frontier = [start]
+        failed = 0
+        budget_hit = False
+
+        for hop in range(1, depth + 1):
+            if not frontier or budget_hit:
+                break
+
+            # Fetch the whole frontier at once; repeats come from the store
+            results = client.fan_out(
+                {domain: partial(client.similar_domain, domain)
+                 for domain in frontier},
+                max_workers=concurrency
+            )
+
+            next_frontier = []
+            for parent in frontier:
+                result = results.get(parent, {})
+                if "error" in result:
+                    failed += 1
+                    continue
+
+                for site in result.get("data") or []:
+                    url = site.get("website_url", "")
+                    domain = canonical_domain(url) if url else ""
+                    if not domain or domain in visited:
+                        continue
+                    if len(visited) - 1 >= max_nodes:
+                        budget_hit = True
+                        break
+
+                    visited.add(domain)
+                    next_frontier.append(domain)
+
+                    website_entity = response.addEntity(Website, domain)
+                    website_entity.addProperty(
+                        "tomba.name", displayName="Name", value=site.get("name", ""))
+                    website_entity.addProperty(
+                        "tomba.hop", displayName="Hop Distance", value=str(hop))
+                    website_entity.addProperty(
+                        "tomba.similar_to", displayName="Similar To", value=parent)
+
+                if budget_hit:
+                    break
+
+            frontier = next_frontier
+
+        if failed:
+            response.addUIMessage(
+                f"⚠️ {failed} similar website lookup(s) failed",
+                messageType="PartialError"
+            )
+
+        if budget_hit:
+            response.addUIMessage(
+                f"🧭 Node budget of {max_nodes} reached; increase tomba.max_nodes to expand further",
+                messageType="PartialError"
+            )
+
+        transform.add_summary_message(
+            response,
+            f"Found {len(visited) - 1} similar websites within {depth} hop(s) of {start}")
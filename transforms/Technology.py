@@ -2,10 +2,12 @@
 Transform to find technologies used by a domain using Tomba.io API
 """
 import logging
+import time
 from extensions import registry
-from maltego_trx.entities import Domain
 from maltego_trx.maltego import MaltegoMsg, MaltegoTransform
 from .BaseTombaTransform import BaseTombaTransform
+from .records import TechnologyRecord, parse_technologies
+from .store import get_store
 
 logger = logging.getLogger(__name__)
 
@@ -14,7 +16,7 @@ logger = logging.getLogger(__name__)
     display_name='Tomba - Technology',
     input_entity='maltego.Domain',
     description='Find technologies used by a domain',
-    output_entities=['maltego.Domain'],
+    output_entities=['maltego.BuiltWithTechnology'],
     disclaimer="Tomba.io - Technology API",
 )
 class Technology(BaseTombaTransform):
@@ -36,44 +38,51 @@ class Technology(BaseTombaTransform):
             return
 
         domain = request.Value.strip().lower()
-        logger.info(f"Finding technologies for domain: {domain}")
+        logger.debug("Finding technologies for domain: %s", domain)
 
         result = transform.tomba_client.technology_lookup(domain)
 
-        if transform.handle_api_error(response, result):
-            return
-
-        if "data" not in result or not result["data"]:
+        if "error" in result:
+            technologies = cls._recorded_technologies(domain)
+            if not technologies:
+                transform.handle_api_error(response, result)
+                return
+            recorded_at, technologies = technologies
+            response.addUIMessage(
+                f"🗄️ Technology lookup failed ({result['error']}); showing "
+                f"technologies recorded on {time.strftime('%Y-%m-%d', time.localtime(recorded_at))}",
+                messageType="PartialError"
+            )
+        elif not result.get("data"):
             response.addUIMessage("❌ No technology data found")
             return
+        else:
+            technologies = parse_technologies(result["data"])
 
-        for tech in result["data"]:
-            tech_name = tech.get("name", "")
-            tech_slug = tech.get("slug", "")
-            tech_icon = tech.get("icon", "")
-            tech_website = tech.get("website", "")
-            categories = tech.get("categories", {})
-            category_name = categories.get("name", "")
-            category_slug = categories.get("slug", "")
-            category_id = categories.get("id", "")
+        # One entity per technology; the API may list a technology twice
+        seen_slugs = set()
+        for tech in technologies:
+            tech_key = (tech.slug or tech.name).lower()
+            if tech_key in seen_slugs:
+                continue
+            seen_slugs.add(tech_key)
 
-            # Add technology as a property to the domain entity
-            tech_entity = response.addEntity(Domain, domain)
-            tech_entity.addProperty(
-                "tomba.technology_name", displayName="Technology Name", value=tech_name)
-            tech_entity.addProperty(
-                "tomba.technology_slug", displayName="Technology Slug", value=tech_slug)
+            tech_entity = transform.create_technology_entity(response, tech)
             tech_entity.addProperty(
-                "tomba.technology_icon", displayName="Technology Icon", value=tech_icon)
-            tech_entity.addProperty(
-                "tomba.technology_website", displayName="Technology Website", value=tech_website)
-            tech_entity.addProperty(
-                "tomba.category_name", displayName="Category Name", value=category_name)
-            tech_entity.addProperty(
-                "tomba.category_slug", displayName="Category Slug", value=category_slug)
-            tech_entity.addProperty(
-                "tomba.category_id", displayName="Category ID", value=str(category_id))
+                "tomba.domain", displayName="Domain", value=domain)
 
         transform.add_summary_message(
             response,
-            f"Found {len(result['data'])} technologies for domain {domain}")
+            f"Found {len(seen_slugs)} technologies for domain {domain}")
+
+    @staticmethod
+    def _recorded_technologies(domain: str):
+        """Return (newest update time, technologies) stored for a domain, or None"""
+        store = get_store()
+        rows = store.technologies_of(domain) if store is not None else []
+        if not rows:
+            return None
+        return (max(row["updated_at"] or 0 for row in rows),
+                [TechnologyRecord(**{key: row[key] for key in row.keys()
+                                     if key in TechnologyRecord.__slots__})
+                 for row in rows])
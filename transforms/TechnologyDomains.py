@@ -0,0 +1,75 @@
+"""
+Transform to list already profiled domains using a technology
+Answered from the local result store without an API call
+"""
+import logging
+from extensions import registry
+from maltego_trx.entities import Domain
+from maltego_trx.maltego import MaltegoMsg, MaltegoTransform
+from .BaseTombaTransform import BaseTombaTransform
+from .store import get_store
+
+logger = logging.getLogger(__name__)
+
+
+@registry.register_transform(
+    display_name='Tomba - Domains Using Technology',
+    input_entity='maltego.BuiltWithTechnology',
+    description='List profiled domains that use a technology (offline, from the local result store)',
+    output_entities=['maltego.Domain'],
+    disclaimer="Tomba.io - Technology API",
+)
+class TechnologyDomains(BaseTombaTransform):
+    """Transform answering "which known domains use X" from the local index"""
+
+    @classmethod
+    def create_entities(cls, request: MaltegoMsg, response: MaltegoTransform):
+        transform = cls()
+
+        store = get_store()
+        if store is None:
+            response.addUIMessage(
+                "🗄️ The local result store is disabled.\n\n"
+                "In Transform settings.py, set:\n"
+                "• TOMBA_STORE_PATH = \"tomba_results.db\"\n\n"
+                "Then run the Technology transform on the domains you want indexed.",
+                messageType="FatalError"
+            )
+            return
+
+        # Prefer the slug carried over from the Technology transform
+        technology = (request.getProperty("tomba.technology_slug")
+                      or request.Value).strip()
+        try:
+            limit = int(request.getProperty("tomba.limit") or "500")
+        except ValueError:
+            limit = 0
+        if limit < 1:
+            response.addUIMessage(
+                "⚠️ Invalid setting: tomba.limit must be a whole number of at least 1",
+                messageType="FatalError"
+            )
+            return
+
+        logger.debug("Looking up indexed domains using: %s", technology)
+
+        rows = store.domains_using(technology, limit=limit)
+
+        if not rows:
+            response.addUIMessage(
+                f"📭 No profiled domains use {technology} yet")
+            return
+
+        for row in rows:
+            domain_entity = response.addEntity(Domain, row["domain"])
+            domain_entity.addProperty(
+                "tomba.technology_name", displayName="Technology Name", value=row["name"] or "")
+            domain_entity.addProperty(
+                "tomba.technology_slug", displayName="Technology Slug", value=row["slug"])
+            if row["category_name"]:
+                domain_entity.addProperty(
+                    "tomba.category_name", displayName="Category Name", value=row["category_name"])
+
+        transform.add_summary_message(
+            response,
+            f"Found {len(rows)} profiled domains using {technology}")
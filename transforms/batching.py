@@ -0,0 +1,86 @@
+"""
+Micro-batching of concurrent per-entity Tomba.io calls
+"""
+
+import contextvars
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+
+class _Batch:
+    """Calls collected for one dispatch"""
+
+    def __init__(self):
+        # Key -> context of the request that first asked for it
+        self.keys: Dict[str, contextvars.Context] = {}
+        self.results: Dict[str, Dict[str, Any]] = {}
+        self.full = threading.Event()
+        self.done = threading.Event()
+
+
+class MicroBatcher:
+    """Collect same-endpoint calls that arrive within a short window
+
+    The first caller of a batch becomes its leader: it waits up to
+    ``window`` seconds (or until ``max_size`` distinct keys are queued),
+    dispatches every key at once and hands each waiting caller its own
+    result. Identical keys inside a batch share a single upstream call.
+
+    Each key carries a copy of the context of the first request that
+    submitted it, so ``dispatch`` can make the call on behalf of that
+    request (its analyst's credits and fair share, its profile and logs)
+    rather than the leader's.
+    """
+
+    def __init__(self, dispatch: Callable[[Dict[str, contextvars.Context]], Dict[str, Dict[str, Any]]],
+                 window: float, max_size: int):
+        self.dispatch = dispatch
+        self.window = window
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._pending = None
+
+    def submit(self, key: str) -> Dict[str, Any]:
+        """Queue a call and block until its batch has been dispatched"""
+        with self._lock:
+            batch = self._pending
+            leader = batch is None
+            if leader:
+                batch = self._pending = _Batch()
+            if key not in batch.keys:
+                batch.keys[key] = contextvars.copy_context()
+            if len(batch.keys) >= self.max_size:
+                # Close the batch so later callers start a new one
+                self._pending = None
+                batch.full.set()
+
+        if leader:
+            self._run(batch)
+        else:
+            batch.done.wait()
+
+        return batch.results.get(key) or {"error": "Batched request was not dispatched"}
+
+    def _run(self, batch: _Batch):
+        """Wait out the batching window, then dispatch the batch"""
+        batch.full.wait(self.window)
+        with self._lock:
+            if self._pending is batch:
+                self._pending = None
+
+        started = time.monotonic()
+        try:
+            batch.results = self.dispatch(dict(batch.keys))
+        except Exception as e:
+            logger.error("Batch dispatch failed: %s", e)
+            batch.results = {key: {"error": str(e)} for key in batch.keys}
+        finally:
+            batch.done.set()
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Dispatched batch of %d in %.3fs",
+                         len(batch.keys), time.monotonic() - started)
@@ -0,0 +1,176 @@
+"""
+Credit budget guard driven by the Tomba.io account usage
+
+Account usage (``requests.<category>.used`` / ``available``) is polled in
+the background and cached. Between polls every credit-consuming call
+debits an estimate locally. Once a category's remaining share drops below
+the configured thresholds, calls are first degraded (smaller domain
+searches) and then refused, so one bulk run cannot drain the monthly quota.
+"""
+
+import functools
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import settings
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+BUDGET_POLL_SECONDS = getattr(settings, "TOMBA_BUDGET_POLL_SECONDS", 300)
+BUDGET_DEGRADE_BELOW = getattr(settings, "TOMBA_BUDGET_DEGRADE_BELOW", 0.2)
+BUDGET_REFUSE_BELOW = getattr(settings, "TOMBA_BUDGET_REFUSE_BELOW", 0.05)
+BUDGET_DEGRADED_LIMIT = getattr(settings, "TOMBA_BUDGET_DEGRADED_LIMIT", 10)
+
+# Usage category each endpoint is billed to, and its estimated cost
+ENDPOINT_CATEGORIES = {
+    "domain_search": "domains",
+    "email_finder": "finders",
+    "author_finder": "finders",
+    "linkedin_finder": "finders",
+    "email_enrichment": "finders",
+    "email_verifier": "verifications",
+    "phone_finder": "phones",
+    "phone_validator": "phones",
+}
+ENDPOINT_COSTS = {**{endpoint: 1 for endpoint in ENDPOINT_CATEGORIES},
+                  **getattr(settings, "TOMBA_BUDGET_COSTS", {})}
+
+OK, DEGRADE, REFUSE = "ok", "degrade", "refuse"
+
+metrics.describe("tomba_budget_remaining", "gauge",
+                 "Estimated credits remaining per usage category")
+metrics.describe("tomba_budget_guarded_total", "counter",
+                 "Calls degraded or refused by the credit budget")
+
+
+class CreditBudget:
+    """Cached account usage with local debits between polls"""
+
+    def __init__(self, fetch_account, poll_seconds: float = BUDGET_POLL_SECONDS):
+        self.fetch_account = fetch_account
+        self.poll_seconds = poll_seconds
+        self.account: Optional[Dict[str, Any]] = None
+        self.fetched_at = 0.0
+        self.available: Dict[str, int] = {}
+        self.remaining: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._poller: Optional[threading.Thread] = None
+
+    def start(self):
+        """Start the background poller once"""
+        with self._lock:
+            if self._poller is not None or self.poll_seconds <= 0:
+                return
+            self._poller = threading.Thread(
+                target=self._poll, name="tomba-budget", daemon=True)
+            self._poller.start()
+
+    def _poll(self):
+        while True:
+            self.refresh()
+            time.sleep(self.poll_seconds)
+
+    def refresh(self) -> Optional[Dict[str, Any]]:
+        """Fetch account usage now; local debits are replaced by it"""
+        try:
+            result = self.fetch_account()
+        except Exception as e:
+            logger.warning("Could not refresh account usage: %s", e)
+            return None
+        data = result.get("data") if isinstance(result, dict) else None
+        if not isinstance(data, dict):
+            logger.warning("Could not refresh account usage: %s", result)
+            return None
+        # Usage may sit inside the API's own data envelope
+        body = data["data"] if isinstance(data.get("data"), dict) else data
+
+        with self._lock:
+            self.account = data
+            self.fetched_at = time.time()
+            self.available.clear()
+            self.remaining.clear()
+            for category, usage in (body.get("requests") or {}).items():
+                if not isinstance(usage, dict) or not usage.get("available"):
+                    continue
+                available = int(usage["available"])
+                self.available[category] = available
+                self.remaining[category] = available - int(usage.get("used") or 0)
+                metrics.set_gauge("tomba_budget_remaining",
+                                  self.remaining[category], category=category)
+        return data
+
+    def cached_account(self) -> Optional[Dict[str, Any]]:
+        """Account data if polled within the poll interval"""
+        with self._lock:
+            if self.account is not None and time.time() - self.fetched_at < self.poll_seconds:
+                return self.account
+        return None
+
+    def snapshot(self) -> Dict[str, float]:
+        """Estimated credits remaining per category, copied under the lock"""
+        with self._lock:
+            return dict(self.remaining)
+
+    def check(self, endpoint: str) -> str:
+        """Decide whether a call may run: ok, degrade or refuse"""
+        category = ENDPOINT_CATEGORIES.get(endpoint)
+        with self._lock:
+            available = self.available.get(category)
+            if not available:
+                return OK
+            share = (self.remaining[category] - ENDPOINT_COSTS[endpoint]) / available
+        if share < BUDGET_REFUSE_BELOW:
+            return REFUSE
+        if share < BUDGET_DEGRADE_BELOW:
+            return DEGRADE
+        return OK
+
+    def debit(self, endpoint: str):
+        """Subtract a call's estimated cost until the next poll"""
+        category = ENDPOINT_CATEGORIES.get(endpoint)
+        with self._lock:
+            if category in self.remaining:
+                self.remaining[category] -= ENDPOINT_COSTS[endpoint]
+                metrics.set_gauge("tomba_budget_remaining",
+                                  self.remaining[category], category=category)
+
+
+def guarded(endpoint: str):
+    """Guard a ``TombaSDKWrapper`` endpoint method with the credit budget
+
+    Apply below ``@stored`` so results served from the store stay free.
+    """
+
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            budget = self.budget
+            budget.start()
+
+            decision = budget.check(endpoint)
+            if decision == REFUSE:
+                metrics.inc("tomba_budget_guarded_total", endpoint=endpoint, decision=decision)
+                category = ENDPOINT_CATEGORIES[endpoint]
+                return {"error": f"Credit budget guard: {category} credits are almost "
+                                 f"used up ({int(budget.remaining[category])} left). "
+                                 "Call refused to protect the remaining quota."}
+            degraded = decision == DEGRADE and kwargs.get("limit", 0) > BUDGET_DEGRADED_LIMIT
+            if degraded:
+                metrics.inc("tomba_budget_guarded_total", endpoint=endpoint, decision=decision)
+                logger.warning("Credit budget low: %s limit %s -> %d",
+                               endpoint, kwargs['limit'], BUDGET_DEGRADED_LIMIT)
+                kwargs["limit"] = BUDGET_DEGRADED_LIMIT
+
+            result = method(self, *args, **kwargs)
+            if "error" not in result:
+                budget.debit(endpoint)
+                if degraded:
+                    result = {**result, "degraded": BUDGET_DEGRADED_LIMIT}
+            return result
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,118 @@
+"""
+Analyst identity, fair-share weights and per-analyst credit caps
+
+The analyst behind a request comes from the 'Tomba Analyst' transform
+setting or, for clients that cannot set it, from a request header. It is
+kept in a context variable, so fan-out threads and background jobs
+started by the request are attributed to the same analyst.
+"""
+
+import contextvars
+import re
+import threading
+import time
+from typing import Dict
+
+import settings
+from extensions import analyst_setting
+from . import metrics
+
+ANONYMOUS = "anonymous"
+
+ANALYST_HEADER = getattr(settings, "TOMBA_ANALYST_HEADER", "X-Tomba-Analyst")
+ANALYST_WEIGHTS: Dict[str, float] = getattr(settings, "TOMBA_ANALYST_WEIGHTS", {})
+ANALYST_MAX_INFLIGHT = getattr(settings, "TOMBA_ANALYST_MAX_INFLIGHT", 0)
+ANALYST_CREDIT_CAP = getattr(settings, "TOMBA_ANALYST_CREDIT_CAP", 0)
+ANALYST_CREDIT_CAPS: Dict[str, int] = getattr(settings, "TOMBA_ANALYST_CREDIT_CAPS", {})
+
+metrics.describe("tomba_analyst_requests_total", "counter", "Transform requests per analyst")
+metrics.describe("tomba_analyst_credits_total", "counter", "Upstream calls charged per analyst")
+metrics.describe("tomba_analyst_refunded_total", "counter",
+                 "Charged credits given back for rejected, cancelled or failed calls")
+metrics.describe("tomba_analyst_refused_total", "counter",
+                 "Upstream calls refused by an analyst's credit cap")
+
+_current = contextvars.ContextVar("tomba_analyst", default=ANONYMOUS)
+
+_usage: Dict[str, int] = {}
+_usage_day = None
+_usage_lock = threading.Lock()
+
+
+class QuotaExceeded(Exception):
+    """Raised when an analyst has used up their daily credits"""
+
+
+def normalize(name: str) -> str:
+    """Reduce an analyst name to a safe lower-case label"""
+    name = re.sub(r"\s+", "-", (name or "").strip().lower())
+    name = re.sub(r"[^a-z0-9._@-]", "", name)[:64]
+    return name or ANONYMOUS
+
+
+def identify(request) -> str:
+    """Return the analyst named by a Maltego request"""
+    name = (request.getTransformSetting(analyst_setting.id)
+            or request.getTransformSetting(analyst_setting.name))
+    if not name:
+        try:
+            from flask import has_request_context, request as http_request
+            if has_request_context():
+                name = http_request.headers.get(ANALYST_HEADER)
+        except ImportError:
+            pass
+    return normalize(name)
+
+
+def current() -> str:
+    """Analyst the running code works for"""
+    return _current.get()
+
+
+def set_current(analyst: str) -> contextvars.Token:
+    metrics.inc("tomba_analyst_requests_total", analyst=analyst)
+    return _current.set(analyst)
+
+
+def reset_current(token: contextvars.Token):
+    _current.reset(token)
+
+
+def weight(analyst: str) -> float:
+    """Fair-share weight; an analyst with weight 2 gets twice the slots"""
+    return float(ANALYST_WEIGHTS.get(analyst, 1))
+
+
+def credit_cap(analyst: str) -> int:
+    return ANALYST_CREDIT_CAPS.get(analyst, ANALYST_CREDIT_CAP)
+
+
+def charge(analyst: str, credits: int = 1):
+    """Count upstream credits against the analyst's daily cap (per worker)"""
+    global _usage_day
+    today = time.strftime("%Y-%m-%d")
+    cap = credit_cap(analyst)
+    with _usage_lock:
+        if today != _usage_day:
+            _usage.clear()
+            _usage_day = today
+        used = _usage.get(analyst, 0)
+        if cap and used + credits > cap:
+            metrics.inc("tomba_analyst_refused_total", analyst=analyst)
+            raise QuotaExceeded(f"analyst '{analyst}' used {used} of {cap} daily credits")
+        _usage[analyst] = used + credits
+    metrics.inc("tomba_analyst_credits_total", credits, analyst=analyst)
+
+
+def refund(analyst: str, credits: int = 1):
+    """Give back credits charged for a call that was not made or failed"""
+    with _usage_lock:
+        if analyst in _usage:
+            _usage[analyst] = max(0, _usage[analyst] - credits)
+    metrics.inc("tomba_analyst_refunded_total", credits, analyst=analyst)
+
+
+def usage() -> Dict[str, int]:
+    """Credits charged today per analyst in this worker"""
+    with _usage_lock:
+        return dict(_usage)
@@ -0,0 +1,94 @@
+"""
+Cancellation of upstream work for abandoned requests
+
+A ``CancelToken`` is attached to each transform request (see
+disconnects.py) and travels with it through context variables, into
+fan-out threads as well. Once it is cancelled, calls that have not been
+sent yet fail fast with ``Cancelled`` without spending credits, calls
+waiting for a limiter slot give up, and in-flight HTTP requests have
+their sockets shut down. Results that already arrived are kept and
+stored as usual.
+"""
+
+import contextvars
+import logging
+import threading
+from typing import Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class Cancelled(Exception):
+    """Raised when work is skipped because its request was cancelled"""
+
+
+class CancelToken:
+    """Cancellation flag with callbacks, checked before upstream work"""
+
+    def __init__(self, probe: Optional[Callable[[], bool]] = None):
+        # Returns True once the client is gone (polled by the watcher)
+        self.probe = probe
+        self.reason: Optional[str] = None
+        self._event = threading.Event()
+        self._callbacks: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self, reason: str = "cancelled"):
+        """Cancel once and run the registered callbacks"""
+        with self._lock:
+            if self._event.is_set():
+                return
+            self.reason = reason
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.debug("Cancel callback failed: %s", e)
+
+    def on_cancel(self, callback: Callable[[], None]) -> Callable[[], None]:
+        """Run ``callback`` on cancellation; returns a function that unregisters it"""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return lambda: self._discard(callback)
+        callback()
+        return lambda: None
+
+    def _discard(self, callback: Callable[[], None]):
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    def check(self):
+        """Raise Cancelled if the token was cancelled"""
+        if self._event.is_set():
+            raise Cancelled(self.reason)
+
+
+_current = contextvars.ContextVar("tomba_cancel_token", default=None)
+
+
+def current() -> Optional[CancelToken]:
+    """Token of the request being served, if any"""
+    return _current.get()
+
+
+def set_current(token: Optional[CancelToken]) -> contextvars.Token:
+    return _current.set(token)
+
+
+def reset_current(token: contextvars.Token):
+    _current.reset(token)
+
+
+def check():
+    """Raise Cancelled if the current request was cancelled"""
+    token = _current.get()
+    if token is not None:
+        token.check()
@@ -0,0 +1,215 @@
+"""
+Record/replay cassettes for Tomba SDK traffic
+
+In ``record`` mode every SDK call made through ``TombaSDKWrapper`` is
+appended to ``<TOMBA_CASSETTE_DIR>/<service>_<method>.jsonl`` with its
+result (or error) and latency. In ``replay`` mode the same calls are
+answered from those files without touching the network, optionally with
+a fixed or the recorded latency, so transforms can be regression- and
+performance-tested without credentials or credits.
+
+Recordings are scrubbed: lookup keys are hashed, personal fields are
+replaced with stable pseudonyms, and the API credentials never appear.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+import settings
+from settings import TOMBA_API_KEY, TOMBA_SECRET_KEY
+from tomba.exception import TombaException
+
+logger = logging.getLogger(__name__)
+
+RECORD, REPLAY = "record", "replay"
+
+CASSETTE_MODE = getattr(settings, "TOMBA_CASSETTE_MODE", None)
+CASSETTE_DIR = getattr(settings, "TOMBA_CASSETTE_DIR", "cassettes")
+CASSETTE_LATENCY_MS = getattr(settings, "TOMBA_CASSETTE_LATENCY_MS", 0)
+CASSETTE_SCRUB = getattr(settings, "TOMBA_CASSETTE_SCRUB", True)
+
+# Fields holding personal data and how their pseudonyms look
+PERSONAL_FIELDS = {
+    "email": "email",
+    "first_name": "name",
+    "last_name": "name",
+    "full_name": "name",
+    "phone_number": "phone",
+    "local_format": "phone",
+    "intl_format": "phone",
+    "e164_format": "phone",
+    "rfc3966_format": "phone",
+    "twitter": "handle",
+    "linkedin": "url",
+}
+
+
+class CassetteMiss(Exception):
+    """Raised in replay mode for a call that was never recorded"""
+
+
+def _digest(text: str, length: int = 16) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:length]
+
+
+# Values that are already pseudonyms (replayed data fed back into calls)
+_PSEUDONYM = re.compile(
+    r"^person-[0-9a-f]{8}@|^Person-[0-9a-f]{6}$|/in/person-[0-9a-f]{8}$|^person_[0-9a-f]{8}$")
+
+
+def _pseudonym(kind: str, value: str) -> str:
+    """Stable stand-in for a personal value (same input, same pseudonym)"""
+    if _PSEUDONYM.search(value):
+        return value
+    token = _digest(value.lower(), 8)
+    if kind == "email" and "@" in value:
+        return f"person-{token}@{value.rsplit('@', 1)[1].lower()}"
+    if kind == "phone":
+        digits = iter(str(int(token, 16)).rjust(15, "0"))
+        return re.sub(r"\d", lambda _: next(digits, "0"), value)
+    if kind == "url":
+        return f"https://www.linkedin.com/in/person-{token}"
+    if kind == "handle":
+        return f"person_{token}"
+    return f"Person-{token[:6]}"
+
+
+def scrub(value: Any, field: str = None) -> Any:
+    """Return ``value`` with personal data and credentials replaced"""
+    if isinstance(value, dict):
+        return {key: scrub(item, key) for key, item in value.items()}
+    if isinstance(value, list):
+        return [scrub(item, field) for item in value]
+    if isinstance(value, str):
+        for secret in (TOMBA_API_KEY, TOMBA_SECRET_KEY):
+            if secret and secret in value:
+                value = value.replace(secret, "REDACTED")
+        if field in PERSONAL_FIELDS and value:
+            return _pseudonym(PERSONAL_FIELDS[field], value)
+    return value
+
+
+def call_key(args: tuple, kwargs: Dict[str, Any]) -> str:
+    """Hashed identity of a call's scrubbed arguments
+
+    Scrubbing first means a replayed pseudonym (an email returned by a
+    recorded domain search, say) finds the recording made for the real
+    value it stands for.
+    """
+    canonical = json.dumps([scrub(list(args)), sorted(scrub(kwargs).items())], default=str)
+    return _digest(canonical.lower())
+
+
+class Cassette:
+    """Per-endpoint JSON-lines recordings of SDK calls"""
+
+    def __init__(self, mode: str, directory: str, latency_ms=0, scrub_data: bool = True):
+        self.mode = mode
+        self.directory = directory
+        self.latency_ms = latency_ms
+        self.scrub_data = scrub_data
+        self._tapes: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._tape_bytes: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def call(self, service_call: Callable, *args, **kwargs) -> Any:
+        # e.g. Phone.finder -> phone_finder
+        endpoint = service_call.__qualname__.replace(".", "_").lower()
+        key = call_key(args, kwargs)
+        if self.mode == REPLAY:
+            return self._replay(endpoint, key)
+        return self._record(endpoint, key, service_call, args, kwargs)
+
+    def _path(self, endpoint: str) -> str:
+        return os.path.join(self.directory, f"{endpoint}.jsonl")
+
+    def _record(self, endpoint: str, key: str, service_call: Callable, args, kwargs) -> Any:
+        entry: Dict[str, Any] = {"key": key}
+        start = time.monotonic()
+        try:
+            result = service_call(*args, **kwargs)
+            entry["result"] = result
+            return result
+        except TombaException as e:
+            entry["error"] = [e.message, e.code]
+            raise
+        finally:
+            entry["latency"] = round(time.monotonic() - start, 4)
+            if self.scrub_data:
+                entry = scrub(entry)
+            line = json.dumps(entry, separators=(",", ":"), default=str)
+            with self._lock:
+                os.makedirs(self.directory, exist_ok=True)
+                with open(self._path(endpoint), "a", encoding="utf-8") as tape:
+                    tape.write(line + "\n")
+
+    def _load(self, endpoint: str) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            tape = self._tapes.get(endpoint)
+            if tape is None:
+                tape = {}
+                size = 0
+                path = self._path(endpoint)
+                if os.path.exists(path):
+                    with open(path, encoding="utf-8") as lines:
+                        for line in lines:
+                            entry = json.loads(line)
+                            # Later recordings of the same call win
+                            tape[entry["key"]] = entry
+                            size += len(line)
+                self._tapes[endpoint] = tape
+                self._tape_bytes[endpoint] = size
+            return tape
+
+    def tape_stats(self) -> Dict[str, int]:
+        """Recordings loaded for replay and the bytes of JSON they came from"""
+        with self._lock:
+            return {"entries": sum(len(tape) for tape in self._tapes.values()),
+                    "bytes": sum(self._tape_bytes.values())}
+
+    def _replay(self, endpoint: str, key: str) -> Any:
+        entry = self._load(endpoint).get(key)
+        if entry is None:
+            raise CassetteMiss(f"No recording of this {endpoint} call in {self.directory}")
+
+        delay = entry.get("latency", 0) if self.latency_ms == "recorded" else self.latency_ms / 1000
+        if delay:
+            time.sleep(delay)
+
+        if "error" in entry:
+            message, code = entry["error"]
+            raise TombaException(message, code)
+        return entry["result"]
+
+
+_cassette: Optional[Cassette] = None
+
+
+def configure(mode: Optional[str] = CASSETTE_MODE, directory: str = CASSETTE_DIR,
+              latency_ms=CASSETTE_LATENCY_MS, scrub_data: bool = CASSETTE_SCRUB):
+    """Switch record/replay on (``record`` or ``replay``) or off (None)"""
+    global _cassette
+    _cassette = Cassette(mode, directory, latency_ms, scrub_data) if mode else None
+    if mode:
+        logger.info("Tomba cassette %s mode using %s", mode, directory)
+
+
+def tape_stats() -> Optional[Dict[str, int]]:
+    """Loaded recordings of the active cassette, or None when it is off"""
+    return _cassette.tape_stats() if _cassette is not None else None
+
+
+def call(service_call: Callable, *args, **kwargs) -> Any:
+    """Run an SDK call, recording or replaying it when a cassette is active"""
+    if _cassette is None:
+        return service_call(*args, **kwargs)
+    return _cassette.call(service_call, *args, **kwargs)
+
+
+configure()
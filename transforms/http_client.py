@@ -0,0 +1,289 @@
+"""
+Pooled HTTP client for the official Tomba.io Python SDK
+
+``PooledClient`` keeps a pool of HTTP/1.1 keep-alive connections (requests);
+``Http2Client`` multiplexes calls over one HTTP/2 connection (httpx,
+optional). ``TOMBA_HTTP_TRANSPORT`` picks one in ``create_client``.
+"""
+
+import io
+import logging
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from tomba.client import Client
+from tomba.exception import TombaException
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+import settings
+from . import cancellation, metrics
+
+try:
+    import httpx
+except ImportError:  # Only needed for TOMBA_HTTP_TRANSPORT = "http2"
+    httpx = None
+
+logger = logging.getLogger(__name__)
+
+HTTP1, HTTP2 = "http1", "http2"
+
+HTTP_TRANSPORT = getattr(settings, "TOMBA_HTTP_TRANSPORT", HTTP1)
+HTTP2_MAX_STREAMS = getattr(settings, "TOMBA_HTTP2_MAX_STREAMS", 100)
+
+metrics.describe("tomba_upstream_wire_bytes_total", "counter",
+                 "Tomba.io response bytes received, by content encoding")
+metrics.describe("tomba_upstream_body_bytes_total", "counter",
+                 "Tomba.io response bytes after decoding")
+metrics.describe("tomba_upstream_responses_total", "counter",
+                 "Tomba.io responses, by HTTP protocol version")
+
+
+class _CancellableMixin:
+    """Connection whose wait for a response ends when the request is cancelled"""
+
+    def getresponse(self, *args, **kwargs):
+        token = cancellation.current()
+        if token is None:
+            return super().getresponse(*args, **kwargs)
+        unregister = token.on_cancel(self._abort)
+        try:
+            return super().getresponse(*args, **kwargs)
+        finally:
+            unregister()
+
+    def _abort(self):
+        # Unblocks the reading thread; urllib3 then discards the connection
+        sock = self.sock
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+
+class _CancellableHTTPConnection(_CancellableMixin, HTTPConnection):
+    pass
+
+
+class _CancellableHTTPSConnection(_CancellableMixin, HTTPSConnection):
+    pass
+
+
+class _CancellableHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _CancellableHTTPConnection
+
+
+class _CancellableHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _CancellableHTTPSConnection
+
+
+class CancellableAdapter(HTTPAdapter):
+    """HTTPAdapter whose in-flight requests abort on request cancellation"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _CancellableHTTPConnectionPool,
+            "https": _CancellableHTTPSConnectionPool,
+        }
+
+
+class PooledClient(Client):
+    """Tomba SDK client that reuses keep-alive connections.
+
+    The stock SDK client sends every call through ``requests.request``,
+    which opens a fresh session (and TLS handshake) per call. This client
+    keeps one ``requests.Session`` with a bounded connection pool so that
+    concurrent transforms sharing credentials share warm connections.
+    """
+
+    def __init__(self, pool_maxsize: int = 10):
+        super().__init__()
+        self.session = requests.Session()
+        adapter = CancellableAdapter(pool_connections=1, pool_maxsize=pool_maxsize)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        # Ask api.tomba.io for compressed JSON; requests decodes it
+        self.session.headers["Accept-Encoding"] = "gzip, deflate"
+
+    def call(self, method, path="", headers=None, params=None):
+        """Make an HTTP request to the Tomba API over the pooled session"""
+        if headers is None:
+            headers = {}
+
+        if params is None:
+            params = {}
+
+        data = {}
+        json = {}
+        files = {}
+
+        headers = {**self._global_headers, **headers}
+
+        if method != "get":
+            data = params
+            params = {}
+
+        if headers["content-type"].startswith("application/json"):
+            json = data
+            data = {}
+
+        if headers["content-type"].startswith("multipart/form-data"):
+            del headers["content-type"]
+
+            for key in data.copy():
+                if isinstance(data[key], io.BufferedIOBase):
+                    files[key] = data[key]
+                    del data[key]
+
+        response = None
+        try:
+            response = self._send(
+                method=method,
+                url=self._endpoint + path,
+                params=self.flatten(params),
+                data=self.flatten(data),
+                json=json,
+                files=files,
+                headers=headers,
+            )
+
+            response.raise_for_status()
+
+            result = self._parse_response(response)
+            self._count_bytes(response)
+            return result
+        except TombaException:
+            raise
+        except Exception as e:
+            if response is not None:
+                content_type = response.headers.get("Content-Type", "")
+                if content_type.startswith("application/json"):
+                    body = response.json()
+                    raise TombaException(
+                        body["errors"]["message"],
+                        response.status_code,
+                        body,
+                    ) from e
+                raise TombaException(response.text, response.status_code) from e
+            raise TombaException(e) from e
+
+    def _send(self, **request):
+        """Send one request over the session"""
+        return self.session.request(timeout=self._timeout, **request)
+
+    def _parse_response(self, response) -> dict:
+        """Convert an HTTP response into the SDK result shape"""
+
+        def _rl(name):
+            v = int(response.headers.get(name, 0))
+            return v or None
+
+        rate_limit = {
+            "second_limit": _rl("x-second-rate-limit"),
+            "minute_limit": _rl("x-minute-rate-limit"),
+            "daily_limit": _rl("x-daily-rate-limit"),
+            "minute_remaining": _rl("x-minute-request-left"),
+            "daily_remaining": _rl("x-daily-request-left"),
+            "minute_reset": _rl("x-minute-reset-seconds"),
+            "daily_reset": _rl("x-daily-reset-seconds"),
+            "retry_after": _rl("retry-after"),
+            "policy": response.headers.get("ratelimit-policy") or None,
+            "rate_limit": response.headers.get("ratelimit") or None,
+        }
+
+        content_type = response.headers.get("Content-Type", "")
+
+        if content_type.startswith("application/json"):
+            return {"data": response.json(), "rate_limit": rate_limit}
+
+        return {"data": response.content, "rate_limit": rate_limit}
+
+    @staticmethod
+    def _count_bytes(response):
+        """Record body size on the wire and after decoding"""
+        decoded = len(response.content)
+        # urllib3 counts the (possibly compressed) bytes read from the socket
+        wire = response.raw.tell() if hasattr(response.raw, "tell") else decoded
+        encoding = response.headers.get("Content-Encoding", "identity")
+        metrics.inc("tomba_upstream_wire_bytes_total", wire, encoding=encoding)
+        metrics.inc("tomba_upstream_body_bytes_total", decoded)
+        metrics.inc("tomba_upstream_responses_total", protocol="HTTP/1.1")
+
+    def preconnect(self, count: int, timeout: float = 5) -> int:
+        """Open up to ``count`` keep-alive connections before they are needed
+
+        Sends concurrent HEAD requests to the API root (no credits are
+        used) so the TLS handshakes happen now. Returns how many succeeded.
+        """
+        def touch():
+            self.session.head(self._endpoint, timeout=timeout).close()
+
+        with ThreadPoolExecutor(max_workers=count) as executor:
+            futures = [executor.submit(touch) for _ in range(count)]
+        failures = [f.exception() for f in futures if f.exception() is not None]
+        if failures:
+            logger.warning("Could not pre-connect to Tomba.io: %s", failures[0])
+        return count - len(failures)
+
+    def close(self):
+        """Release pooled connections"""
+        self.session.close()
+
+
+class Http2Client(PooledClient):
+    """Tomba SDK client that multiplexes calls over one HTTP/2 connection
+
+    Needs ``httpx[http2]``. Concurrent calls become streams on a single
+    connection per worker, at most ``max_streams`` at once; if the server
+    does not negotiate HTTP/2, httpx falls back to a pool of HTTP/1.1
+    connections. In-flight calls share the connection, so they are not
+    aborted on cancellation (calls not yet sent still are).
+    """
+
+    def __init__(self, pool_maxsize: int = 10, max_streams: int = HTTP2_MAX_STREAMS):
+        if httpx is None:
+            raise ImportError(
+                "TOMBA_HTTP_TRANSPORT = \"http2\" needs httpx with HTTP/2 support: "
+                "pip install 'httpx[http2]'")
+        Client.__init__(self)
+        self.session = httpx.Client(
+            http2=True,
+            limits=httpx.Limits(max_connections=pool_maxsize,
+                                max_keepalive_connections=pool_maxsize),
+            headers={"Accept-Encoding": "gzip, deflate"},
+        )
+        self._streams = threading.BoundedSemaphore(max_streams)
+
+    def _send(self, method, url, params, data, json, files, headers):
+        # httpx sends an empty JSON or form body when given an empty dict
+        with self._streams:
+            return self.session.request(
+                method, url,
+                params=params or None,
+                data=data or None,
+                json=json or None,
+                files=files or None,
+                headers=headers,
+                timeout=self._timeout,
+            )
+
+    @staticmethod
+    def _count_bytes(response):
+        """Record body size on the wire and after decoding"""
+        encoding = response.headers.get("Content-Encoding", "identity")
+        metrics.inc("tomba_upstream_wire_bytes_total", response.num_bytes_downloaded,
+                    encoding=encoding)
+        metrics.inc("tomba_upstream_body_bytes_total", len(response.content))
+        metrics.inc("tomba_upstream_responses_total", protocol=response.http_version)
+
+
+def create_client(pool_maxsize: int = 10, transport: str = HTTP_TRANSPORT) -> PooledClient:
+    """Return the Tomba SDK client for the configured transport"""
+    if transport == HTTP2:
+        return Http2Client(pool_maxsize=pool_maxsize)
+    return PooledClient(pool_maxsize=pool_maxsize)
@@ -0,0 +1,196 @@
+"""
+Background job mode for long-running transforms
+
+A job runs a transform's ``create_entities`` on an in-process worker pool
+and appends every entity and UI message to an on-disk JSON-lines journal.
+The journal lets any gunicorn worker on the host serve the results back
+incrementally through the Fetch Job Results transform.
+"""
+
+import contextvars
+import json
+import logging
+import os
+import socket
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from maltego_trx.maltego import MaltegoEntity
+
+import settings
+from . import cancellation
+
+logger = logging.getLogger(__name__)
+
+JOBS_DIR = getattr(settings, "TOMBA_JOBS_DIR", None) or os.path.join(
+    tempfile.gettempdir(), "tomba-jobs")
+JOB_WORKERS = getattr(settings, "TOMBA_JOB_WORKERS", 2)
+JOB_RETENTION = getattr(settings, "TOMBA_JOB_RETENTION", 86400)
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+class JournalResponse:
+    """MaltegoTransform stand-in that writes results to a job journal
+
+    An entity is written once the transform moves on to the next one (or
+    finishes), so properties added after ``addEntity`` are included.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._pending: Optional[MaltegoEntity] = None
+        self._lock = threading.Lock()
+
+    def addEntity(self, type=None, value=None) -> MaltegoEntity:
+        entity = MaltegoEntity(type, value)
+        with self._lock:
+            self._flush_pending()
+            self._pending = entity
+        return entity
+
+    def addUIMessage(self, message, messageType="Inform"):
+        self.write_line({"message": message, "messageType": messageType})
+
+    def addException(self, exceptionString):
+        self.write_line({"message": exceptionString, "messageType": "PartialError"})
+
+    def close(self, status: str, error: str = None):
+        """Write the last entity and the final job status"""
+        with self._lock:
+            self._flush_pending()
+        self.write_line({"status": status, "error": error, "finished_at": time.time()})
+
+    def _flush_pending(self):
+        if self._pending is None:
+            return
+        entity = self._pending
+        self._pending = None
+        self.write_line({
+            "type": entity.entityType,
+            "value": entity.value,
+            "properties": entity.additionalFields,
+        })
+
+    def write_line(self, line: Dict[str, Any]):
+        """Append one JSON line to the journal"""
+        with open(self.path, "a", encoding="utf-8") as journal:
+            journal.write(json.dumps(line) + "\n")
+
+
+def _journal_path(job_id: str) -> str:
+    return os.path.join(JOBS_DIR, f"{job_id}.jsonl")
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=JOB_WORKERS, thread_name_prefix="tomba-job")
+    return _executor
+
+
+def _expire_old_journals():
+    """Delete journals older than the retention period"""
+    cutoff = time.time() - JOB_RETENTION
+    for name in os.listdir(JOBS_DIR):
+        path = os.path.join(JOBS_DIR, name)
+        try:
+            if name.endswith(".jsonl") and os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        except OSError:
+            pass
+
+
+def submit_job(transform_cls, request) -> str:
+    """Queue a transform run and return its job id"""
+    os.makedirs(JOBS_DIR, exist_ok=True)
+    _expire_old_journals()
+
+    job_id = uuid.uuid4().hex[:12]
+    journal = JournalResponse(_journal_path(job_id))
+    journal.write_line({
+        "job": job_id,
+        "transform": transform_cls.__name__,
+        "value": request.Value,
+        "created_at": time.time(),
+        "host": socket.gethostname(),
+        "pid": os.getpid(),
+    })
+
+    def run():
+        # Jobs outlive the request that started them
+        cancellation.set_current(None)
+        try:
+            transform_cls.create_entities(request, journal)
+            journal.close("done")
+        except Exception as e:
+            logger.error("Job %s failed: %s", job_id, e, exc_info=True)
+            journal.close("failed", str(e))
+
+    _get_executor().submit(contextvars.copy_context().run, run)
+    logger.info("Queued %s job %s", transform_cls.__name__, job_id)
+    return job_id
+
+
+def _owner_gone(header: Dict[str, Any]) -> bool:
+    """True when the worker process that ran a job no longer exists"""
+    pid = header.get("pid")
+    if not pid or header.get("host") != socket.gethostname():
+        # Journals from other hosts (shared TOMBA_JOBS_DIR) cannot be checked
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return True
+    except PermissionError:
+        pass
+    return False
+
+
+def read_job(job_id: str, cursor: int = 0) -> Optional[Tuple[Dict[str, Any], List[Dict[str, Any]], int]]:
+    """Read journal lines after ``cursor``
+
+    Returns ``(header, new_lines, next_cursor)`` or None for an unknown job.
+    The header gains a ``status`` key: running, done or failed. A job
+    still running when its worker process died is marked failed in its
+    journal, so it does not stay "running" until it expires.
+    """
+    if not job_id.isalnum():
+        return None
+    path = _journal_path(job_id)
+    if not os.path.exists(path):
+        return None
+
+    with open(path, encoding="utf-8") as journal:
+        lines = journal.readlines()
+
+    # A line without its newline is still being written
+    if lines and not lines[-1].endswith("\n"):
+        lines.pop()
+
+    parsed = [json.loads(line) for line in lines]
+    header = dict(parsed[0]) if parsed else {}
+    header["status"] = "running"
+    for line in reversed(parsed):
+        if "status" in line:
+            header["status"] = line["status"]
+            header["error"] = line.get("error")
+            break
+
+    if header["status"] == "running" and _owner_gone(header):
+        error = f"Worker {header['pid']} exited before the job finished"
+        logger.warning("Job %s failed: %s", job_id, error)
+        JournalResponse(path).write_line(
+            {"status": "failed", "error": error, "finished_at": time.time()})
+        header["status"], header["error"] = "failed", error
+
+    start = max(cursor, 1)
+    return header, parsed[start:], len(parsed)
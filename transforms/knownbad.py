@@ -0,0 +1,228 @@
+"""
+Persistent filter of inputs Tomba.io already reported as bad
+
+Invalid emails, domains without any email and URLs the author or LinkedIn
+finders found nothing for are recorded in a rotating Bloom filter, so
+transforms can answer them again without spending a call. The filter is a
+memory-mapped file shared by all workers on the host: a few megabytes for
+millions of inputs, with about ``TOMBA_KNOWN_BAD_ERROR_RATE`` false
+positives.
+
+Two generations of bits are kept. Inputs are added to the current one
+and looked up in both, and the older one is cleared when a new period of
+``TOMBA_KNOWN_BAD_ROTATE`` seconds starts, so an input is forgotten after
+one to two periods. A Bloom filter cannot remove single inputs; an analyst
+can ask for a fresh lookup with the ``tomba.recheck`` property.
+"""
+
+import hashlib
+import logging
+import math
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from typing import Optional
+
+import settings
+from . import metrics
+
+try:
+    import fcntl
+except ImportError:  # Windows development servers run a single process
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+KNOWN_BAD_PATH = getattr(settings, "TOMBA_KNOWN_BAD_PATH", None)
+KNOWN_BAD_CAPACITY = getattr(settings, "TOMBA_KNOWN_BAD_CAPACITY", 1000000)
+KNOWN_BAD_ERROR_RATE = getattr(settings, "TOMBA_KNOWN_BAD_ERROR_RATE", 0.001)
+KNOWN_BAD_ROTATE = getattr(settings, "TOMBA_KNOWN_BAD_ROTATE", 7 * 86400)
+
+# Kinds of recorded inputs
+EMAIL, DOMAIN, AUTHOR_URL, LINKEDIN_URL = "email", "domain", "author_url", "linkedin_url"
+
+# magic, bits per generation, hash count, generation of slot 0 and slot 1
+_HEADER = struct.Struct("<4sQIqq")
+_MAGIC = b"TKB1"
+
+metrics.describe("tomba_known_bad_hits_total", "counter",
+                 "Transform inputs answered from the known-bad filter, by kind")
+metrics.describe("tomba_known_bad_added_total", "counter",
+                 "Inputs recorded in the known-bad filter, by kind")
+
+
+def optimal_size(capacity: int, error_rate: float):
+    """Bits and hash count for ``capacity`` keys at ``error_rate``"""
+    bits = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+    bits = (bits + 7) // 8 * 8
+    hashes = max(1, round(bits / capacity * math.log(2)))
+    return bits, hashes
+
+
+class KnownBadFilter:
+    """Two-generation Bloom filter in a memory-mapped file"""
+
+    def __init__(self, path: str, capacity: int = KNOWN_BAD_CAPACITY,
+                 error_rate: float = KNOWN_BAD_ERROR_RATE, rotate: float = KNOWN_BAD_ROTATE):
+        self.path = path
+        self.rotate = rotate
+        self.bits, self.hashes = optimal_size(capacity, error_rate)
+        self._slot_bytes = self.bits // 8
+        self._lock = threading.Lock()
+        self._map = self._open()
+
+    def _open(self) -> mmap.mmap:
+        """Map the filter file, creating or replacing it if needed
+
+        A file in use is never resized or rewritten: other workers (or old
+        workers of a previous deploy) may have it mapped. A missing file,
+        or one laid out for other settings, is replaced by a fresh file
+        moved into place atomically; existing mappings keep the old one.
+        """
+        size = _HEADER.size + 2 * self._slot_bytes
+        for _ in range(3):
+            try:
+                f = open(self.path, "r+b")
+            except FileNotFoundError:
+                self._create(size, replace=False)
+                continue
+            if self._matches(f, size):
+                # Kept open to lock the mapped inode during rotation
+                self._file = f
+                return mmap.mmap(f.fileno(), size)
+            f.close()
+            self._create(size, replace=True)
+        raise OSError(f"Could not open known-bad filter {self.path}")
+
+    def _matches(self, f, size: int) -> bool:
+        """Whether the open file is laid out for these settings"""
+        header = f.read(_HEADER.size)
+        return len(header) == _HEADER.size and os.fstat(f.fileno()).st_size == size \
+            and _HEADER.unpack(header)[:3] == (_MAGIC, self.bits, self.hashes)
+
+    def _create(self, size: int, replace: bool):
+        """Write an empty filter next to ``path`` and move it into place"""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, temp = tempfile.mkstemp(prefix=".knownbad-", dir=directory)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(_HEADER.pack(_MAGIC, self.bits, self.hashes, -1, -1))
+                f.truncate(size)
+            if not replace:
+                try:
+                    # Fails if another worker created the file meanwhile
+                    os.link(temp, self.path)
+                except FileExistsError:
+                    pass
+                return
+            try:
+                with open(self.path, "rb") as f:
+                    if self._matches(f, size):
+                        # Another new worker replaced it first
+                        return
+            except FileNotFoundError:
+                pass
+            logger.info("Known-bad filter %s was built for other settings; "
+                        "starting a new one", self.path)
+            os.replace(temp, self.path)
+        finally:
+            if os.path.exists(temp):
+                os.unlink(temp)
+
+    def _generation(self) -> int:
+        return int(time.time() // self.rotate)
+
+    def _slot_generation(self, slot: int) -> int:
+        return struct.unpack_from("<q", self._map, _HEADER.size - 16 + 8 * slot)[0]
+
+    def _positions(self, kind: str, value: str):
+        digest = hashlib.blake2b(f"{kind}:{value}".encode("utf-8"), digest_size=16).digest()
+        h1, h2 = struct.unpack("<QQ", digest)
+        return [(h1 + i * h2) % self.bits for i in range(self.hashes)]
+
+    def _has(self, slot: int, positions) -> bool:
+        base = _HEADER.size + slot * self._slot_bytes
+        data = self._map
+        return all(data[base + p // 8] & (1 << (p % 8)) for p in positions)
+
+    def add(self, kind: str, value: str):
+        """Record ``value`` as a bad input of ``kind``"""
+        generation = self._generation()
+        slot = generation % 2
+        positions = self._positions(kind, value)
+        with self._lock:
+            if self._slot_generation(slot) != generation:
+                self._rotate(slot, generation)
+            base = _HEADER.size + slot * self._slot_bytes
+            for p in positions:
+                self._map[base + p // 8] |= 1 << (p % 8)
+        metrics.inc("tomba_known_bad_added_total", kind=kind)
+
+    def _rotate(self, slot: int, generation: int):
+        """Clear ``slot`` for a new period, once across every worker
+
+        The map is shared by all processes on the host, so the thread lock
+        is not enough: an flock on the file serialises rotation between
+        processes, and the slot is checked again once it is held.
+        """
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+        try:
+            if self._slot_generation(slot) == generation:
+                # Another worker rotated it while we waited
+                return
+            # This slot held the generation before last
+            base = _HEADER.size + slot * self._slot_bytes
+            self._map[base:base + self._slot_bytes] = bytes(self._slot_bytes)
+            struct.pack_into("<q", self._map, _HEADER.size - 16 + 8 * slot, generation)
+        finally:
+            if fcntl is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+
+    def contains(self, kind: str, value: str) -> bool:
+        """True when ``value`` was recorded in this or the previous period"""
+        generation = self._generation()
+        positions = self._positions(kind, value)
+        for slot in (0, 1):
+            if self._slot_generation(slot) in (generation, generation - 1) \
+                    and self._has(slot, positions):
+                return True
+        return False
+
+    def flush(self):
+        self._map.flush()
+
+
+_filter: Optional[KnownBadFilter] = None
+_filter_lock = threading.Lock()
+
+
+def get_filter() -> Optional[KnownBadFilter]:
+    """Return the process-wide filter, or None when no path is configured"""
+    global _filter
+    if not KNOWN_BAD_PATH:
+        return None
+    if _filter is None:
+        with _filter_lock:
+            if _filter is None:
+                _filter = KnownBadFilter(KNOWN_BAD_PATH)
+    return _filter
+
+
+def contains(kind: str, value: str) -> bool:
+    known_bad = get_filter()
+    if known_bad is None or not value:
+        return False
+    if known_bad.contains(kind, value):
+        metrics.inc("tomba_known_bad_hits_total", kind=kind)
+        return True
+    return False
+
+
+def add(kind: str, value: str):
+    known_bad = get_filter()
+    if known_bad is not None and value:
+        known_bad.add(kind, value)
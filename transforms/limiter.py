@@ -0,0 +1,229 @@
+"""
+Adaptive concurrency limit for upstream Tomba.io calls
+
+The limit follows AIMD: it grows by about one slot per round of calls that
+complete under the target latency, and shrinks by a constant factor (at
+most once per round trip) when calls are slow, rate limited or failing.
+Calls over the limit wait in a bounded queue and are served fairly across
+analysts.
+"""
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List
+
+import settings
+from . import callers, cancellation, metrics
+
+logger = logging.getLogger(__name__)
+
+LIMIT_INITIAL = getattr(settings, "TOMBA_LIMIT_INITIAL", 10)
+LIMIT_MIN = getattr(settings, "TOMBA_LIMIT_MIN", 1)
+LIMIT_MAX = getattr(settings, "TOMBA_LIMIT_MAX", 50)
+LIMIT_TARGET_LATENCY_MS = getattr(settings, "TOMBA_LIMIT_TARGET_LATENCY_MS", 3000)
+LIMIT_MAX_WAIT = getattr(settings, "TOMBA_LIMIT_MAX_WAIT", 15)
+LIMIT_QUEUE_SIZE = getattr(settings, "TOMBA_LIMIT_QUEUE_SIZE", 100)
+
+metrics.describe("tomba_upstream_limit", "gauge", "Allowed concurrent Tomba.io calls")
+metrics.describe("tomba_upstream_inflight", "gauge", "Tomba.io calls in flight")
+metrics.describe("tomba_upstream_queued", "gauge", "Calls waiting for an upstream slot")
+metrics.describe("tomba_upstream_rejected_total", "counter",
+                 "Calls rejected because the queue was full or the wait timed out")
+metrics.describe("tomba_upstream_calls_total", "counter", "Completed Tomba.io calls")
+metrics.describe("tomba_upstream_overload_total", "counter",
+                 "Calls that were slow, rate limited or failed upstream")
+metrics.describe("tomba_upstream_latency_seconds_total", "counter",
+                 "Summed latency of completed Tomba.io calls")
+metrics.describe("tomba_analyst_inflight", "gauge", "Tomba.io calls in flight per analyst")
+metrics.describe("tomba_analyst_rejected_total", "counter",
+                 "Calls per analyst rejected by the upstream queue")
+
+
+class LimiterRejected(Exception):
+    """Raised when a call cannot get an upstream slot in time"""
+
+
+class _Waiter:
+    __slots__ = ("analyst", "tag", "admitted")
+
+    def __init__(self, analyst: str, tag: float):
+        self.analyst = analyst
+        self.tag = tag
+        self.admitted = False
+
+
+class AdaptiveLimiter:
+    """AIMD limit on concurrent upstream calls with a bounded wait queue
+
+    Waiting calls are served by weighted fair queuing across analysts. Each
+    call gets a virtual finish tag that advances by ``1 / weight`` per call
+    of its analyst. Free slots go to the lowest tag, so an analyst with a
+    long bulk run gets their share, and an analyst making one call at a
+    time is not stuck behind them.
+    """
+
+    def __init__(self, initial: int = LIMIT_INITIAL, min_limit: int = LIMIT_MIN,
+                 max_limit: int = LIMIT_MAX, target_latency: float = LIMIT_TARGET_LATENCY_MS / 1000,
+                 max_wait: float = LIMIT_MAX_WAIT, max_queue: int = LIMIT_QUEUE_SIZE,
+                 backoff: float = 0.7):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.target_latency = target_latency
+        self.max_wait = max_wait
+        self.max_queue = max_queue
+        self.backoff = backoff
+
+        self.limit = float(max(min_limit, min(initial, max_limit)))
+        self.inflight = 0
+        self._waiters: List[_Waiter] = []
+        self._inflight_by: Dict[str, int] = {}
+        self._finish: Dict[str, float] = {}
+        self._virtual_time = 0.0
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+        self._export()
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def acquire(self, analyst: str = callers.ANONYMOUS):
+        """Take a slot for ``analyst``, waiting at most ``max_wait`` seconds"""
+        with self._cond:
+            if len(self._waiters) >= self.max_queue:
+                self._reject(analyst, "queue_full")
+                raise LimiterRejected("Tomba.io request queue is full")
+
+            tag = max(self._virtual_time, self._finish.get(analyst, 0.0)) + 1 / callers.weight(analyst)
+            self._finish[analyst] = tag
+            waiter = _Waiter(analyst, tag)
+            self._waiters.append(waiter)
+            self._dispatch()
+
+            token = cancellation.current()
+            unregister = token.on_cancel(self._wake) if token else None
+            deadline = time.monotonic() + self.max_wait
+            try:
+                while not waiter.admitted:
+                    if token is not None and token.cancelled:
+                        self._withdraw(waiter)
+                        token.check()
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._withdraw(waiter)
+                        self._reject(analyst, "timeout")
+                        raise LimiterRejected(
+                            f"No Tomba.io request slot within {self.max_wait:g}s")
+                    self._cond.wait(remaining)
+            finally:
+                if unregister:
+                    unregister()
+                self._export()
+
+    def _withdraw(self, waiter: _Waiter):
+        """Remove a waiter that was never admitted and undo its finish tag
+
+        Otherwise an analyst whose calls time out or are cancelled would be
+        scheduled as if those calls had been served.
+        """
+        self._waiters.remove(waiter)
+        step = 1 / callers.weight(waiter.analyst)
+        for other in self._waiters:
+            if other.analyst == waiter.analyst and other.tag > waiter.tag:
+                other.tag -= step
+        self._finish[waiter.analyst] -= step
+
+    def _wake(self):
+        """Let waiters re-check their cancellation tokens"""
+        with self._cond:
+            self._cond.notify_all()
+
+    def _dispatch(self):
+        """Admit waiters in tag order while slots are free"""
+        while self._waiters and self.inflight < int(self.limit):
+            eligible = [w for w in self._waiters if not self._capped(w.analyst)]
+            if not eligible:
+                break
+            waiter = min(eligible, key=lambda w: w.tag)
+            self._waiters.remove(waiter)
+            waiter.admitted = True
+            self._virtual_time = max(self._virtual_time, waiter.tag - 1 / callers.weight(waiter.analyst))
+            self.inflight += 1
+            self._inflight_by[waiter.analyst] = self._inflight_by.get(waiter.analyst, 0) + 1
+            metrics.set_gauge("tomba_analyst_inflight", self._inflight_by[waiter.analyst],
+                              analyst=waiter.analyst)
+        self._cond.notify_all()
+
+    def _capped(self, analyst: str) -> bool:
+        cap = callers.ANALYST_MAX_INFLIGHT
+        return bool(cap) and self._inflight_by.get(analyst, 0) >= cap
+
+    def _reject(self, analyst: str, reason: str):
+        metrics.inc("tomba_upstream_rejected_total", reason=reason)
+        metrics.inc("tomba_analyst_rejected_total", analyst=analyst, reason=reason)
+
+    def release(self, latency: float, overloaded: bool = False,
+                analyst: str = callers.ANONYMOUS):
+        """Return a slot and adjust the limit from the call's outcome"""
+        with self._cond:
+            busy = self.inflight >= int(self.limit) / 2
+            self.inflight -= 1
+            self._inflight_by[analyst] -= 1
+            metrics.set_gauge("tomba_analyst_inflight", self._inflight_by[analyst], analyst=analyst)
+
+            metrics.inc("tomba_upstream_calls_total")
+            metrics.inc("tomba_upstream_latency_seconds_total", latency)
+
+            if overloaded or latency > self.target_latency:
+                metrics.inc("tomba_upstream_overload_total")
+                now = time.monotonic()
+                # One decrease per round trip, however many calls report it
+                if now - self._last_decrease >= latency:
+                    self._last_decrease = now
+                    old = self.limit
+                    self.limit = max(self.min_limit, self.limit * self.backoff)
+                    logger.info("Upstream limit %.1f -> %.1f (latency %.2fs, overloaded: %s)",
+                                old, self.limit, latency, overloaded)
+            elif busy:
+                # Only grow while the current limit is actually in use
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+            self._dispatch()
+            self._export()
+
+    @contextmanager
+    def slot(self):
+        """Hold a slot for one call of the current analyst
+
+        Yields a one-item list; set its item to True when the call failed
+        in a way that signals upstream overload.
+        """
+        analyst = callers.current()
+        self.acquire(analyst)
+        outcome = [False]
+        start = time.monotonic()
+        try:
+            yield outcome
+        finally:
+            self.release(time.monotonic() - start, outcome[0], analyst)
+
+    def _export(self):
+        metrics.set_gauge("tomba_upstream_limit", int(self.limit))
+        metrics.set_gauge("tomba_upstream_inflight", self.inflight)
+        metrics.set_gauge("tomba_upstream_queued", self.queued)
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_limiter() -> AdaptiveLimiter:
+    """Return the process-wide upstream limiter"""
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                _limiter = AdaptiveLimiter()
+    return _limiter
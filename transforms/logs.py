@@ -0,0 +1,172 @@
+"""
+Non-blocking, sampled, structured logging
+
+Records are handed to a bounded queue and written by a background
+listener thread, so a slow disk or pipe never blocks a transform; when
+the queue is full records are dropped and counted instead. Records are
+formatted only by the listener (log calls use lazy ``%`` arguments), and
+as JSON lines by default.
+
+Every record logged while a transform runs carries the transform name,
+a hash of its canonical input and the analyst. Routine success events go
+through ``sampled`` and only a ``TOMBA_LOG_SAMPLE_RATE`` share of them is
+logged; the others cost one random number. Warnings and errors are
+always logged.
+"""
+
+import atexit
+import contextvars
+import hashlib
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+import settings
+from . import callers, metrics
+
+LOG_FORMAT = getattr(settings, "TOMBA_LOG_FORMAT", "json")
+LOG_LEVEL = getattr(settings, "TOMBA_LOG_LEVEL", "INFO")
+LOG_SAMPLE_RATE = getattr(settings, "TOMBA_LOG_SAMPLE_RATE", 0.1)
+LOG_QUEUE_SIZE = getattr(settings, "TOMBA_LOG_QUEUE_SIZE", 10000)
+
+# Structured fields copied from the record into the JSON line
+FIELDS = ("transform", "input_hash", "analyst", "endpoint", "latency_ms", "results", "error")
+
+metrics.describe("tomba_log_dropped_total", "counter",
+                 "Log records dropped because the log queue was full")
+
+# (transform, input hash) of the transform running in this context
+_request = contextvars.ContextVar("tomba_log_request", default=None)
+
+_listener: Optional[QueueListener] = None
+_sample_rate = LOG_SAMPLE_RATE
+
+
+def input_hash(value: str) -> str:
+    """Short stable hash of a canonical input value (no personal data in logs)"""
+    return hashlib.sha256(value.strip().lower().encode("utf-8")).hexdigest()[:12]
+
+
+def set_request(transform: str, value: str) -> contextvars.Token:
+    return _request.set((transform, input_hash(value or "")))
+
+
+def reset_request(token: contextvars.Token):
+    _request.reset(token)
+
+
+class ContextFilter(logging.Filter):
+    """Add the current transform, input hash and analyst to records
+
+    Runs in the thread that logs, before the record is queued, so the
+    context variables still hold the request's values.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        current = _request.get()
+        if current is not None and not hasattr(record, "transform"):
+            record.transform, record.input_hash = current
+            record.analyst = callers.current()
+        return True
+
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler that never blocks and defers formatting to the listener"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The listener formats the record; arguments are left unformatted
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            metrics.inc("tomba_log_dropped_total")
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for field in FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                line[field] = value
+        if record.exc_info:
+            line["exc"] = self.formatException(record.exc_info)
+        return json.dumps(line, default=str)
+
+
+def configure(log_format: str = LOG_FORMAT, level: str = LOG_LEVEL,
+              sample_rate: float = LOG_SAMPLE_RATE, queue_size: int = LOG_QUEUE_SIZE):
+    """Route the root logger through the background queue (idempotent)"""
+    global _listener, _sample_rate
+    if _listener is not None:
+        return
+    _sample_rate = sample_rate
+
+    output = logging.StreamHandler(sys.stderr)
+    if log_format == "json":
+        output.setFormatter(JsonFormatter())
+    else:
+        output.setFormatter(logging.Formatter(
+            "%(asctime)s %(levelname)s %(name)s: %(message)s"))
+
+    records: "queue.Queue" = queue.Queue(maxsize=queue_size)
+    handler = DroppingQueueHandler(records)
+    handler.addFilter(ContextFilter())
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level)
+
+    _listener = QueueListener(records, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_stop)
+    os.register_at_fork(after_in_child=_restart_after_fork)
+
+
+def _stop():
+    if _listener is not None:
+        _listener.stop()
+
+
+def _restart_after_fork():
+    """Give a forked worker (preloaded app) its own queue and listener thread"""
+    global _listener
+    if _listener is None:
+        return
+    records: "queue.Queue" = queue.Queue(maxsize=_listener.queue.maxsize)
+    for handler in logging.getLogger().handlers:
+        if isinstance(handler, DroppingQueueHandler):
+            handler.queue = records
+    _listener = QueueListener(records, *_listener.handlers, respect_handler_level=True)
+    _listener.start()
+
+
+def sampled(logger: logging.Logger, message: str, *args, **fields):
+    """Log a routine INFO event for a share of calls only
+
+    The sampling decision comes first, so skipped events never build a
+    record.
+    """
+    if random.random() < _sample_rate and logger.isEnabledFor(logging.INFO):
+        logger.info(message, *args, extra=fields)
+
+
+def elapsed_ms(start: float) -> float:
+    return round((time.monotonic() - start) * 1000, 1)
@@ -0,0 +1,66 @@
+"""
+In-process counters and gauges exported in Prometheus text format
+
+Each gunicorn worker keeps its own values; scrape every worker or sum them
+in the monitoring system.
+"""
+
+import os
+import threading
+from typing import Dict, Tuple
+
+_lock = threading.Lock()
+_counters: Dict[Tuple[str, tuple], float] = {}
+_gauges: Dict[Tuple[str, tuple], float] = {}
+_help: Dict[str, Tuple[str, str]] = {}
+
+
+def describe(name: str, kind: str, text: str):
+    """Register the HELP text and type (counter or gauge) of a metric"""
+    _help[name] = (kind, text)
+
+
+def inc(name: str, amount: float = 1, **labels):
+    """Add ``amount`` to a counter"""
+    key = (name, tuple(sorted(labels.items())))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+
+
+def set_gauge(name: str, value: float, **labels):
+    """Set a gauge to ``value``"""
+    key = (name, tuple(sorted(labels.items())))
+    with _lock:
+        _gauges[key] = value
+
+
+def snapshot() -> Dict[str, float]:
+    """Return all current values keyed by ``name{labels}``"""
+    with _lock:
+        values = list(_counters.items()) + list(_gauges.items())
+    return {_series(name, labels): value for (name, labels), value in values}
+
+
+def render() -> str:
+    """Render every metric in Prometheus text exposition format"""
+    with _lock:
+        values = sorted(list(_counters.items()) + list(_gauges.items()))
+
+    lines = []
+    seen = set()
+    pid = str(os.getpid())
+    for (name, labels), value in values:
+        if name not in seen and name in _help:
+            kind, text = _help[name]
+            lines.append(f"# HELP {name} {text}")
+            lines.append(f"# TYPE {name} {kind}")
+        seen.add(name)
+        lines.append(f"{_series(name, labels + (('worker', pid),))} {value:g}")
+    return "".join(line + "\n" for line in lines)
+
+
+def _series(name: str, labels: tuple) -> str:
+    if not labels:
+        return name
+    inner = ",".join(f'{key}="{value}"' for key, value in labels)
+    return f"{name}{{{inner}}}"
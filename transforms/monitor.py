@@ -0,0 +1,132 @@
+"""
+Snapshot-and-diff helpers for incremental domain monitoring
+"""
+
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+import settings
+from .store import ResultStore
+
+logger = logging.getLogger(__name__)
+
+# Pages of a domain search fetched per run; larger domains are only
+# partially compared (no "removed" changes for emails not fetched)
+MONITOR_MAX_PAGES = getattr(settings, "TOMBA_MONITOR_MAX_PAGES", 10)
+
+# Email fields compared between two snapshots
+WATCHED_FIELDS = ("score", "position", "department", "verification")
+
+
+def snapshot_emails(emails: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Reduce a domain search email list to the fields we watch"""
+    records = {}
+    for email_data in emails:
+        email = (email_data.get("email") or "").lower()
+        if not email:
+            continue
+        verification = email_data.get("verification") or {}
+        records[email] = {
+            "score": email_data.get("score"),
+            "position": email_data.get("position"),
+            "department": email_data.get("department"),
+            "verification": verification.get("status"),
+        }
+    return records
+
+
+def diff_snapshots(previous: Dict[str, Dict[str, Any]],
+                   current: Dict[str, Dict[str, Any]],
+                   complete: bool = True) -> List[Dict[str, Any]]:
+    """Return added, removed and changed emails between two snapshots
+
+    Each change is ``{"email", "change", "fields"}`` where ``fields`` maps a
+    watched field to its ``(old, new)`` values for changed emails. When
+    ``current`` does not cover the whole domain (``complete=False``), a
+    missing email may just not have been fetched and is not reported.
+    """
+    changes = []
+
+    for email, record in current.items():
+        before = previous.get(email)
+        if before is None:
+            changes.append({"email": email, "change": "added", "fields": {}})
+            continue
+
+        fields = {
+            field: (before.get(field), record.get(field))
+            for field in WATCHED_FIELDS
+            if before.get(field) != record.get(field)
+        }
+        if fields:
+            changes.append({"email": email, "change": "changed", "fields": fields})
+
+    for email in previous:
+        if complete and email not in current:
+            changes.append({"email": email, "change": "removed", "fields": {}})
+
+    return changes
+
+
+def search_all(client, domain: str, limit: int = 100,
+               max_pages: int = MONITOR_MAX_PAGES) -> Tuple[Dict[str, Any], bool]:
+    """Fetch every page of a fresh domain search
+
+    Returns ``(result, complete)``: the first page's result with the emails
+    of all pages, and whether every email of the domain was fetched.
+    """
+    result, emails, complete = None, [], False
+    for page in range(1, max_pages + 1):
+        page_result = client.domain_search_page(domain=domain, page=page, limit=limit)
+        if "error" in page_result:
+            if result is None:
+                return page_result, False
+            # Keep what was fetched; the rest of the domain is unknown
+            break
+        if result is None:
+            result = page_result
+        data = page_result.get("data") or {}
+        page_emails = data.get("emails") or []
+        emails.extend(page_emails)
+        if "degraded" in page_result:
+            # The budget guard shrank the page; later pages would be misaligned
+            break
+        meta = page_result.get("meta") or data.get("meta") or {}
+        if len(page_emails) < limit or page >= meta.get("total_pages", page + 1):
+            complete = True
+            break
+    return {**result, "data": {**(result.get("data") or {}), "emails": emails}}, complete
+
+
+def monitor_domain(client, store: ResultStore, domain: str,
+                   limit: int = 100) -> Tuple[Dict[str, Any], List[Dict[str, Any]], Optional[float]]:
+    """Search a domain, store a snapshot and diff it against the previous one
+
+    The search always goes to the API, so a cached result can never hide a
+    change, and pages through the whole domain (``limit`` emails per page,
+    up to ``TOMBA_MONITOR_MAX_PAGES`` pages). Returns ``(result, changes,
+    previous_taken_at)``; ``previous_taken_at`` is None on the first
+    (baseline) run. On an API error ``changes`` is empty and no snapshot
+    is stored.
+    """
+    result, complete = search_all(client, domain, limit)
+    if "error" in result:
+        return result, [], None
+
+    emails = (result.get("data") or {}).get("emails") or []
+    current = snapshot_emails(emails)
+
+    latest = store.latest_snapshot(domain)
+    previous_taken_at, previous = latest if latest else (None, {})
+
+    changes = diff_snapshots(previous, current, complete)
+    if not complete:
+        # Emails not fetched this time keep their last known state
+        current = {**previous, **current}
+    store.save_snapshot(domain, current)
+    # Committed before returning, so the next run diffs against this one
+    store.flush()
+
+    logger.info("Monitored %s: %d emails%s, %d changes", domain, len(emails),
+                "" if complete else " (partial)", len(changes))
+    return result, changes, previous_taken_at
@@ -0,0 +1,66 @@
+"""
+Property profiles controlling how much detail entities carry
+
+``minimal`` keeps the fields needed to triage an email, ``standard`` adds
+the person and deliverability basics, and ``full`` writes everything,
+including source and WHOIS summaries. Smaller profiles also skip parsing
+the nested structures they do not emit.
+"""
+
+import contextvars
+from typing import Optional
+
+import settings
+
+MINIMAL, STANDARD, FULL = "minimal", "standard", "full"
+
+# Property names (without prefix) each profile writes; None means all
+PROFILE_FIELDS = {
+    MINIMAL: frozenset({"score", "confidence", "verification_status"}),
+    STANDARD: frozenset({
+        "score", "confidence", "verification_status", "verification_result",
+        "first_name", "last_name", "full_name", "position", "department",
+        "company", "website_url", "country", "type", "seniority",
+        "phone_number", "linkedin", "twitter", "disposable", "webmail",
+        "accept_all",
+    }),
+    FULL: None,
+}
+
+DEFAULT_PROFILE = getattr(settings, "TOMBA_PROPERTY_PROFILE", FULL)
+TRANSFORM_PROFILES = {name.lower(): profile for name, profile in
+                      getattr(settings, "TOMBA_PROPERTY_PROFILES", {}).items()}
+
+_current = contextvars.ContextVar("tomba_profile", default=DEFAULT_PROFILE)
+
+
+def resolve(request, transform_name: str) -> str:
+    """Profile for a request: tomba.profile property, then server settings"""
+    requested = (request.getProperty("tomba.profile") or "").strip().lower()
+    if requested in PROFILE_FIELDS:
+        return requested
+    return TRANSFORM_PROFILES.get(transform_name.lower(), DEFAULT_PROFILE)
+
+
+def current() -> str:
+    """Profile of the request being handled"""
+    return _current.get()
+
+
+def set_current(profile: str) -> contextvars.Token:
+    return _current.set(profile)
+
+
+def reset_current(token: contextvars.Token):
+    _current.reset(token)
+
+
+def includes(profile: str, field: str) -> bool:
+    """Whether ``profile`` writes the property ``field``"""
+    fields: Optional[frozenset] = PROFILE_FIELDS.get(profile)
+    return fields is None or field in fields
+
+
+def wants_summaries(profile: str) -> bool:
+    """Whether sources and WHOIS summaries are parsed and written"""
+    return profile == FULL
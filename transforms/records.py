@@ -0,0 +1,215 @@
+"""
+Compact record types for Tomba.io API results
+
+API responses are parsed once into ``__slots__`` records holding only the
+fields the transforms, the property mapper and the result store use, so the
+nested response dicts can be released as soon as parsing is done.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class Record:
+    """Base class for slotted API result records
+
+    ``FIELDS`` maps each slot to its key path in the API JSON. Nested paths
+    are flattened by joining the keys with ``_`` (``["verification",
+    "status"]`` becomes ``verification_status``), which is also how the
+    property mapper looks values up on records.
+    """
+
+    __slots__ = ()
+    FIELDS: Dict[str, Any] = {}
+
+    def __init__(self, **values):
+        for name in self.__slots__:
+            setattr(self, name, values.get(name))
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Record":
+        """Parse one API JSON object"""
+        record = cls.__new__(cls)
+        for name in cls.__slots__:
+            path = cls.FIELDS.get(name, name)
+            setattr(record, name, _lookup(data, path))
+        return record
+
+    def get(self, name: str, default: Any = None) -> Any:
+        """Dict-style access; missing or empty-None fields return ``default``"""
+        value = getattr(self, name, None)
+        return default if value is None else value
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the non-empty fields as a flat dict"""
+        return {name: getattr(self, name) for name in self.__slots__
+                if getattr(self, name) is not None}
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+def _lookup(data: Dict[str, Any], path) -> Any:
+    """Read a key or nested key path from a dict"""
+    if isinstance(path, str):
+        return data.get(path)
+    current = data
+    for key in path:
+        if not isinstance(current, dict):
+            return None
+        current = current.get(key)
+    return current
+
+
+def summarize_sources(data: Dict[str, Any]) -> Tuple[Optional[int], Optional[str]]:
+    """Return (count, first three source URLs) from a ``sources`` list"""
+    sources = data.get("sources") or []
+    if not sources:
+        return None, None
+    urls = [s.get("uri", "") for s in sources[:3] if s.get("uri")]
+    return len(sources), ", ".join(urls) or None
+
+
+def summarize_whois(data: Dict[str, Any]) -> Tuple[Optional[str], Optional[str]]:
+    """Return (registrar, domain created date) from WHOIS data"""
+    whois = _lookup(data, ["whois"]) or _lookup(data, ["email", "whois"])
+    if not whois:
+        return None, None
+    return whois.get("registrar_name") or None, whois.get("created_date") or None
+
+
+class PersonRecord(Record):
+    """Person details attached to an email"""
+
+    __slots__ = ("first_name", "last_name", "full_name", "position", "department",
+                 "seniority", "gender", "country", "company", "phone_number",
+                 "linkedin", "twitter")
+
+    @property
+    def display_name(self) -> str:
+        return f"{self.first_name or ''} {self.last_name or ''}".strip()
+
+
+class EmailRecord(Record):
+    """Email address result from search, finder, enrichment or verifier"""
+
+    __slots__ = ("email", "type", "score", "confidence", "status", "result",
+                 "verification_status", "verification_result", "website_url",
+                 "disposable", "webmail", "accept_all", "regex", "mx_records",
+                 "smtp_server", "smtp_check", "gibberish", "block",
+                 "last_updated", "last_seen", "sources_count", "source_urls",
+                 "registrar", "domain_created", "person")
+
+    FIELDS = {
+        "verification_status": ["verification", "status"],
+        "verification_result": ["verification", "result"],
+    }
+
+    # Slots filled from summaries rather than read straight from the JSON
+    DERIVED = ("sources_count", "source_urls", "registrar", "domain_created", "person")
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], summaries: bool = True) -> "EmailRecord":
+        """Parse one email object; ``summaries=False`` skips sources and WHOIS"""
+        record = cls.__new__(cls)
+        for name in cls.__slots__:
+            if name not in cls.DERIVED:
+                setattr(record, name, _lookup(data, cls.FIELDS.get(name, name)))
+        if summaries:
+            record.sources_count, record.source_urls = summarize_sources(data)
+            record.registrar, record.domain_created = summarize_whois(data)
+        else:
+            record.sources_count = record.source_urls = None
+            record.registrar = record.domain_created = None
+
+        # Always kept: generic addresses (info@, sales@) have no name but
+        # still carry position, department, country, social links...
+        record.person = PersonRecord.from_dict(data)
+        return record
+
+    @property
+    def named_person(self) -> Optional[PersonRecord]:
+        """The person, when there is a name to create a Person entity from"""
+        person = self.person
+        if person is not None and (person.first_name or person.last_name):
+            return person
+        return None
+
+    def get(self, name: str, default: Any = None) -> Any:
+        """Look a field up on the email, then on its person"""
+        if name in EmailRecord.__slots__:
+            return super().get(name, default)
+        if self.person is not None:
+            return self.person.get(name, default)
+        return default
+
+
+class OrganizationRecord(Record):
+    """Organization details from a domain search"""
+
+    __slots__ = ("organization", "website_url", "industries", "employee_count",
+                 "founded", "description", "country", "city", "social_links")
+
+    FIELDS = {
+        "country": ["location", "country"],
+        "city": ["location", "city"],
+    }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "OrganizationRecord":
+        record = super().from_dict(data)
+        links = data.get("social_links") or {}
+        record.social_links = tuple(
+            (platform, url) for platform, url in links.items() if url) or None
+        return record
+
+
+class PhoneRecord(Record):
+    """Phone finder or validator result"""
+
+    __slots__ = ("valid", "local_format", "intl_format", "e164_format",
+                 "rfc3966_format", "country_code", "line_type", "timezones",
+                 "carrier")
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "PhoneRecord":
+        record = super().from_dict(data)
+        carrier = data.get("carrier") or {}
+        record.carrier = tuple(carrier.items()) if isinstance(
+            carrier, dict) and carrier else None
+        return record
+
+    @property
+    def number(self) -> Optional[str]:
+        return self.intl_format or self.e164_format
+
+
+class TechnologyRecord(Record):
+    """Technology detected on a domain"""
+
+    __slots__ = ("name", "slug", "icon", "website",
+                 "category_id", "category_name", "category_slug")
+
+    FIELDS = {
+        "category_id": ["categories", "id"],
+        "category_name": ["categories", "name"],
+        "category_slug": ["categories", "slug"],
+    }
+
+
+def parse_emails(emails: List[Dict[str, Any]], summaries: bool = True) -> List[EmailRecord]:
+    """Parse a list of email objects, dropping entries without an address"""
+    return [EmailRecord.from_dict(e, summaries) for e in emails or [] if e.get("email")]
+
+
+def parse_domain_search(data: Dict[str, Any],
+                        summaries: bool = True) -> Tuple[Optional[OrganizationRecord], List[EmailRecord]]:
+    """Parse a domain search payload into its organization and emails"""
+    organization = data.get("organization") or {}
+    return (OrganizationRecord.from_dict(organization) if organization else None,
+            parse_emails(data.get("emails"), summaries))
+
+
+def parse_technologies(technologies: List[Dict[str, Any]]) -> List[TechnologyRecord]:
+    """Parse a technology lookup payload"""
+    return [TechnologyRecord.from_dict(t) for t in technologies or []
+            if t.get("name") or t.get("slug")]
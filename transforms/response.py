@@ -0,0 +1,113 @@
+"""
+Merging response builder for Tomba transforms
+
+Transforms add entities freely; when the response is serialized, entities
+sharing an entity type and canonical value are merged into one. The first
+entity wins for conflicting properties, empty properties are filled from
+later duplicates, and distinct link labels are combined.
+"""
+
+import logging
+import re
+from typing import Callable, Dict, List, Tuple
+
+from maltego_trx.maltego import MaltegoEntity, MaltegoTransform
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+metrics.describe("tomba_response_entities_merged_total", "counter",
+                 "Duplicate entities merged before serializing a response")
+
+
+def _lower(value: str) -> str:
+    return value.strip().lower()
+
+
+def _person(value: str) -> str:
+    return re.sub(r"\s+", " ", value).strip().lower()
+
+
+def _phone(value: str) -> str:
+    value = value.strip()
+    return ("+" if value.startswith("+") else "") + re.sub(r"\D", "", value)
+
+
+def _website(value: str) -> str:
+    value = value.strip().lower()
+    value = re.sub(r"^https?://", "", value)
+    return value.rstrip("/")
+
+
+CANONICALIZERS: Dict[str, Callable[[str], str]] = {
+    "maltego.EmailAddress": _lower,
+    "maltego.Domain": _lower,
+    "maltego.DNSName": _lower,
+    "maltego.Website": _website,
+    "maltego.Person": _person,
+    "maltego.Company": _person,
+    "maltego.Organization": _person,
+    "maltego.PhoneNumber": _phone,
+    "maltego.BuiltWithTechnology": _lower,
+}
+
+
+# The only link attribute that stays valid when values are joined; other
+# link fields (color, thickness, style) keep the first entity's value
+LINK_LABEL = "link#maltego.link.label"
+
+
+def entity_key(entity: MaltegoEntity) -> Tuple[str, str]:
+    """(entity type, canonical value) identifying an entity in a response"""
+    canonical = CANONICALIZERS.get(entity.entityType, str.strip)
+    return entity.entityType, canonical(str(entity.value))
+
+
+def merge_entity(target: MaltegoEntity, duplicate: MaltegoEntity):
+    """Fold ``duplicate`` into ``target``"""
+    fields = {field[0]: field for field in target.additionalFields}
+    for field in duplicate.additionalFields:
+        name, value = field[0], field[3]
+        existing = fields.get(name)
+        if existing is None:
+            existing = list(field)
+            target.additionalFields.append(existing)
+            fields[name] = existing
+        elif not existing[3] and value:
+            existing[3] = value
+        elif name == LINK_LABEL and value and value not in str(existing[3]).split(", "):
+            existing[3] = f"{existing[3]}, {value}"
+
+    for info in duplicate.displayInformation:
+        if info not in target.displayInformation:
+            target.displayInformation.append(info)
+    for overlay in duplicate.overlays:
+        if overlay not in target.overlays:
+            target.overlays.append(overlay)
+    target.weight = max(target.weight or 0, duplicate.weight or 0)
+    target.iconURL = target.iconURL or duplicate.iconURL
+
+
+def merge_entities(entities: List[MaltegoEntity]) -> List[MaltegoEntity]:
+    """Return one entity per (type, canonical value), in first-seen order"""
+    merged: Dict[Tuple[str, str], MaltegoEntity] = {}
+    for entity in entities:
+        key = entity_key(entity)
+        if key in merged:
+            merge_entity(merged[key], entity)
+        else:
+            merged[key] = entity
+    return list(merged.values())
+
+
+class MergingTransform(MaltegoTransform):
+    """MaltegoTransform that writes one entity per (type, canonical value)"""
+
+    def build_xml(self):
+        count = len(self.entities)
+        self.entities = merge_entities(self.entities)
+        if len(self.entities) < count:
+            metrics.inc("tomba_response_entities_merged_total", count - len(self.entities))
+            logger.debug("Merged %d duplicate entities", count - len(self.entities))
+        return super().build_xml()
@@ -0,0 +1,570 @@
+"""
+Persistent local result store for Tomba.io API responses
+
+Every successful TombaSDKWrapper response is normalized into indexed SQLite
+tables (emails, persons, organizations, phones, technologies, similar sites)
+and kept verbatim so it can be served again without an API call.
+"""
+
+import inspect
+import json
+import logging
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import wraps
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import settings
+from .records import (EmailRecord, PhoneRecord, parse_domain_search,
+                      parse_emails, parse_technologies)
+
+logger = logging.getLogger(__name__)
+
+STORE_PATH = getattr(settings, "TOMBA_STORE_PATH", None)
+STORE_CACHE_TTL = getattr(settings, "TOMBA_STORE_CACHE_TTL", 0)
+STORE_MEMORY_ENTRIES = getattr(settings, "TOMBA_STORE_MEMORY_ENTRIES", 1024)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    endpoint TEXT NOT NULL,
+    key TEXT NOT NULL,
+    body TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (endpoint, key)
+);
+CREATE INDEX IF NOT EXISTS responses_hits ON responses (hits);
+
+CREATE TABLE IF NOT EXISTS emails (
+    email TEXT PRIMARY KEY,
+    domain TEXT,
+    type TEXT,
+    score INTEGER,
+    position TEXT,
+    department TEXT,
+    seniority TEXT,
+    verification_status TEXT,
+    verification_result TEXT,
+    updated_at REAL
+);
+CREATE INDEX IF NOT EXISTS emails_domain ON emails (domain);
+CREATE INDEX IF NOT EXISTS emails_department ON emails (department);
+
+CREATE TABLE IF NOT EXISTS persons (
+    email TEXT PRIMARY KEY,
+    first_name TEXT,
+    last_name TEXT,
+    full_name TEXT,
+    position TEXT,
+    company TEXT,
+    country TEXT,
+    linkedin TEXT,
+    twitter TEXT,
+    updated_at REAL
+);
+CREATE INDEX IF NOT EXISTS persons_full_name ON persons (full_name);
+
+CREATE TABLE IF NOT EXISTS organizations (
+    domain TEXT PRIMARY KEY,
+    name TEXT,
+    industries TEXT,
+    employee_count INTEGER,
+    founded TEXT,
+    country TEXT,
+    city TEXT,
+    updated_at REAL
+);
+
+CREATE TABLE IF NOT EXISTS phones (
+    email TEXT NOT NULL DEFAULT '',
+    number TEXT NOT NULL,
+    e164 TEXT,
+    country_code TEXT,
+    line_type TEXT,
+    carrier TEXT,
+    valid INTEGER,
+    updated_at REAL,
+    PRIMARY KEY (email, number)
+);
+CREATE INDEX IF NOT EXISTS phones_number ON phones (number);
+
+CREATE TABLE IF NOT EXISTS technologies (
+    domain TEXT NOT NULL,
+    slug TEXT NOT NULL,
+    name TEXT,
+    website TEXT,
+    category_slug TEXT,
+    category_name TEXT,
+    updated_at REAL,
+    PRIMARY KEY (domain, slug)
+);
+CREATE INDEX IF NOT EXISTS technologies_slug ON technologies (slug);
+CREATE INDEX IF NOT EXISTS technologies_name ON technologies (name COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS technologies_category ON technologies (category_slug);
+
+CREATE TABLE IF NOT EXISTS similar_sites (
+    domain TEXT NOT NULL,
+    similar_domain TEXT NOT NULL,
+    name TEXT,
+    updated_at REAL,
+    PRIMARY KEY (domain, similar_domain)
+);
+CREATE INDEX IF NOT EXISTS similar_sites_similar ON similar_sites (similar_domain);
+
+CREATE TABLE IF NOT EXISTS domain_snapshots (
+    domain TEXT NOT NULL,
+    taken_at REAL NOT NULL,
+    body TEXT NOT NULL,
+    PRIMARY KEY (domain, taken_at)
+);
+"""
+
+# Primary key columns used for upserts
+PRIMARY_KEYS = {
+    "emails": ("email",),
+    "persons": ("email",),
+    "organizations": ("domain",),
+    "phones": ("email", "number"),
+    "technologies": ("domain", "slug"),
+    "similar_sites": ("domain", "similar_domain"),
+}
+
+
+class ResultStore:
+    """SQLite (WAL mode) store with batched writes off the request path
+
+    Writes are queued and committed by a background thread in batches.
+    Reads go through a small in-memory LRU before touching SQLite, so the
+    store doubles as a warm cache tier that survives restarts.
+
+    The writer thread owns one connection. Reads borrow one of at most
+    ``readers`` connections, whichever thread or greenlet they run on,
+    so request handlers do not each open (and leak) their own.
+    """
+
+    def __init__(self, path: str, cache_ttl: float = 0, memory_entries: int = 1024,
+                 batch_size: int = 200, flush_interval: float = 0.5, readers: int = 4):
+        self.path = path
+        self.cache_ttl = cache_ttl
+        self.memory_entries = memory_entries
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.readers = max(1, readers)
+
+        # Entries hold the encoded body, so every hit decodes a private copy
+        self._memory: "OrderedDict[Tuple[str, str], Tuple[float, str]]" = OrderedDict()
+        self._memory_lock = threading.Lock()
+        self._queue: "queue.Queue" = queue.Queue()
+        self._idle_readers: "queue.LifoQueue" = queue.LifoQueue()
+        self._opened_readers = 0
+        self._readers_lock = threading.Lock()
+
+        self._write_connection = self._connect()
+        self._write_connection.executescript(SCHEMA)
+        self._write_connection.commit()
+
+        self._writer = threading.Thread(
+            target=self._write_loop, name="tomba-store-writer", daemon=True)
+        self._writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection usable from any thread (one at a time)"""
+        connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        connection.row_factory = sqlite3.Row
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    @contextmanager
+    def _reader(self):
+        """Borrow a read connection, waiting if all ``readers`` are in use"""
+        try:
+            connection = self._idle_readers.get_nowait()
+        except queue.Empty:
+            with self._readers_lock:
+                opened = self._opened_readers < self.readers
+                if opened:
+                    self._opened_readers += 1
+            if opened:
+                try:
+                    connection = self._connect()
+                except Exception:
+                    with self._readers_lock:
+                        self._opened_readers -= 1
+                    raise
+            else:
+                connection = self._idle_readers.get()
+        try:
+            yield connection
+        finally:
+            self._idle_readers.put(connection)
+
+    def lookup(self, endpoint: str, key: str) -> Optional[Dict[str, Any]]:
+        """Return a stored response younger than the cache TTL"""
+        if self.cache_ttl <= 0:
+            return None
+
+        now = time.time()
+        cache_key = (endpoint, key)
+
+        with self._memory_lock:
+            entry = self._memory.get(cache_key)
+            if entry is not None:
+                self._memory.move_to_end(cache_key)
+        if entry is None:
+            with self._reader() as connection:
+                row = connection.execute(
+                    "SELECT body, fetched_at FROM responses WHERE endpoint = ? AND key = ?",
+                    (endpoint, key)
+                ).fetchone()
+            if row is None:
+                return None
+            entry = (row["fetched_at"], row["body"])
+            self._remember(cache_key, entry)
+
+        fetched_at, encoded = entry
+        if now - fetched_at > self.cache_ttl:
+            return None
+
+        self._queue.put(("hit", (endpoint, key)))
+        return json.loads(encoded)
+
+    def prime(self, entries: int) -> int:
+        """Load the most requested fresh responses into the in-memory tier"""
+        if self.cache_ttl <= 0 or entries <= 0 or self.memory_entries <= 0:
+            return 0
+        rows = self.query(
+            "SELECT endpoint, key, body, fetched_at FROM responses WHERE fetched_at >= ? "
+            "ORDER BY hits DESC LIMIT ?",
+            (time.time() - self.cache_ttl, min(entries, self.memory_entries)))
+        # Hottest last, so they are the last to be evicted
+        for row in reversed(rows):
+            self._remember((row["endpoint"], row["key"]), (row["fetched_at"], row["body"]))
+        return len(rows)
+
+    def record(self, endpoint: str, key: str, subject: str, result: Dict[str, Any]):
+        """Queue a successful response for storage"""
+        body = {k: v for k, v in result.items() if k != "rate_limit"}
+        try:
+            encoded = json.dumps(body)
+        except (TypeError, ValueError):
+            logger.debug("Skipping non-JSON %s response", endpoint)
+            return
+
+        fetched_at = time.time()
+        self._remember((endpoint, key), (fetched_at, encoded))
+        self._queue.put(("record", (endpoint, key, subject, encoded, body, fetched_at)))
+
+    def query(self, sql: str, params: Iterable[Any] = ()) -> List[sqlite3.Row]:
+        """Run a read-only query against the store"""
+        with self._reader() as connection:
+            return connection.execute(sql, tuple(params)).fetchall()
+
+    def domains_using(self, technology: str, limit: int = 500) -> List[sqlite3.Row]:
+        """Return profiled domains using a technology (slug, name or category)"""
+        term = technology.strip()
+        return self.query(
+            "SELECT domain, slug, name, category_name, MAX(updated_at) AS updated_at "
+            "FROM technologies "
+            "WHERE slug = ? OR name = ? COLLATE NOCASE OR category_slug = ? "
+            "GROUP BY domain ORDER BY updated_at DESC LIMIT ?",
+            (term.lower(), term, term.lower(), limit))
+
+    def technologies_of(self, domain: str) -> List[sqlite3.Row]:
+        """Return the technologies recorded for a domain"""
+        return self.query(
+            "SELECT slug, name, website, category_slug, category_name, updated_at "
+            "FROM technologies WHERE domain = ? ORDER BY name",
+            (domain.strip().lower(),))
+
+    def latest_snapshot(self, domain: str) -> Optional[Tuple[float, Dict[str, Any]]]:
+        """Return (taken_at, records) of the newest monitoring snapshot"""
+        rows = self.query(
+            "SELECT taken_at, body FROM domain_snapshots WHERE domain = ? "
+            "ORDER BY taken_at DESC LIMIT 1",
+            (domain,))
+        if not rows:
+            return None
+        return rows[0]["taken_at"], json.loads(rows[0]["body"])
+
+    def save_snapshot(self, domain: str, records: Dict[str, Any], keep: int = 10):
+        """Queue a monitoring snapshot, keeping the newest ``keep`` per domain"""
+        self._queue.put(("snapshot", (domain, json.dumps(records), time.time(), keep)))
+
+    def flush(self, timeout: float = None):
+        """Block until every queued write has been committed"""
+        done = threading.Event()
+        self._queue.put(("flush", done))
+        done.wait(timeout)
+
+    def memory_stats(self) -> Dict[str, int]:
+        """Entries and approximate bytes held by the in-memory tier"""
+        with self._memory_lock:
+            entries = list(self._memory.items())
+        size = sys.getsizeof(self._memory) + sum(
+            sys.getsizeof(endpoint) + sys.getsizeof(key) + sys.getsizeof(encoded)
+            for (endpoint, key), (_, encoded) in entries)
+        return {"entries": len(entries), "bytes": size}
+
+    def _remember(self, cache_key: Tuple[str, str], entry: Tuple[float, str]):
+        """Keep a response in the in-memory LRU tier"""
+        if self.memory_entries <= 0:
+            return
+        with self._memory_lock:
+            self._memory[cache_key] = entry
+            self._memory.move_to_end(cache_key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def _write_loop(self):
+        """Commit queued writes in batches"""
+        while True:
+            items = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(items) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    items.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+                if items[-1][0] == "flush":
+                    break
+
+            try:
+                self._write_batch(items)
+            except Exception as e:
+                logger.error("Result store write failed: %s", e)
+            finally:
+                for kind, payload in items:
+                    if kind == "flush":
+                        payload.set()
+
+    def _write_batch(self, items: list):
+        """Write one batch of queued items in a single transaction"""
+        connection = self._write_connection
+        with connection:
+            for kind, payload in items:
+                if kind == "hit":
+                    connection.execute(
+                        "UPDATE responses SET hits = hits + 1 WHERE endpoint = ? AND key = ?",
+                        payload)
+                elif kind == "record":
+                    endpoint, key, subject, encoded, body, fetched_at = payload
+                    connection.execute(
+                        "INSERT INTO responses (endpoint, key, body, fetched_at) VALUES (?, ?, ?, ?) "
+                        "ON CONFLICT (endpoint, key) DO UPDATE SET "
+                        "body = excluded.body, fetched_at = excluded.fetched_at",
+                        (endpoint, key, encoded, fetched_at))
+                    for table, row in normalize(endpoint, subject, body):
+                        row["updated_at"] = fetched_at
+                        self._upsert(connection, table, row)
+                elif kind == "snapshot":
+                    domain, encoded, taken_at, keep = payload
+                    connection.execute(
+                        "INSERT OR REPLACE INTO domain_snapshots (domain, taken_at, body) VALUES (?, ?, ?)",
+                        (domain, taken_at, encoded))
+                    connection.execute(
+                        "DELETE FROM domain_snapshots WHERE domain = ? AND taken_at NOT IN ("
+                        "SELECT taken_at FROM domain_snapshots WHERE domain = ? "
+                        "ORDER BY taken_at DESC LIMIT ?)",
+                        (domain, domain, keep))
+
+    def _upsert(self, connection: sqlite3.Connection, table: str, row: Dict[str, Any]):
+        """Insert a row, keeping existing column values the new row lacks"""
+        columns = list(row)
+        keys = PRIMARY_KEYS[table]
+        updates = ", ".join(
+            f"{c} = COALESCE(excluded.{c}, {table}.{c})" for c in columns if c not in keys)
+        connection.execute(
+            f"INSERT INTO {table} ({', '.join(columns)}) "
+            f"VALUES ({', '.join('?' for _ in columns)}) "
+            f"ON CONFLICT ({', '.join(keys)}) DO UPDATE SET {updates}",
+            [row[c] for c in columns])
+
+
+def _email_rows(record: EmailRecord, domain: str = None) -> List[Tuple[str, Dict[str, Any]]]:
+    """Normalize one email record into email and person rows"""
+    email = (record.email or "").lower()
+    if not email:
+        return []
+
+    rows = [("emails", {
+        "email": email,
+        "domain": domain or email.rpartition("@")[2],
+        "type": record.type,
+        "score": record.score,
+        "position": record.get("position"),
+        "department": record.get("department"),
+        "seniority": record.get("seniority"),
+        "verification_status": record.verification_status or record.status,
+        "verification_result": record.verification_result or record.result,
+    })]
+
+    person = record.person
+    if person is not None and person.to_dict():
+        rows.append(("persons", {
+            "email": email,
+            "first_name": person.first_name,
+            "last_name": person.last_name,
+            "full_name": person.full_name or person.display_name or None,
+            "position": person.position,
+            "company": person.company,
+            "country": person.country,
+            "linkedin": person.linkedin,
+            "twitter": person.twitter,
+        }))
+    return rows
+
+
+def _phone_row(record: PhoneRecord, email: str = "", number: str = None) -> Tuple[str, Dict[str, Any]]:
+    """Normalize a phone finder/validator record"""
+    carrier = dict(record.carrier or ())
+    return ("phones", {
+        "email": email,
+        "number": number or record.number,
+        "e164": record.e164_format,
+        "country_code": record.country_code,
+        "line_type": record.line_type,
+        "carrier": carrier.get("name"),
+        "valid": 1 if record.valid else 0,
+    })
+
+
+def normalize(endpoint: str, subject: str, body: Dict[str, Any]) -> List[Tuple[str, Dict[str, Any]]]:
+    """Turn one API response into (table, row) pairs"""
+    data = body.get("data")
+    if not data:
+        return []
+
+    rows = []
+    if endpoint == "domain_search" and isinstance(data, dict):
+        domain = subject.lower()
+        organization, emails = parse_domain_search(data)
+        if organization is not None:
+            rows.append(("organizations", {
+                "domain": domain,
+                "name": organization.organization,
+                "industries": organization.industries,
+                "employee_count": organization.employee_count,
+                "founded": organization.founded,
+                "country": organization.country,
+                "city": organization.city,
+            }))
+        for record in emails:
+            rows.extend(_email_rows(record, domain))
+
+    elif endpoint == "email_verifier" and isinstance(data, dict):
+        record = EmailRecord.from_dict(data.get("email") or {})
+        record.email = record.email or subject
+        rows.extend(_email_rows(record))
+
+    elif endpoint in ("email_finder", "email_enrichment", "linkedin_finder") and isinstance(data, dict):
+        rows.extend(_email_rows(EmailRecord.from_dict(data)))
+
+    elif endpoint == "author_finder" and isinstance(data, dict):
+        for record in parse_emails(data.get("emails")):
+            rows.extend(_email_rows(record))
+
+    elif endpoint == "phone_finder" and isinstance(data, dict):
+        row = _phone_row(PhoneRecord.from_dict(data), email=subject.lower())
+        if row[1]["number"]:
+            rows.append(row)
+
+    elif endpoint == "phone_validator" and isinstance(data, dict):
+        rows.append(_phone_row(PhoneRecord.from_dict(data), number=subject))
+
+    elif endpoint == "technology_lookup" and isinstance(data, list):
+        for tech in parse_technologies(data):
+            rows.append(("technologies", {
+                "domain": subject.lower(),
+                "slug": tech.slug or tech.name,
+                "name": tech.name,
+                "website": tech.website,
+                "category_slug": tech.category_slug,
+                "category_name": tech.category_name,
+            }))
+
+    elif endpoint == "similar_domain" and isinstance(data, list):
+        for site in data:
+            url = site.get("website_url")
+            if url:
+                rows.append(("similar_sites", {
+                    "domain": subject.lower(),
+                    "similar_domain": url.lower(),
+                    "name": site.get("name"),
+                }))
+
+    return rows
+
+
+_store: Optional[ResultStore] = None
+_store_lock = threading.Lock()
+
+
+def memory_stats() -> Optional[Dict[str, int]]:
+    """In-memory tier stats of the process-wide store, if it has been opened"""
+    return _store.memory_stats() if _store is not None else None
+
+
+def get_store() -> Optional[ResultStore]:
+    """Return the process-wide store, or None when no path is configured
+
+    The store is created lazily so its writer thread starts in each worker
+    process rather than in a pre-fork master.
+    """
+    global _store
+    if not STORE_PATH:
+        return None
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = ResultStore(
+                    STORE_PATH,
+                    cache_ttl=STORE_CACHE_TTL,
+                    memory_entries=STORE_MEMORY_ENTRIES
+                )
+    return _store
+
+
+def stored(endpoint: str):
+    """Serve a TombaSDKWrapper call from the store and record fresh results
+
+    The first argument of the wrapped method is the subject (domain, email,
+    phone or URL); remaining arguments become part of the cache key.
+    """
+    def decorator(method):
+        signature = inspect.signature(method)
+
+        @wraps(method)
+        def wrapper(self, *args, **kwargs):
+            store = get_store()
+            if store is None:
+                return method(self, *args, **kwargs)
+
+            bound = signature.bind(self, *args, **kwargs)
+            bound.apply_defaults()
+            arguments = list(bound.arguments.items())[1:]
+            subject = str(arguments[0][1]).strip() if arguments else ""
+            extras = "&".join(f"{k}={v}" for k, v in arguments[1:])
+            key = f"{subject}?{extras}" if extras else subject
+
+            cached = store.lookup(endpoint, key)
+            if cached is not None:
+                logger.debug("Serving %s for %s from result store", endpoint, subject)
+                return cached
+
+            result = method(self, *args, **kwargs)
+            # Degraded results were cut short by the budget guard
+            if isinstance(result, dict) and "error" not in result and "degraded" not in result:
+                store.record(endpoint, key, subject, result)
+            return result
+
+        return wrapper
+    return decorator
@@ -0,0 +1,93 @@
+"""
+Worker warmup and readiness for the transform server
+
+``start()`` is called once per worker (from the gunicorn ``post_worker_init``
+hook in gunicorn.conf.py, or before the development server starts) and
+runs ``run()`` in the background while the worker already serves. It
+opens pooled connections to api.tomba.io, starts the account usage poller
+and loads the most requested stored results into the in-memory cache.
+``/ready`` answers 503 until it has finished, so a load balancer only
+sends traffic to warm workers.
+"""
+
+import logging
+import threading
+import time
+
+import settings
+from settings import TOMBA_API_KEY, TOMBA_SECRET_KEY
+from transforms import metrics
+from transforms.BaseTombaTransform import TombaSDKWrapper
+from transforms.limiter import get_limiter
+from transforms.store import get_store
+
+logger = logging.getLogger(__name__)
+
+WARMUP_CONNECTIONS = getattr(settings, "TOMBA_WARMUP_CONNECTIONS", 2)
+WARMUP_PRIME_ENTRIES = getattr(settings, "TOMBA_WARMUP_PRIME_ENTRIES", 256)
+
+metrics.describe("tomba_warmup_seconds", "gauge", "Time this worker spent warming up")
+
+_ready = threading.Event()
+
+
+def is_ready() -> bool:
+    return _ready.is_set()
+
+
+def run(connections: int = WARMUP_CONNECTIONS, prime_entries: int = WARMUP_PRIME_ENTRIES):
+    """Warm this worker up, then mark it ready
+
+    Every step is best effort: a worker that cannot reach the API still
+    becomes ready and serves stored results or errors as usual.
+    """
+    start = time.monotonic()
+    get_limiter()
+
+    if TOMBA_API_KEY and TOMBA_SECRET_KEY:
+        wrapper = TombaSDKWrapper.shared(TOMBA_API_KEY, TOMBA_SECRET_KEY)
+        if connections > 0:
+            opened = wrapper.client.preconnect(connections)
+            logger.info("Opened %d of %d Tomba.io connections", opened, connections)
+        wrapper.budget.start()
+
+    store = get_store()
+    if store is not None and prime_entries > 0:
+        try:
+            primed = store.prime(prime_entries)
+            logger.info("Primed %d stored results into memory", primed)
+        except Exception as e:
+            logger.warning("Could not prime result cache: %s", e)
+
+    elapsed = time.monotonic() - start
+    metrics.set_gauge("tomba_warmup_seconds", round(elapsed, 3))
+    logger.info("Worker warm after %.2fs", elapsed)
+    _ready.set()
+
+
+def start(connections: int = WARMUP_CONNECTIONS, prime_entries: int = WARMUP_PRIME_ENTRIES):
+    """Warm this worker up in the background (a greenlet under gevent)
+
+    The worker starts accepting connections right away, so ``/ready`` can
+    answer 503 while warmup runs instead of the socket staying closed.
+    """
+    def warm():
+        try:
+            run(connections, prime_entries)
+        except Exception as e:
+            logger.error("Worker warmup failed: %s", e)
+            _ready.set()
+
+    thread = threading.Thread(target=warm, name="tomba-warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+def install(app):
+    """Add the /ready readiness endpoint"""
+
+    @app.route('/ready', methods=['GET'])
+    def ready():
+        if is_ready():
+            return "ready\n", 200, {'Content-Type': 'text/plain'}
+        return "warming up\n", 503, {'Content-Type': 'text/plain'}